@@ -1,16 +1,20 @@
-from PyQt6 import uic
+from functools import partial
+
 from PyQt6.QtCore import pyqtSignal
 from PyQt6.QtWidgets import QDialog, QMessageBox
 
 from auth.user_management import get_all_permissions, update_user, add_user
+from auth.worker import AuthThread
+from ui_loader import load_ui
 
 
 class AddUserDialog(QDialog):
     user_changed = pyqtSignal()
     def __init__(self, parent=None, user=None):
         super().__init__(parent)
-        uic.loadUi("Qt/add_user_dialog.ui", self)
+        load_ui(self, "Qt/add_user_dialog.ui")
         self.user = user  # None = neuer User, sonst dict mit id, username, permissions
+        self._save_thread = None
         self._fill_permissions()
         if user:
             self.editUsername.setText(user["username"])
@@ -51,21 +55,37 @@ class AddUserDialog(QDialog):
             if pw1 != pw2:
                 QMessageBox.warning(self, "Fehler", "Passwörter stimmen nicht überein.")
                 return
-            try:
-                add_user(username, pw1, perms)
-                self.user_changed.emit()
-            except Exception as e:
-                QMessageBox.warning(self, "Fehler", f"Fehler beim Anlegen: {e}")
-                return
+            func, args, error_prefix = add_user, (username, pw1, perms), "Fehler beim Anlegen"
         else:
             password = pw1 if pw1 == pw2 and pw1 else None
             if (pw1 or pw2) and pw1 != pw2:
                 QMessageBox.warning(self, "Fehler", "Passwörter stimmen nicht überein.")
                 return
-            try:
-                update_user(self.user["id"], username, password, perms)
-                self.user_changed.emit()
-            except Exception as e:
-                QMessageBox.warning(self, "Fehler", f"Fehler beim Bearbeiten: {e}")
-                return
-        self.accept()
\ No newline at end of file
+            func, args = update_user, (self.user["id"], username, password, perms)
+            error_prefix = "Fehler beim Bearbeiten"
+
+        # Passwort-Hash (bcrypt) und Speichern im Hintergrund
+        self._set_busy(True)
+        self._save_thread = AuthThread(func, *args, parent=self)
+        self._save_thread.succeeded.connect(self._on_saved)
+        self._save_thread.failed.connect(partial(self._on_save_failed, error_prefix))
+        self._save_thread.start()
+
+    def _on_saved(self, _):
+        self._set_busy(False)
+        self.user_changed.emit()
+        self.accept()
+
+    def _on_save_failed(self, error_prefix, message):
+        self._set_busy(False)
+        QMessageBox.warning(self, "Fehler", f"{error_prefix}: {message}")
+
+    def _set_busy(self, busy):
+        self.btnSave.setEnabled(not busy)
+        self.btnCancel.setEnabled(not busy)
+
+    def done(self, result):
+        # Der Speicher-Thread darf nicht zusammen mit dem Dialog zerstört werden
+        if self._save_thread is not None:
+            self._save_thread.wait()
+        super().done(result)
@@ -1,5 +1,10 @@
+from functools import partial
+
 from PyQt6.QtWidgets import QDialog, QLineEdit, QLabel, QPushButton, QVBoxLayout, QMessageBox
 
+from auth.session import start_session
+from auth.worker import AuthThread
+
 class LoginDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -25,25 +30,51 @@ class LoginDialog(QDialog):
         self.success = False
         self._login_in_progress = False  # Verhindert mehrfaches Auslösen
         self._user_id = None
+        self._login_thread = None
 
     def try_login(self):
         if self._login_in_progress:
             return
-        self._login_in_progress = True
 
         username = self.edit_user.text().strip()
         password = self.edit_pass.text()
-        from auth.user_management import check_user_credentials, get_user_id_by_username
-        if check_user_credentials(username, password):
+        from auth.user_management import authenticate
+        # bcrypt-Prüfung im Hintergrund, der Dialog bleibt bedienbar
+        self._set_busy(True)
+        self._login_thread = AuthThread(authenticate, username, password, parent=self)
+        self._login_thread.succeeded.connect(partial(self._on_login_checked, username))
+        self._login_thread.failed.connect(self._on_login_failed)
+        self._login_thread.start()
+
+    def _on_login_checked(self, username, user_id):
+        self._set_busy(False)
+        if user_id is not None:
             self.success = True
-            self._user_id = get_user_id_by_username(username)  # Hole user_id aus der DB
+            self._user_id = user_id
+            start_session(self._user_id, username)
             self.accept()
         else:
             QMessageBox.warning(self, "Anmeldungsfehler", "Die eingegebenen Nutzerdaten wurden nicht gefunden\n"
                                                           "Bitte prüfen Sie Ihre Eingabe.")
             self.edit_pass.clear()
             self.edit_pass.setFocus()
-        self._login_in_progress = False
+
+    def _on_login_failed(self, message):
+        self._set_busy(False)
+        QMessageBox.critical(self, "Anmeldungsfehler", f"Die Anmeldung ist fehlgeschlagen:\n{message}")
+
+    def _set_busy(self, busy):
+        self._login_in_progress = busy  # Verhindert mehrfaches Auslösen
+        self.btn_login.setEnabled(not busy)
+        self.edit_user.setEnabled(not busy)
+        self.edit_pass.setEnabled(not busy)
+        self.btn_login.setText("Anmeldung läuft..." if busy else "Anmelden")
+
+    def done(self, result):
+        # Der Prüf-Thread darf nicht zusammen mit dem Dialog zerstört werden
+        if self._login_thread is not None:
+            self._login_thread.wait()
+        super().done(result)
 
     def get_user_id(self):
         return self._user_id
\ No newline at end of file
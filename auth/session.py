@@ -0,0 +1,69 @@
+# This file contains the session of the logged-in user with its cached permissions
+
+from config import IS_AUTHORIZATION_ACTIVE
+from database import get_connection
+
+# Session des angemeldeten Nutzers (eine pro Programmstart)
+_current_session = None
+
+
+def load_permission_ids(user_id):
+    """
+    Reads the PERMISSION_IDs of a user from the database.
+    """
+    rows = get_connection().execute("SELECT PERMISSION_ID FROM REF_USER_PERMISSIONS WHERE USER_ID = ?",
+                                    (user_id,)).fetchall()
+    return frozenset(int(row[0]) for row in rows)
+
+
+class Session:
+    """
+    The logged-in user. Its permissions are read once and kept until invalidate() is called,
+    which update_user/delete_user do when the permissions of this user change.
+    """
+
+    def __init__(self, user_id=None, username=None):
+        self.user_id = user_id
+        self.username = username
+        self._permission_ids = None
+
+    def permission_ids(self):
+        if self._permission_ids is None:
+            self._permission_ids = load_permission_ids(self.user_id)
+        return self._permission_ids
+
+    def max_permission(self):
+        """
+        Returns the highest PERMISSION_ID of the user (0 without permissions).
+        Wenn IS_AUTHORIZATION_ACTIVE False ist, wird immer 9999 zurückgegeben.
+        """
+        if not IS_AUTHORIZATION_ACTIVE:
+            return 9999
+        return max(self.permission_ids(), default=0)
+
+    def invalidate(self):
+        """
+        Drops the cached permissions, the next check reads them again.
+        """
+        self._permission_ids = None
+
+
+def start_session(user_id, username):
+    """
+    Creates the session after the login and makes it the current one.
+    """
+    global _current_session
+    _current_session = Session(user_id, username)
+    return _current_session
+
+
+def current_session():
+    return _current_session
+
+
+def invalidate_user(user_id):
+    """
+    Called after the permissions of a user were changed: refreshes the current session if it is that user.
+    """
+    if _current_session is not None and _current_session.user_id == user_id:
+        _current_session.invalidate()
@@ -1,11 +1,29 @@
-import sqlite3
 import bcrypt
 
-from config import DB_PATH
+from auth.session import invalidate_user
+from config import BCRYPT_ROUNDS
+from database import get_connection
+
+
+def hash_password(password):
+    """
+    Hashes a password with the configured bcrypt cost factor (BCRYPT_ROUNDS).
+    """
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode()
+
+
+def hash_rounds(password_hash):
+    """
+    Returns the cost factor of a bcrypt hash ("$2b$12$..." -> 12), None if it cannot be read.
+    """
+    try:
+        return int(password_hash.split("$")[2])
+    except (IndexError, ValueError):
+        return None
 
 
 def get_users_with_permissions():
-    with sqlite3.connect(DB_PATH) as conn:
+    with get_connection() as conn:
         c = conn.cursor()
         c.execute('''
             SELECT USERS.ID, USERS.USERNAME, GROUP_CONCAT(PERMISSIONS.APP_PERM)
@@ -18,80 +36,84 @@ def get_users_with_permissions():
         return c.fetchall()
 
 def get_all_permissions():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT ID, APP_PERM FROM PERMISSIONS")
-    perms = c.fetchall()
-    conn.close()
+    with get_connection() as conn:
+        c = conn.cursor()
+        c.execute("SELECT ID, APP_PERM FROM PERMISSIONS")
+        perms = c.fetchall()
     return perms
 
 def add_permission_if_not_exists(value):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("INSERT OR IGNORE INTO PERMISSIONS (APP_PERM) VALUES (?)", (value,))
-    conn.commit()
-    conn.close()
+    with get_connection() as conn:
+        c = conn.cursor()
+        c.execute("INSERT OR IGNORE INTO PERMISSIONS (APP_PERM) VALUES (?)", (value,))
 
 def add_user(username, password, permission_ids):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    password_hash = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
-    c.execute("INSERT INTO USERS (USERNAME, PASSWORD_HASH) VALUES (?, ?)", (username, password_hash))
-    user_id = c.lastrowid
-    for pid in permission_ids:
-        c.execute("INSERT INTO REF_USER_PERMISSIONS (USER_ID, PERMISSION_ID) VALUES (?, ?)", (user_id, pid))
-    conn.commit()
-    conn.close()
+    with get_connection() as conn:
+        c = conn.cursor()
+        password_hash = hash_password(password)
+        c.execute("INSERT INTO USERS (USERNAME, PASSWORD_HASH) VALUES (?, ?)", (username, password_hash))
+        user_id = c.lastrowid
+        for pid in permission_ids:
+            c.execute("INSERT INTO REF_USER_PERMISSIONS (USER_ID, PERMISSION_ID) VALUES (?, ?)", (user_id, pid))
 
 def update_user(user_id, username, password, permission_ids):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    if password:
-        password_hash = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
-        c.execute("UPDATE USERS SET USERNAME=?, PASSWORD_HASH=? WHERE ID=?", (username, password_hash, user_id))
-    else:
-        c.execute("UPDATE USERS SET USERNAME=? WHERE id=?", (username, user_id))
-    c.execute("DELETE FROM REF_USER_PERMISSIONS WHERE USER_ID=?", (user_id,))
-    for pid in permission_ids:
-        c.execute("INSERT INTO REF_USER_PERMISSIONS (USER_ID, PERMISSION_ID) VALUES (?, ?)", (user_id, pid))
-    conn.commit()
-    conn.close()
+    with get_connection() as conn:
+        c = conn.cursor()
+        if password:
+            password_hash = hash_password(password)
+            c.execute("UPDATE USERS SET USERNAME=?, PASSWORD_HASH=? WHERE ID=?", (username, password_hash, user_id))
+        else:
+            c.execute("UPDATE USERS SET USERNAME=? WHERE id=?", (username, user_id))
+        c.execute("DELETE FROM REF_USER_PERMISSIONS WHERE USER_ID=?", (user_id,))
+        for pid in permission_ids:
+            c.execute("INSERT INTO REF_USER_PERMISSIONS (USER_ID, PERMISSION_ID) VALUES (?, ?)", (user_id, pid))
+    # Geänderte Rechte gelten sofort, auch für den angemeldeten Nutzer selbst
+    invalidate_user(user_id)
 
 def delete_user(user_id):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    # Erst alle Permissions-Referenzen entfernen
-    c.execute("DELETE FROM REF_USER_PERMISSIONS WHERE USER_ID=?", (user_id,))
-    # Dann den User selbst löschen
-    c.execute("DELETE FROM USERS WHERE ID=?", (user_id,))
-    conn.commit()
-    conn.close()
+    with get_connection() as conn:
+        c = conn.cursor()
+        # Erst alle Permissions-Referenzen entfernen
+        c.execute("DELETE FROM REF_USER_PERMISSIONS WHERE USER_ID=?", (user_id,))
+        # Dann den User selbst löschen
+        c.execute("DELETE FROM USERS WHERE ID=?", (user_id,))
+    invalidate_user(user_id)
 
 def user_has_permission(user_id, permission_name):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''
-        SELECT 1 FROM users
-        JOIN REF_USER_PERMISSIONS ON USERS.ID = REF_USER_PERMISSIONS.USER_ID
-        JOIN PERMISSIONS ON REF_USER_PERMISSIONS.PERMISSION_ID = PERMISSIONS.ID
-        WHERE USERS.ID=? AND PERMISSIONS.APP_PERM=?
-    ''', (user_id, permission_name))
-    ret = c.fetchone()
-    conn.close()
+    with get_connection() as conn:
+        c = conn.cursor()
+        c.execute('''
+            SELECT 1 FROM users
+            JOIN REF_USER_PERMISSIONS ON USERS.ID = REF_USER_PERMISSIONS.USER_ID
+            JOIN PERMISSIONS ON REF_USER_PERMISSIONS.PERMISSION_ID = PERMISSIONS.ID
+            WHERE USERS.ID=? AND PERMISSIONS.APP_PERM=?
+        ''', (user_id, permission_name))
+        ret = c.fetchone()
     return ret is not None
 
+def authenticate(username, password):
+    """
+    Checks the credentials and returns the user id, None if they are wrong.
+    Id and hash come from a single query (covered by idx_users_username). A hash made with
+    another cost factor than BCRYPT_ROUNDS is replaced by a new one after the successful check,
+    so changing the setting takes effect at each user's next login.
+    Slow on purpose (bcrypt), call it from a worker thread (auth.worker.AuthThread).
+    """
+    conn = get_connection()
+    row = conn.execute("SELECT ID, PASSWORD_HASH FROM USERS WHERE USERNAME=?", (username,)).fetchone()
+    if row is None or not bcrypt.checkpw(password.encode(), row[1].encode()):
+        return None
+    user_id, password_hash = row
+    if hash_rounds(password_hash) != BCRYPT_ROUNDS:
+        with conn:
+            conn.execute("UPDATE USERS SET PASSWORD_HASH=? WHERE ID=?", (hash_password(password), user_id))
+    return user_id
+
 def check_user_credentials(username, password):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT PASSWORD_HASH FROM USERS WHERE USERNAME=?", (username,))
-    row = c.fetchone()
-    conn.close()
-    if row:
-        return bcrypt.checkpw(password.encode(), row[0].encode())
-    return False
+    return authenticate(username, password) is not None
 
 def get_user_id_by_username(username):
-    with sqlite3.connect(DB_PATH) as conn:
+    with get_connection() as conn:
         cur = conn.cursor()
         cur.execute("SELECT id FROM users WHERE username = ?", (username,))
         row = cur.fetchone()
@@ -1,15 +1,15 @@
-from PyQt6 import uic
 from PyQt6.QtCore import Qt
 from PyQt6.QtWidgets import QDialog, QMessageBox, QTableWidgetItem, QPushButton, QTableWidget, QHeaderView
 
 from auth.add_user_dialog import AddUserDialog
 from auth.user_management import get_users_with_permissions, delete_user
+from ui_loader import load_ui
 
 
 class UserManagementDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
-        uic.loadUi("Qt/user_management_dialog.ui", self)
+        load_ui(self, "Qt/user_management_dialog.ui")
         self.resize(600, 400)
 
         # Connect Signal for Click on 'btnAddUser'
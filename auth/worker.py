@@ -0,0 +1,30 @@
+# This file runs the password hashing of login and user management outside the GUI thread
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from database import close_thread_connections
+
+
+class AuthThread(QThread):
+    """
+    Runs func(*args) in a worker thread: bcrypt is deliberately slow (BCRYPT_ROUNDS),
+    on the GUI thread every hash or check would freeze the window for that time.
+    """
+    succeeded = pyqtSignal(object)  # Rückgabewert von func
+    failed = pyqtSignal(str)
+
+    def __init__(self, func, *args, parent=None):
+        super().__init__(parent)
+        self.func = func
+        self.args = args
+
+    def run(self):
+        try:
+            result = self.func(*self.args)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        finally:
+            # Jeder Login startet einen neuen Thread, seine Verbindung würde sonst bis zum Programmende offen bleiben
+            close_thread_connections()
+        self.succeeded.emit(result)
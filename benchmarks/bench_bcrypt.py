@@ -0,0 +1,55 @@
+"""
+Benchmark: Dauer von bcrypt-Hash und -Prüfung je Kostenfaktor (config.BCRYPT_ROUNDS).
+
+Jede Erhöhung um 1 verdoppelt die Rechenzeit. Gewählt werden sollte der größte Faktor, bei dem
+eine Anmeldung auf den Rechnern der Anwender noch in etwa --target ms geprüft ist
+(üblich sind 250-500 ms, die Prüfung läuft im Hintergrund-Thread).
+
+Aufruf (aus dem Projektverzeichnis):
+    python -m benchmarks.bench_bcrypt --rounds 10 14 --repeat 5
+"""
+import argparse
+import statistics
+import time
+
+import bcrypt
+
+from config import BCRYPT_ROUNDS
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, nargs=2, default=(10, 14), metavar=("VON", "BIS"),
+                        help="Gemessene Kostenfaktoren (einschließlich)")
+    parser.add_argument("--repeat", type=int, default=5, help="Messungen je Kostenfaktor")
+    parser.add_argument("--target", type=float, default=300, help="Angestrebte Dauer einer Anmeldung in ms")
+    args = parser.parse_args()
+
+    password = b"Beispiel-Passwort-123"
+    recommended = None
+    print(f"Konfiguriert: BCRYPT_ROUNDS={BCRYPT_ROUNDS}")
+    for rounds in range(args.rounds[0], args.rounds[1] + 1):
+        password_hash = bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+        hash_ms = statistics.median(measure(lambda: bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds)),
+                                            args.repeat))
+        check_ms = statistics.median(measure(lambda: bcrypt.checkpw(password, password_hash), args.repeat))
+        print(f"  rounds={rounds:<3} hashpw median {hash_ms:8.1f} ms   checkpw median {check_ms:8.1f} ms")
+        if check_ms <= args.target:
+            recommended = rounds
+    if recommended is not None:
+        print(f"Größter Kostenfaktor bis {args.target:.0f} ms: {recommended}")
+    else:
+        print(f"Kein gemessener Kostenfaktor bleibt unter {args.target:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark: Latenz eines Klicks auf eine Zeile in tv_rechnungen.
+
+Vergleicht die alte Variante (neue SQLite-Verbindung pro Hilfsfunktion) mit den
+gepoolten Verbindungen aus database.get_connection().
+
+Aufruf (aus dem Projektverzeichnis):
+    python -m benchmarks.bench_connection --db data/rechnungsverwaltung.db --clicks 500
+"""
+import argparse
+import random
+import sqlite3
+import statistics
+import time
+
+import database
+
+POSITIONS_QUERY = """
+    SELECT p.POS_ID, p.CREATION_DATE, p.NAME, p.DESCRIPTION, p.UNIT_PRICE, p.AREA
+    FROM REF_INVOICES_POSITIONS ref
+    JOIN POSITIONS p ON ref.FK_POSITIONS_POS_ID = p.POS_ID
+    WHERE ref.FK_INVOICES_INVOICE_NR = ?
+"""
+
+EXPORT_QUERIES = [
+    "SELECT * FROM INVOICES WHERE INVOICE_NR = ?",
+    """SELECT c.*, a.* FROM CUSTOMERS c LEFT JOIN ADDRESSES a ON c.FK_ADDRESS_ID = a.ID
+       WHERE c.CUSTID = (SELECT FK_CUSTID FROM INVOICES WHERE INVOICE_NR = ?)""",
+    """SELECT s.*, a.* FROM SERVICE_PROVIDER s LEFT JOIN ADDRESSES a ON s.FK_ADDRESS_ID = a.ID
+       WHERE s.UST_IDNR = (SELECT FK_UST_IDNR FROM INVOICES WHERE INVOICE_NR = ?)""",
+    """SELECT ceo.ST_NR, ceo.CEO_NAME FROM SERVICE_PROVIDER sp
+       JOIN REF_LABOR_COST rel ON rel.FK_UST_IDNR = sp.UST_IDNR
+       JOIN CEO ceo ON rel.FK_ST_NR = ceo.ST_NR
+       WHERE sp.UST_IDNR = (SELECT FK_UST_IDNR FROM INVOICES WHERE INVOICE_NR = ?)""",
+    POSITIONS_QUERY,
+    """SELECT acc.IBAN, acc.FK_BANK_ID AS BIC, b.BANK_NAME FROM ACCOUNT acc
+       JOIN BANK b ON acc.FK_BANK_ID = b.BIC
+       WHERE acc.FK_UST_IDNR = (SELECT FK_UST_IDNR FROM INVOICES WHERE INVOICE_NR = ?)""",
+]
+
+LOGO_QUERY = """
+    SELECT l.LOGO_BINARY FROM INVOICES i
+    JOIN SERVICE_PROVIDER s ON s.UST_IDNR = i.FK_UST_IDNR
+    JOIN LOGOS l ON l.ID = s.FK_LOGO_ID
+    WHERE i.INVOICE_NR = ?
+"""
+
+
+def click(invoice_nr, connect):
+    """
+    Runs the queries of one row click. 'connect' is called once per helper function,
+    exactly like the call sites in mainwindow.py do.
+    """
+    with connect() as conn:
+        conn.execute(POSITIONS_QUERY, (invoice_nr,)).fetchall()
+    with connect() as conn:
+        for query in EXPORT_QUERIES:
+            conn.execute(query, (invoice_nr,)).fetchall()
+    with connect() as conn:
+        conn.execute(LOGO_QUERY, (invoice_nr,)).fetchone()
+
+
+def measure(invoice_nrs, connect):
+    timings = []
+    for invoice_nr in invoice_nrs:
+        start = time.perf_counter()
+        click(invoice_nr, connect)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(label, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<22} median {statistics.median(timings):7.3f} ms   p95 {p95:7.3f} ms   "
+          f"total {sum(timings):9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", required=True, help="Pfad zur Datenbank (z.B. mit 100k Rechnungen)")
+    parser.add_argument("--clicks", type=int, default=500, help="Anzahl simulierter Klicks")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with sqlite3.connect(args.db) as conn:
+        all_invoices = [row[0] for row in conn.execute("SELECT INVOICE_NR FROM INVOICES")]
+    if not all_invoices:
+        parser.error("Die Datenbank enthält keine Rechnungen.")
+    rng = random.Random(args.seed)
+    invoice_nrs = [rng.choice(all_invoices) for _ in range(args.clicks)]
+
+    print(f"{len(all_invoices)} Rechnungen, {args.clicks} Klicks")
+    # Warm-up, damit beide Varianten mit gefülltem OS-Cache starten
+    measure(invoice_nrs[:20], lambda: sqlite3.connect(args.db))
+    report("vorher (connect/Abfrage)", measure(invoice_nrs, lambda: sqlite3.connect(args.db)))
+    report("nachher (Pool)", measure(invoice_nrs, lambda: database.get_connection(args.db)))
+    database.close_all_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Benchmark: Löschen eines Dienstleisters mit vielen Rechnungen.
+
+Vergleicht die alte Variante (Rechnungsnummern laden und je Rechnung zwei DELETEs aus Python)
+mit dem Löschen über die ON DELETE CASCADE-Regeln und Indizes aus schema.ensure_schema
+(ein DELETE in einer Transaktion).
+
+Ohne Indizes scannt jedes DELETE die ganze Verknüpfungstabelle; diese Variante wird daher nur
+für --sample Rechnungen gemessen und auf alle Rechnungen hochgerechnet.
+
+Aufruf (aus dem Projektverzeichnis):
+    python -m benchmarks.bench_delete_provider --invoices 50000 --positions 3
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+import database
+from schema import ensure_schema
+
+# Tabellen ohne Fremdschlüssel, wie in bestehenden Datenbanken
+SCHEMA = """
+    CREATE TABLE ADDRESSES (ID INTEGER PRIMARY KEY, STREET);
+    CREATE TABLE CUSTOMERS (CUSTID TEXT PRIMARY KEY, FK_ADDRESS_ID);
+    CREATE TABLE SERVICE_PROVIDER (UST_IDNR TEXT PRIMARY KEY, FK_ADDRESS_ID);
+    CREATE TABLE POSITIONS (POS_ID INTEGER PRIMARY KEY, NAME);
+    CREATE TABLE INVOICES (INVOICE_NR TEXT PRIMARY KEY, FK_CUSTID, FK_UST_IDNR);
+    CREATE TABLE REF_INVOICES_POSITIONS (FK_POSITIONS_POS_ID, FK_INVOICES_INVOICE_NR);
+    CREATE TABLE ACCOUNT (IBAN TEXT PRIMARY KEY, FK_BANK_ID, FK_UST_IDNR);
+    CREATE TABLE REF_LABOR_COST (FK_ST_NR, FK_UST_IDNR);
+"""
+
+PROVIDER = "DE000000001"
+OTHER_PROVIDER = "DE000000002"
+
+
+def create_database(path, invoices, positions):
+    with sqlite3.connect(path) as conn:
+        conn.executescript(SCHEMA)
+        conn.execute("INSERT INTO ADDRESSES VALUES (1, 'A'), (2, 'B')")
+        conn.execute("INSERT INTO CUSTOMERS VALUES ('00001', 1)")
+        conn.execute("INSERT INTO SERVICE_PROVIDER VALUES (?, 2), (?, 2)", (PROVIDER, OTHER_PROVIDER))
+        conn.executemany("INSERT INTO POSITIONS VALUES (?, 'P')", ((n,) for n in range(1, positions + 1)))
+        # Der zweite Dienstleister hat gleich viele Rechnungen, damit die Tabellen realistisch groß sind
+        conn.executemany("INSERT INTO INVOICES VALUES (?, '00001', ?)",
+                         ((f"{n:07d}", PROVIDER if n % 2 else OTHER_PROVIDER) for n in range(2 * invoices)))
+        conn.executemany("INSERT INTO REF_INVOICES_POSITIONS VALUES (?, ?)",
+                         ((p, f"{n:07d}") for n in range(2 * invoices) for p in range(1, positions + 1)))
+        conn.execute("INSERT INTO ACCOUNT VALUES ('DE01', 'BIC', ?)", (PROVIDER,))
+        conn.execute("INSERT INTO REF_LABOR_COST VALUES ('123', ?)", (PROVIDER,))
+    conn.close()
+
+
+def legacy_delete(conn, ust_idnr, limit=None):
+    """
+    The previous delete path of MainWindow.on_entry_delete for service providers
+    (with limit only for the first invoices, the provider itself is kept then).
+    """
+    cur = conn.cursor()
+    cur.execute("SELECT INVOICE_NR FROM INVOICES WHERE FK_UST_IDNR=?", (ust_idnr,))
+    invoice_nrs = [row[0] for row in cur.fetchall()]
+    if limit is not None:
+        for invoice_id in invoice_nrs[:limit]:
+            cur.execute("DELETE FROM REF_INVOICES_POSITIONS WHERE FK_INVOICES_INVOICE_NR=?", (invoice_id,))
+            cur.execute("DELETE FROM INVOICES WHERE INVOICE_NR=?", (invoice_id,))
+        conn.commit()
+        return
+    for invoice_id in invoice_nrs:
+        cur.execute("DELETE FROM REF_INVOICES_POSITIONS WHERE FK_INVOICES_INVOICE_NR=?", (invoice_id,))
+        cur.execute("DELETE FROM INVOICES WHERE INVOICE_NR=?", (invoice_id,))
+    cur.execute("DELETE FROM ACCOUNT WHERE FK_UST_IDNR=?", (ust_idnr,))
+    cur.execute("DELETE FROM REF_LABOR_COST WHERE FK_UST_IDNR=?", (ust_idnr,))
+    cur.execute("SELECT FK_ADDRESS_ID FROM SERVICE_PROVIDER WHERE UST_IDNR=?", (ust_idnr,))
+    cur.execute("DELETE FROM SERVICE_PROVIDER WHERE UST_IDNR=?", (ust_idnr,))
+    conn.commit()
+
+
+def cascade_delete(conn, ust_idnr):
+    cur = conn.cursor()
+    cur.execute("SELECT FK_ADDRESS_ID FROM SERVICE_PROVIDER WHERE UST_IDNR=?", (ust_idnr,))
+    cur.execute("DELETE FROM SERVICE_PROVIDER WHERE UST_IDNR=?", (ust_idnr,))
+    conn.commit()
+
+
+def remaining_rows(conn):
+    return conn.execute("""
+        SELECT (SELECT COUNT(*) FROM INVOICES WHERE FK_UST_IDNR = ?),
+               (SELECT COUNT(*) FROM REF_INVOICES_POSITIONS r
+                 WHERE NOT EXISTS (SELECT 1 FROM INVOICES i WHERE i.INVOICE_NR = r.FK_INVOICES_INVOICE_NR))
+    """, (PROVIDER,)).fetchone()
+
+
+def run(label, path, delete):
+    database.close_all_connections()
+    conn = database.get_connection(path)
+    start = time.perf_counter()
+    delete(conn, PROVIDER)
+    elapsed = (time.perf_counter() - start) * 1000
+    invoices_left, orphans = remaining_rows(conn)
+    print(f"  {label:<40} {elapsed:10.1f} ms   (übrige Rechnungen: {invoices_left}, verwaiste Positionslinks: {orphans})")
+    database.close_all_connections()
+
+
+def run_sample(label, path, invoices, sample):
+    database.close_all_connections()
+    conn = database.get_connection(path)
+    start = time.perf_counter()
+    legacy_delete(conn, PROVIDER, limit=sample)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"  {label:<40} {elapsed * invoices / sample:10.1f} ms   (hochgerechnet aus {sample} Rechnungen)")
+    database.close_all_connections()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--invoices", type=int, default=50000, help="Rechnungen des gelöschten Dienstleisters")
+    parser.add_argument("--positions", type=int, default=3, help="Positionen je Rechnung")
+    parser.add_argument("--sample", type=int, default=500, help="Gemessene Rechnungen der Variante ohne Indizes")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        template = os.path.join(tmp_dir, "template.db")
+        create_database(template, args.invoices, args.positions)
+        print(f"Dienstleister mit {args.invoices} Rechnungen, je {args.positions} Positionen")
+
+        legacy_path = os.path.join(tmp_dir, "legacy.db")
+        shutil.copy(template, legacy_path)
+        if args.sample >= args.invoices:
+            run("vorher (Schleife, ohne Indizes)", legacy_path, legacy_delete)
+        else:
+            run_sample("vorher (Schleife, ohne Indizes)", legacy_path, args.invoices, args.sample)
+
+        indexed_path = os.path.join(tmp_dir, "indexed.db")
+        shutil.copy(template, indexed_path)
+        database.close_all_connections()
+        ensure_schema(database.get_connection(indexed_path))
+        run("Schleife mit Indizes", indexed_path, legacy_delete)
+
+        cascade_path = os.path.join(tmp_dir, "cascade.db")
+        shutil.copy(template, cascade_path)
+        database.close_all_connections()
+        ensure_schema(database.get_connection(cascade_path))
+        run("nachher (ON DELETE CASCADE)", cascade_path, cascade_delete)
+
+
+if __name__ == "__main__":
+    main()
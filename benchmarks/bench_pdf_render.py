@@ -0,0 +1,68 @@
+"""
+Benchmark: Rendern einer Rechnungs-PDF (Vorschau beim Klick in tv_rechnungen).
+
+Vergleicht den alten Weg über das XML (dict -> ElementTree -> minidom-Pretty-Print ->
+erneutes Parsen im InvoicePDFBuilder) mit der direkten Übergabe von InvoiceData.
+Die PDFs werden nur in den Speicher geschrieben.
+
+Aufruf (aus dem Projektverzeichnis):
+    python -m benchmarks.bench_pdf_render --db data/rechnungsverwaltung.db --renders 200
+"""
+import argparse
+import random
+import statistics
+import time
+from io import BytesIO
+
+import database
+from invoice_data import load_invoice, build_invoice_xml
+from invoice_model import InvoiceData
+from pdfCreation import InvoicePDFBuilder
+
+
+def render_via_xml(export_data, logo_bytes):
+    xml_string = build_invoice_xml(export_data)
+    InvoicePDFBuilder.from_xml(xml_string, logo_bytes).build(BytesIO())
+
+
+def render_direct(export_data, logo_bytes):
+    InvoicePDFBuilder(InvoiceData.from_export_data(export_data), logo_bytes).build(BytesIO())
+
+
+def measure(invoices, render):
+    timings = []
+    for export_data, logo_bytes in invoices:
+        start = time.perf_counter()
+        render(export_data, logo_bytes)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(label, timings):
+    print(f"{label:<22} median {statistics.median(timings):7.3f} ms   total {sum(timings):9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", required=True, help="Pfad zur Datenbank")
+    parser.add_argument("--renders", type=int, default=200, help="Anzahl gerenderter Rechnungen je Variante")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    conn = database.get_connection(args.db)
+    all_invoices = [row[0] for row in conn.execute("SELECT INVOICE_NR FROM INVOICES")]
+    if not all_invoices:
+        parser.error("Die Datenbank enthält keine Rechnungen.")
+    rng = random.Random(args.seed)
+    # Daten vorab laden, gemessen wird nur der Weg von den Daten zur PDF
+    invoices = [load_invoice(rng.choice(all_invoices), conn) for _ in range(args.renders)]
+
+    print(f"{len(all_invoices)} Rechnungen, {args.renders} Renderings")
+    measure(invoices[:10], render_via_xml)  # Warm-up (Schriften, Bilder)
+    report("vorher (XML-Umweg)", measure(invoices, render_via_xml))
+    report("nachher (InvoiceData)", measure(invoices, render_direct))
+    database.close_all_connections()
+
+
+if __name__ == "__main__":
+    main()
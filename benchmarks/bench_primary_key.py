@@ -0,0 +1,139 @@
+"""
+Benchmark: Ermitteln des nächsten Primärschlüssels ("Eintrag hinzufügen").
+
+Vergleicht die alte Variante (alle Schlüssel laden und linear nach einer Lücke suchen)
+mit den Nummernkreisen aus PK_SEQUENCES, jeweils für einen dichten (1..N), einen
+fragmentierten (N zufällige Nummern aus 1..2N) und einen bis zum Ende belegten Nummernraum
+(N zufällige Nummern aus 1..99999, dort greift die Lückensuche über den Index).
+
+Aufruf (aus dem Projektverzeichnis):
+    python -m benchmarks.bench_primary_key --rows 50000 --calls 50
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+import database
+
+SCHEMA = """
+    CREATE TABLE INVOICES (INVOICE_NR TEXT PRIMARY KEY);
+    CREATE TABLE CUSTOMERS (CUSTID TEXT PRIMARY KEY);
+    CREATE TABLE SERVICE_PROVIDER (UST_IDNR TEXT PRIMARY KEY);
+    CREATE TABLE POSITIONS (POS_ID INTEGER PRIMARY KEY);
+"""
+
+# pk_type -> (table, pk column, formatting of a number)
+TARGETS = {
+    "invoice": ("INVOICES", "INVOICE_NR", lambda n: f"{n:05d}"),
+    "customer": ("CUSTOMERS", "CUSTID", lambda n: f"{n:05d}"),
+    "service_provider": ("SERVICE_PROVIDER", "UST_IDNR", lambda n: f"DE{n:09d}"),
+    "positions": ("POSITIONS", "POS_ID", lambda n: n),
+}
+
+
+def legacy_next_primary_key(conn, table_name, pk_column, pk_type):
+    """
+    The previous implementation of database.get_next_primary_key (without error handling).
+    """
+    ids = [row[0] for row in conn.execute(f"SELECT {pk_column} FROM {table_name}")]
+    if pk_type in ("invoice", "customer"):
+        used_numbers = set()
+        for id_str in ids:
+            try:
+                used_numbers.add(int(str(id_str)))
+            except Exception:
+                continue
+        for candidate in range(1, database.MAX_INVOICE_CUSTOMER_ID):
+            if candidate not in used_numbers:
+                return f"{candidate:05d}"
+        return "99999"
+    if pk_type == "service_provider":
+        used_numbers = set()
+        for id_str in ids:
+            if isinstance(id_str, str) and id_str.startswith("DE") and len(id_str) == 11:
+                try:
+                    used_numbers.add(int(id_str[2:]))
+                except Exception:
+                    continue
+        for candidate in range(1, database.MAX_SERVICE_PROVIDER_ID):
+            if candidate not in used_numbers:
+                return f"DE{candidate:09d}"
+        return "DE999999999"
+    max_value = 0
+    for val in ids:
+        try:
+            max_value = max(max_value, int(val))
+        except Exception:
+            continue
+    return max_value + 1
+
+
+def create_database(path, numbers):
+    with sqlite3.connect(path) as conn:
+        conn.executescript(SCHEMA)
+        for table_name, pk_column, fmt in TARGETS.values():
+            conn.executemany(f"INSERT INTO {table_name} ({pk_column}) VALUES (?)", ((fmt(n),) for n in numbers))
+    conn.close()
+
+
+def use_database(path):
+    """
+    Points the pooled connections of the database module at the benchmark database.
+    """
+    database.close_all_connections()
+    database.DB_PATH = path
+    database._pk_sequences_ready = False
+
+
+def measure(function, calls):
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(label, timings):
+    print(f"  {label:<40} median {statistics.median(timings):9.3f} ms   max {max(timings):9.3f} ms")
+
+
+def run_scenario(name, numbers, calls, tmp_dir):
+    path = os.path.join(tmp_dir, f"{name}.db")
+    create_database(path, numbers)
+    use_database(path)
+    conn = database.get_connection()
+    print(f"{name}: {len(numbers)} Schlüssel je Tabelle")
+    for pk_type, (table_name, pk_column, _) in TARGETS.items():
+        report(f"{pk_type} vorher (Scan)",
+               measure(lambda: legacy_next_primary_key(conn, table_name, pk_column, pk_type), calls))
+        # Erster Aufruf initialisiert den Nummernkreis aus dem Maximum (einmalig)
+        first = measure(lambda: database.get_next_primary_key(None, table_name, pk_column, pk_type), 1)
+        report(f"{pk_type} nachher (1. Aufruf)", first)
+        report(f"{pk_type} nachher (Nummernkreis)",
+               measure(lambda: database.get_next_primary_key(None, table_name, pk_column, pk_type), calls))
+    database.close_all_connections()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=30000, help="Anzahl Schlüssel je Tabelle (max. 49999)")
+    parser.add_argument("--calls", type=int, default=50, help="Aufrufe je Variante")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    rows = min(args.rows, (database.MAX_INVOICE_CUSTOMER_ID - 1) // 2)
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        run_scenario("dicht", list(range(1, rows + 1)), args.calls, tmp_dir)
+        run_scenario("fragmentiert", sorted(rng.sample(range(1, 2 * rows + 1), rows)), args.calls, tmp_dir)
+        run_scenario("erschöpft", sorted(rng.sample(range(1, database.MAX_INVOICE_CUSTOMER_ID), rows)),
+                     args.calls, tmp_dir)
+
+
+if __name__ == "__main__":
+    main()
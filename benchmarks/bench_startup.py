@@ -0,0 +1,147 @@
+"""
+Benchmark: Startzeit der Oberfläche.
+
+Jede Messung läuft in einem frischen Python-Prozess, wie ein Programmstart:
+    import     Import von mainwindow (Qt, lokale Module)
+    window     QApplication und MainWindow bis zum show()
+    ready      bis die nach dem Anzeigen verzögerten Schritte (Tabellen, PDF-Viewer) gelaufen sind
+
+Dazu eine Aufschlüsselung des Imports wie mit "python -X importtime -c 'import mainwindow'":
+die Module mit der größten kumulierten Importzeit und ob die schweren, erst bei Bedarf
+geladenen Pakete (reportlab, QtPdf, uic, pyzipper, Prozesspool) schon beim Start importiert werden.
+Das Nachrendern fehlender PDFs wird in den Messungen übersprungen.
+
+Aufruf (aus dem Projektverzeichnis, ohne Bildschirm mit QT_QPA_PLATFORM=offscreen):
+    python ui_loader.py
+    python -m benchmarks.bench_startup --db /tmp/rv_10k.db --repeat 5
+    python -m benchmarks.bench_startup --db /tmp/rv_10k.db --no-compiled-ui
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Pakete, die erst bei der ersten Verwendung importiert werden sollen
+DEFERRED_MODULES = ("reportlab", "pdfCreation", "PyQt6.QtPdf", "PyQt6.QtPdfWidgets", "PyQt6.uic", "pyzipper",
+                    "concurrent.futures.process")
+
+
+def run_child(args):
+    """
+    One startup, called in a fresh process: prints the timings in ms as JSON.
+    """
+    start = time.perf_counter()
+    import config
+    import database
+    import ui_loader
+
+    # Auch Module, die DB_PATH beim Import übernehmen, sollen diese Datenbank verwenden
+    config.DB_PATH = database.DB_PATH = args.db
+    if args.no_compiled_ui:
+        ui_loader.COMPILED_PACKAGE = "ui_compiled_disabled"
+
+    from PyQt6.QtCore import QTimer
+    from PyQt6.QtWidgets import QApplication
+    from mainwindow import MainWindow
+    imported = time.perf_counter()
+
+    app = QApplication(sys.argv[:1])
+    MainWindow.create_missing_invoice_pdfs = lambda self: None
+    window = MainWindow(user_id=args.user_id)
+    window.show()
+    shown = time.perf_counter()
+
+    timings = {}
+
+    def on_ready():
+        # Läuft nach MainWindow.finish_startup, das im Konstruktor zuerst eingeplant wurde
+        timings["ready"] = time.perf_counter()
+        app.quit()
+
+    QTimer.singleShot(0, on_ready)
+    app.exec()
+    window.close()
+    database.close_all_connections()
+    print(json.dumps({
+        "import": (imported - start) * 1000,
+        "window": (shown - imported) * 1000,
+        "ready": (timings["ready"] - start) * 1000,
+    }))
+
+
+def child_command(args):
+    command = [sys.executable, "-m", "benchmarks.bench_startup", "--child", "--db", args.db]
+    if args.user_id is not None:
+        command += ["--user-id", str(args.user_id)]
+    if args.no_compiled_ui:
+        command.append("--no-compiled-ui")
+    return command
+
+
+def import_breakdown():
+    """
+    Runs "python -X importtime -c 'import mainwindow'" and returns [(module, depth, self_us, cumulative_us)].
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import mainwindow"],
+                            capture_output=True, text=True, check=True)
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return modules
+
+
+def report_breakdown(modules, top):
+    total_us = sum(cumulative for _, depth, _, cumulative in modules if depth == 0)
+    print(f"\nImport (python -X importtime): {total_us / 1000:.1f} ms gesamt, größte kumulierte Zeiten:")
+    for name, depth, self_us, cumulative_us in sorted(modules, key=lambda m: m[3], reverse=True)[:top]:
+        print(f"  {name:<50} {cumulative_us / 1000:8.1f} ms   (selbst {self_us / 1000:6.1f} ms, Ebene {depth})")
+
+    imported = {name for name, _, _, _ in modules}
+    print("\nVerzögerte Importe:")
+    for prefix in DEFERRED_MODULES:
+        loaded = any(name == prefix or name.startswith(prefix + ".") for name in imported)
+        print(f"  {prefix:<30} {'beim Start geladen' if loaded else 'verzögert'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", required=True, help="Pfad zur Datenbank")
+    parser.add_argument("--repeat", type=int, default=5, help="Anzahl gemessener Programmstarts")
+    parser.add_argument("--user-id", type=int, help="Angemeldeter Nutzer (bei aktiver Rechteprüfung)")
+    parser.add_argument("--no-compiled-ui", action="store_true",
+                        help="Formulare mit uic.loadUi laden statt der übersetzten Module")
+    parser.add_argument("--top", type=int, default=20, help="Anzahl Module in der Import-Aufschlüsselung")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+    if not os.path.exists(args.db):
+        parser.error(f"Datenbank {args.db} nicht gefunden")
+
+    # Erster Start zum Aufwärmen (.pyc-Dateien, Dateisystem-Cache)
+    subprocess.run(child_command(args), capture_output=True, check=True)
+    runs = []
+    for _ in range(args.repeat):
+        result = subprocess.run(child_command(args), capture_output=True, text=True, check=True)
+        runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+
+    ui = "uic.loadUi" if args.no_compiled_ui else "übersetzte Formulare (falls vorhanden)"
+    print(f"{args.repeat} Programmstarts, {ui}:")
+    for phase in ("import", "window", "ready"):
+        timings = [run[phase] for run in runs]
+        print(f"  {phase:<8} median {statistics.median(timings):8.1f} ms   min {min(timings):8.1f} ms")
+
+    report_breakdown(import_breakdown(), args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Erzeugt eine Datenbank mit synthetischen, reproduzierbaren Daten (gleicher --seed = gleiche Daten).
+
+Kunden, Dienstleister (jeweils mit Adresse, Bankverbindung, Geschäftsführern und Logo als PNG),
+Rechnungen und Positionen. Jede Rechnung hat 1..(2 * --fanout - 1) Positionen, die meisten davon
+neu angelegt wie im Rechnungsformular, ein Teil (--reuse) aus einem gemeinsamen Positionskatalog.
+Schema, Indizes und Views kommen aus migrations.py, der Volltextindex wird am Ende aufgebaut.
+
+Rechnungs- und Kundennummern sind fortlaufend; ab 100000 Rechnungen sind sie länger als die
+fünfstelligen Nummern der Oberfläche.
+
+Aufruf (aus dem Projektverzeichnis):
+    python -m benchmarks.generate_data --db /tmp/rv_100k.db --invoices 100000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import struct
+import time
+import zlib
+from datetime import date, timedelta
+
+import database
+from migrations import migrate
+from search import ensure_search_index
+
+FIRST_NAMES = ["Anna", "Ben", "Clara", "David", "Emma", "Felix", "Greta", "Hannah", "Jonas", "Julia", "Karl",
+               "Lena", "Lukas", "Marie", "Max", "Mia", "Noah", "Paul", "Sophie", "Tim", "Ursula", "Zoe"]
+LAST_NAMES = ["Müller", "Schmidt", "Schneider", "Fischer", "Weber", "Meyer", "Wagner", "Becker", "Schulz",
+              "Hoffmann", "Koch", "Richter", "Klein", "Wolf", "Schröder", "Neumann", "Schwarz", "Braun"]
+STREETS = ["Hauptstraße", "Bahnhofstraße", "Gartenweg", "Schulstraße", "Lindenallee", "Am Markt",
+           "Bergstraße", "Kirchplatz", "Waldweg", "Rosenstraße", "Goethestraße", "Mühlenweg"]
+CITIES = ["Berlin", "Hamburg", "München", "Köln", "Frankfurt", "Stuttgart", "Dresden", "Leipzig",
+          "Nürnberg", "Coburg", "Bamberg", "Würzburg", "Erfurt", "Kassel"]
+TRADES = ["Malerbetrieb", "Fliesenleger", "Bodenbeläge", "Trockenbau", "Dachdeckerei", "Garten- und Landschaftsbau"]
+WORKS = ["Wand streichen", "Decke streichen", "Fliesen verlegen", "Laminat verlegen", "Trockenbauwand",
+         "Dach eindecken", "Rasen anlegen", "Fassade reinigen", "Tapezieren", "Fugen erneuern"]
+BANKS = [("COBADEFFXXX", "Commerzbank"), ("DEUTDEFFXXX", "Deutsche Bank"), ("BYLADEM1001", "DKB"),
+         ("GENODEF1M04", "Volksbank"), ("HYVEDEMMXXX", "HypoVereinsbank")]
+
+
+def make_png(rng, size_kb):
+    """
+    Returns an RGB PNG of about size_kb kilobytes (random pixels do not compress).
+    """
+    width = 200
+    height = max(1, size_kb * 1024 // (width * 3))
+    raw = b"".join(b"\x00" + rng.randbytes(width * 3) for _ in range(height))
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw, 1)) + chunk(b"IEND", b"")
+
+
+def random_date(rng, start=date(2022, 1, 1), days=3 * 365):
+    return (start + timedelta(days=rng.randrange(days))).strftime("%d.%m.%Y")
+
+
+def generate(path, invoices, customers, providers, fanout, reuse, catalog, logo_kb, seed):
+    rng = random.Random(seed)
+
+    # Schema über die Migrationen anlegen, Daten dann ohne Trigger/Fremdschlüsselprüfung schreiben
+    database.close_all_connections()
+    migrate(database.get_connection(path))
+    database.close_all_connections()
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA foreign_keys=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    with conn:
+        address_count = customers + providers
+        conn.executemany(
+            "INSERT INTO ADDRESSES (ID, STREET, NUMBER, ZIP, CITY, COUNTRY, CREATION_DATE) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            ((n, rng.choice(STREETS), str(rng.randint(1, 200)), f"{rng.randint(1067, 99998):05d}",
+              rng.choice(CITIES), "Deutschland", random_date(rng)) for n in range(1, address_count + 1)))
+
+        conn.executemany(
+            "INSERT INTO CUSTOMERS (CUSTID, FIRST_NAME, LAST_NAME, GENDER, CREATION_DATE, FK_ADDRESS_ID) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            ((f"{n:05d}", rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), rng.choice(["m", "w", "d"]),
+              random_date(rng), n) for n in range(1, customers + 1)))
+
+        conn.executemany("INSERT INTO LOGOS (ID, FILE_NAME, LOGO_BINARY, MIME_TYPE, CREATION_DATE) VALUES (?, ?, ?, ?, ?)",
+                         ((n, f"logo_{n}.png", make_png(rng, logo_kb), "image/png", random_date(rng))
+                          for n in range(1, providers + 1)))
+        provider_ids = [f"DE{n:09d}" for n in range(1, providers + 1)]
+        conn.executemany(
+            "INSERT INTO SERVICE_PROVIDER (UST_IDNR, PROVIDER_NAME, EMAIL, WEBSITE, TELNR, MOBILTELNR, FAXNR, "
+            "CREATION_DATE, FK_ADDRESS_ID, FK_LOGO_ID) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            ((ust_idnr, f"{rng.choice(TRADES)} {rng.choice(LAST_NAMES)}", f"info{n}@example.com",
+              f"www.betrieb{n}.example", f"0{rng.randint(30, 9999)}/{rng.randint(10000, 999999)}",
+              f"01{rng.randint(50, 79)}/{rng.randint(1000000, 9999999)}", "", random_date(rng),
+              customers + n, n) for n, ust_idnr in enumerate(provider_ids, start=1)))
+
+        conn.executemany("INSERT INTO BANK (BIC, BANK_NAME) VALUES (?, ?)", BANKS)
+        conn.executemany("INSERT INTO ACCOUNT (IBAN, FK_BANK_ID, FK_UST_IDNR) VALUES (?, ?, ?)",
+                         ((f"DE{rng.randint(10, 99)}{n:018d}", rng.choice(BANKS)[0], ust_idnr)
+                          for n, ust_idnr in enumerate(provider_ids, start=1)))
+        conn.executemany("INSERT INTO CEO (ST_NR, CEO_NAME) VALUES (?, ?)",
+                         ((f"{n:03d}/{n:03d}/{n:05d}", f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}")
+                          for n in range(1, providers + 1)))
+        conn.executemany("INSERT INTO REF_LABOR_COST (FK_ST_NR, FK_UST_IDNR) VALUES (?, ?)",
+                         ((f"{n:03d}/{n:03d}/{n:05d}", ust_idnr) for n, ust_idnr in enumerate(provider_ids, start=1)))
+
+        # Gemeinsamer Positionskatalog, danach die Positionen der Rechnungen
+        conn.executemany(
+            "INSERT INTO POSITIONS (POS_ID, NAME, DESCRIPTION, AREA, UNIT_PRICE, CREATION_DATE) VALUES (?, ?, ?, ?, ?, ?)",
+            ((n, rng.choice(WORKS), "Standardleistung", 1.0, round(rng.uniform(5, 80), 2), random_date(rng))
+             for n in range(1, catalog + 1)))
+
+        invoice_rows = []
+        position_rows = []
+        link_rows = []
+        next_pos_id = catalog + 1
+        for n in range(1, invoices + 1):
+            invoice_nr = f"{n:05d}"
+            creation_date = random_date(rng)
+            invoice_rows.append((invoice_nr, creation_date, f"{rng.randint(1, customers):05d}",
+                                 rng.choice(provider_ids), round(rng.uniform(0, 2000), 2), 19, 19))
+            for _ in range(rng.randint(1, 2 * fanout - 1)):
+                if catalog and rng.random() < reuse:
+                    pos_id = rng.randint(1, catalog)
+                else:
+                    pos_id = next_pos_id
+                    next_pos_id += 1
+                    position_rows.append((pos_id, rng.choice(WORKS), f"Raum {rng.randint(1, 12)}",
+                                          round(rng.uniform(1, 120), 2), round(rng.uniform(5, 80), 2), creation_date))
+                link_rows.append((pos_id, invoice_nr))
+            if len(link_rows) >= 100000:
+                _flush(conn, invoice_rows, position_rows, link_rows)
+        _flush(conn, invoice_rows, position_rows, link_rows)
+    conn.close()
+
+    # Volltextindex und Statistiken für den Query Planner
+    conn = database.get_connection(path)
+    available, error = ensure_search_index(conn)
+    if not available:
+        print(f"Volltextsuche nicht verfügbar: {error}")
+    conn.execute("ANALYZE")
+    conn.commit()
+    database.close_all_connections()
+
+
+def _flush(conn, invoice_rows, position_rows, link_rows):
+    conn.executemany("INSERT INTO INVOICES (INVOICE_NR, CREATION_DATE, FK_CUSTID, FK_UST_IDNR, LABOR_COST, "
+                     "VAT_RATE_LABOR, VAT_RATE_POSITIONS) VALUES (?, ?, ?, ?, ?, ?, ?)", invoice_rows)
+    conn.executemany("INSERT INTO POSITIONS (POS_ID, NAME, DESCRIPTION, AREA, UNIT_PRICE, CREATION_DATE) "
+                     "VALUES (?, ?, ?, ?, ?, ?)", position_rows)
+    conn.executemany("INSERT INTO REF_INVOICES_POSITIONS (FK_POSITIONS_POS_ID, FK_INVOICES_INVOICE_NR) VALUES (?, ?)",
+                     link_rows)
+    invoice_rows.clear()
+    position_rows.clear()
+    link_rows.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", required=True, help="Zieldatei (darf noch nicht existieren)")
+    parser.add_argument("--invoices", type=int, default=10000, help="Anzahl Rechnungen")
+    parser.add_argument("--customers", type=int, default=None, help="Anzahl Kunden (Standard: Rechnungen / 10)")
+    parser.add_argument("--providers", type=int, default=None,
+                        help="Anzahl Dienstleister (Standard: Rechnungen / 1000, mindestens 10)")
+    parser.add_argument("--fanout", type=int, default=4, help="Mittlere Anzahl Positionen je Rechnung")
+    parser.add_argument("--reuse", type=float, default=0.2, help="Anteil der Positionen aus dem Katalog")
+    parser.add_argument("--catalog", type=int, default=500, help="Größe des Positionskatalogs")
+    parser.add_argument("--logo-kb", type=int, default=40, help="Größe der Logos in KB")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    if os.path.exists(args.db):
+        parser.error(f"{args.db} existiert bereits")
+    if args.fanout < 1:
+        parser.error("--fanout muss mindestens 1 sein")
+
+    customers = args.customers or max(1, min(args.invoices // 10, 99999))
+    providers = args.providers or max(10, args.invoices // 1000)
+    start = time.perf_counter()
+    generate(args.db, args.invoices, customers, providers, args.fanout, args.reuse, args.catalog,
+             args.logo_kb, args.seed)
+    size_mb = os.path.getsize(args.db) / 1024 / 1024
+    print(f"{args.db}: {args.invoices} Rechnungen, {customers} Kunden, {providers} Dienstleister, "
+          f"{size_mb:.1f} MB in {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
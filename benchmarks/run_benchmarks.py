@@ -0,0 +1,212 @@
+"""
+Benchmark-Suite: misst die zeitkritischen Pfade der Anwendung ohne Oberfläche auf einer
+(z.B. mit benchmarks.generate_data erzeugten) Datenbank.
+
+    load_table         erste Seite einer Tabellenansicht (SqlTableModel) und Nachladen beim Scrollen
+    search_entries     Volltextsuche in den Ansichten (search.search_view), Ergebnis-Cache vor jedem Aufruf geleert
+    search_cached      dieselben Suchen aus dem Ergebnis-Cache (wiederholte Eingabe)
+    next_primary_key   database.get_next_primary_key (Vorschlag aus PK_SEQUENCES, reserviert nichts)
+    get_export_data    Laden einer vollständigen Rechnung
+    pdf_build          InvoicePDFBuilder.build in den Speicher
+
+Die Ergebnisse (Median, 95. Perzentil, Min/Max in ms) können mit --output als JSON gespeichert
+und mit --baseline gegen einen früheren Lauf verglichen werden; bei Verschlechterungen über
+--tolerance (und mindestens --min-delta ms, um Messrauschen sehr schneller Pfade
+auszublenden) endet das Skript mit Exit-Code 1.
+
+Aufruf (aus dem Projektverzeichnis):
+    python -m benchmarks.run_benchmarks --db /tmp/rv_100k.db --output /tmp/rv_100k.json
+    python -m benchmarks.run_benchmarks --db /tmp/rv_100k.db --baseline /tmp/rv_100k.json
+"""
+import argparse
+import json
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from io import BytesIO
+
+import database
+import search
+from invoice_data import get_export_data, load_invoice
+from invoice_model import InvoiceData
+from pdfCreation import InvoicePDFBuilder
+from search import search_view
+
+# Ansichten der Tabs (MainWindow.table_mapping) mit Schlüsselspalte und Suchbegriffen
+VIEWS = {
+    "view_customers_full": ("Kundennummer", ["Müller", "Schmidt Berlin", "Anna"]),
+    "view_service_provider_full": ("UStIdNr", ["Malerbetrieb", "Fliesen Koch"]),
+    "view_invoices_full": ("Rechnungsnummer", ["Weber", "Hoffmann Dresden", "0001"]),
+    "view_positions_full": ("PositionsID", ["Wand streichen", "Raum 3", "Fliesen"]),
+}
+
+# pk_type -> (Tabelle, Schlüsselspalte) wie im Formular "Eintrag hinzufügen"
+PRIMARY_KEYS = {
+    "invoice": ("INVOICES", "INVOICE_NR"),
+    "customer": ("CUSTOMERS", "CUSTID"),
+    "service_provider": ("SERVICE_PROVIDER", "UST_IDNR"),
+    "positions": ("POSITIONS", "POS_ID"),
+}
+
+
+def measure(func, args_list):
+    timings = []
+    for args in args_list:
+        start = time.perf_counter()
+        func(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(timings):
+    ordered = sorted(timings)
+    return {
+        "runs": len(ordered),
+        "median_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "min_ms": round(ordered[0], 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+def load_first_page(db_view, key_column):
+    database.fetch_page(f"SELECT * FROM {db_view}", key_column)
+
+
+def scroll_pages(db_view, key_column, pages):
+    query = f"SELECT * FROM {db_view}"
+    rows, columns = database.fetch_page(query, key_column)
+    key_idx = columns.index(key_column)
+    for _ in range(pages):
+        if not rows:
+            break
+        rows, _ = database.fetch_page(query, key_column, rows[-1][key_idx])
+
+
+def search_uncached(db_view, search_text):
+    # Ohne den Ergebnis-Cache, damit die Messung mit Läufen vor dem Cache vergleichbar bleibt
+    search._result_cache.clear()
+    search_view(db_view, search_text)
+
+
+def build_pdf(export_data, logo_bytes):
+    InvoicePDFBuilder(InvoiceData.from_export_data(export_data), logo_bytes).build(BytesIO())
+
+
+def run_suite(conn, repeat, rng):
+    invoice_nrs = [row[0] for row in conn.execute("SELECT INVOICE_NR FROM INVOICES")]
+    if not invoice_nrs:
+        raise ValueError("Die Datenbank enthält keine Rechnungen.")
+    sample = [rng.choice(invoice_nrs) for _ in range(repeat)]
+
+    suite = []
+    for db_view, (key_column, terms) in VIEWS.items():
+        suite.append((f"load_table[{db_view}]", load_first_page, [(db_view, key_column)] * repeat))
+        suite.append((f"load_table_scroll[{db_view}]", scroll_pages, [(db_view, key_column, 10)] * repeat))
+        searches = [(db_view, terms[n % len(terms)]) for n in range(repeat)]
+        suite.append((f"search_entries[{db_view}]", search_uncached, searches))
+        suite.append((f"search_cached[{db_view}]", search_view, searches))
+    for pk_type, (table_name, pk_column) in PRIMARY_KEYS.items():
+        suite.append((f"next_primary_key[{pk_type}]", database.get_next_primary_key,
+                      [(None, table_name, pk_column, pk_type)] * repeat))
+    suite.append(("get_export_data", get_export_data, [(nr,) for nr in sample]))
+    # Daten für die PDFs vorab laden, gemessen wird nur das Rendern
+    suite.append(("pdf_build", build_pdf, [load_invoice(nr, conn) for nr in sample]))
+
+    results = {}
+    for name, func, args_list in suite:
+        func(*args_list[0])  # Warm-up (Statement-Cache, Seiten-Cache, Schriften)
+        results[name] = summarize(measure(func, args_list))
+        print(f"  {name:<50} median {results[name]['median_ms']:9.3f} ms   p95 {results[name]['p95_ms']:9.3f} ms")
+    return results
+
+
+def describe_database(conn, path):
+    counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+              for table in ("INVOICES", "CUSTOMERS", "SERVICE_PROVIDER", "POSITIONS", "REF_INVOICES_POSITIONS")}
+    return {"path": path, "rows": counts}
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(results, baseline, tolerance, min_delta):
+    """
+    Prints the change of every median against the baseline and returns the names of
+    benchmarks that got slower by more than the tolerance (0.2 = 20 %) and at least min_delta ms.
+    """
+    regressions = []
+    print(f"\nVergleich mit {baseline['meta'].get('timestamp')} (Revision {baseline['meta'].get('revision')}):")
+    for name, result in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"  {name:<50} neu")
+            continue
+        ratio = result["median_ms"] / before["median_ms"] if before["median_ms"] else 1.0
+        marker = ""
+        if ratio > 1 + tolerance and result["median_ms"] - before["median_ms"] >= min_delta:
+            marker = "  <-- langsamer"
+            regressions.append(name)
+        print(f"  {name:<50} {before['median_ms']:9.3f} -> {result['median_ms']:9.3f} ms   x{ratio:5.2f}{marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", required=True, help="Pfad zur Datenbank")
+    parser.add_argument("--repeat", type=int, default=20, help="Messungen je Benchmark")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Ergebnisse als JSON speichern")
+    parser.add_argument("--baseline", help="JSON eines früheren Laufs zum Vergleich")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Erlaubte Verschlechterung des Medians (Standard: 0.2 = 20 %%)")
+    parser.add_argument("--min-delta", type=float, default=0.1,
+                        help="Verschlechterungen unter diesem Wert in ms ignorieren (Standard: 0.1)")
+    args = parser.parse_args()
+
+    # get_connection() ohne Pfad (z.B. in search_view) soll ebenfalls diese Datenbank verwenden
+    database.DB_PATH = args.db
+    conn = database.get_connection(args.db)
+    meta = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "database": describe_database(conn, args.db),
+    }
+    print(f"{args.db}: {meta['database']['rows']['INVOICES']} Rechnungen, {args.repeat} Messungen je Benchmark")
+    try:
+        results = run_suite(conn, args.repeat, random.Random(args.seed))
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        database.close_all_connections()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2, ensure_ascii=False)
+        print(f"Ergebnisse gespeichert: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.min_delta)
+        if regressions:
+            print(f"{len(regressions)} Benchmark(s) langsamer als erlaubt")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
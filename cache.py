@@ -0,0 +1,52 @@
+# This file contains a small thread-safe LRU cache
+
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Mapping with a maximum number of entries: when it is full, the least recently used entry
+    is dropped. Safe to use from several threads (e.g. the search thread pool).
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def items(self):
+        """
+        Returns a snapshot of all entries, most recently used last.
+        """
+        with self._lock:
+            return list(self._entries.items())
+
+    def discard(self, predicate):
+        """
+        Removes every entry whose key matches predicate(key).
+        """
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,40 @@
+# This file contains the change notification between database writes and the table views
+
+
+class ChangeNotifier:
+    """
+    Writers report which rows of an entity (table name, e.g. "CUSTOMERS") they inserted,
+    changed or deleted once the transaction is committed. Every subscriber of that entity
+    gets the keys and refreshes just those rows instead of reloading whole views.
+    """
+
+    def __init__(self):
+        self._subscribers = {}
+
+    def subscribe(self, entity, callback):
+        """
+        Registers callback(keys) for changes of the given entity.
+        """
+        self._subscribers.setdefault(entity, []).append(callback)
+
+    def unsubscribe(self, entity, callback):
+        callbacks = self._subscribers.get(entity, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def notify(self, entity, keys):
+        """
+        Reports changed keys of an entity; does nothing if no key is given.
+        """
+        keys = [key for key in keys if key is not None]
+        if not keys:
+            return
+        for callback in list(self._subscribers.get(entity, [])):
+            callback(keys)
+
+    def notify_all(self, changes):
+        """
+        Reports the changes of several entities at once: {entity: keys}.
+        """
+        for entity, keys in changes.items():
+            self.notify(entity, keys)
@@ -0,0 +1,238 @@
+# This file is the headless command line entry point (no Qt): batch rendering, XML export and archiving
+#
+#   python cli.py render --missing --jobs 4
+#   python cli.py xml 40181 40806 --output export/
+#   python cli.py archive --from 01.01.2024 --to 31.12.2024 --per-customer --output archiv/
+#   python cli.py logos
+#   python cli.py maintenance
+
+import argparse
+import getpass
+import multiprocessing
+import os
+import sys
+from datetime import datetime
+
+from config import DB_PATH, MIN_LENGTH_EXPORT, CACHE_OUTPUT_PATH
+from database import get_connection, close_all_connections
+from export import find_invoices, export_invoices
+from invoice_data import load_invoices, build_invoice_xml
+from logo_ingest import normalize_logo
+from maintenance import merge_duplicate_logos, collect_unused_logos, database_size, vacuum
+from pdf_jobs import find_missing_invoice_pdfs, render_invoice_pdfs
+from migrations import migrate
+
+PASSWORD_ENV_VAR = "RECHNUNG_EXPORT_PASSWORD"
+
+
+def _parse_date(text):
+    try:
+        return datetime.strptime(text, "%d.%m.%Y").date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Ungültiges Datum '{text}', erwartet wird TT.MM.JJJJ")
+
+
+def _select_invoices(args, conn):
+    """
+    Returns [(invoice_nr, customer_id)] for the invoice numbers and filters given on the command line.
+    """
+    invoices = find_invoices(
+        invoice_nrs=args.invoice_nrs or None,
+        date_from=args.date_from,
+        date_to=args.date_to,
+        customer_id=args.customer,
+        provider_id=args.provider,
+        conn=conn,
+    )
+    found = {invoice_nr for invoice_nr, _ in invoices}
+    for invoice_nr in args.invoice_nrs:
+        if invoice_nr not in found:
+            print(f"Rechnung {invoice_nr} nicht gefunden oder nicht im Filter", file=sys.stderr)
+    return invoices
+
+
+def _read_password(args):
+    password = os.environ.get(args.password_env)
+    if password is None:
+        if not sys.stdin.isatty():
+            raise SystemExit(f"Kein Passwort: Umgebungsvariable {args.password_env} setzen")
+        password = getpass.getpass("Passwort: ")
+        if getpass.getpass("Passwort bestätigen: ") != password:
+            raise SystemExit("Die Passwörter stimmen nicht überein.")
+    if len(password) < MIN_LENGTH_EXPORT:
+        raise SystemExit(f"Das Passwort muss mindestens {MIN_LENGTH_EXPORT} Zeichen lang sein.")
+    return password
+
+
+def _report(failed):
+    for invoice_nr, error in failed:
+        print(f"Fehler bei Rechnung {invoice_nr}: {error}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def cmd_render(args, conn):
+    if args.missing:
+        invoice_nrs = find_missing_invoice_pdfs(args.output, conn=conn)
+    else:
+        invoice_nrs = [invoice_nr for invoice_nr, _ in _select_invoices(args, conn)]
+    os.makedirs(args.output or CACHE_OUTPUT_PATH, exist_ok=True)
+    failed = []
+    done = 0
+    for invoice_nr, pdf_path, error in render_invoice_pdfs(invoice_nrs, output_dir=args.output,
+                                                           workers=args.jobs, db_path=args.db):
+        done += 1
+        if error is not None:
+            failed.append((invoice_nr, error))
+        elif args.verbose:
+            print(pdf_path)
+    print(f"{done - len(failed)} von {len(invoice_nrs)} Rechnungs-PDFs erstellt")
+    return _report(failed)
+
+
+def cmd_xml(args, conn):
+    invoice_nrs = [invoice_nr for invoice_nr, _ in _select_invoices(args, conn)]
+    os.makedirs(args.output, exist_ok=True)
+    invoices = load_invoices(invoice_nrs, conn)
+    for invoice_nr in invoice_nrs:
+        export_data, _ = invoices[invoice_nr]
+        xml_path = os.path.join(args.output, f"rechnung_{invoice_nr}.xml")
+        with open(xml_path, "w", encoding="utf-8") as f:
+            f.write(build_invoice_xml(export_data))
+        if args.verbose:
+            print(xml_path)
+    print(f"{len(invoice_nrs)} Rechnungs-XMLs erstellt")
+    return 0
+
+
+def cmd_archive(args, conn):
+    invoices = _select_invoices(args, conn)
+    if not invoices:
+        print("Keine passenden Rechnungen gefunden.")
+        return 0
+    if args.per_customer:
+        os.makedirs(args.output, exist_ok=True)
+    password = _read_password(args)
+    paths, failed = export_invoices(invoices, args.output, password, per_customer=args.per_customer,
+                                    workers=args.jobs, db_path=args.db)
+    for path in paths:
+        print(path)
+    print(f"{len(invoices) - len(failed)} von {len(invoices)} Rechnungen exportiert")
+    return _report(failed)
+
+
+def cmd_logos(args, conn):
+    """
+    Normalizes the logos stored before logo_ingest existed (CONTENT_HASH is NULL) and points
+    the providers of logos that turn out to be identical to one of them (merge_duplicate_logos).
+    """
+    rows = conn.execute("SELECT ID, FILE_NAME FROM LOGOS WHERE CONTENT_HASH IS NULL").fetchall()
+    size_before = size_after = 0
+    failed = []
+    for logo_id, file_name in rows:
+        data = conn.execute("SELECT LOGO_BINARY FROM LOGOS WHERE ID = ?", (logo_id,)).fetchone()[0]
+        if not data:
+            continue
+        try:
+            # Ohne Qt können SVGs nicht umgewandelt werden, sie bleiben bis zum erneuten Hochladen
+            logo = normalize_logo(data, file_name or "", rasterize_svg=False)
+        except ValueError as e:
+            failed.append((logo_id, e))
+            continue
+        with conn:
+            conn.execute("UPDATE LOGOS SET LOGO_BINARY = ?, MIME_TYPE = ?, CONTENT_HASH = ?, THUMBNAIL = ? "
+                         "WHERE ID = ?", (logo.data, logo.mime_type, logo.content_hash, logo.thumbnail, logo_id))
+        size_before += len(data)
+        size_after += len(logo.data)
+        if args.verbose:
+            print(f"Logo {logo_id}: {len(data) // 1024} KB -> {len(logo.data) // 1024} KB")
+    merged = merge_duplicate_logos(conn)
+    print(f"{len(rows) - len(failed)} von {len(rows)} Logos normalisiert, "
+          f"{size_before // 1024} KB -> {size_after // 1024} KB")
+    print(f"{merged} doppelte zusammengeführt (die Kopien löscht \"python cli.py maintenance\")")
+    for logo_id, error in failed:
+        print(f"Fehler bei Logo {logo_id}: {error}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def _megabytes(size):
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+def cmd_maintenance(args, conn):
+    merged = merge_duplicate_logos(conn)
+    deleted, logo_bytes = collect_unused_logos(conn)
+    print(f"Logos: {merged} doppelte zusammengeführt, {deleted} unbenutzte gelöscht ({logo_bytes // 1024} KB)")
+    size, free = database_size(conn)
+    if args.no_vacuum:
+        print(f"Datenbank: {_megabytes(size)}, davon {_megabytes(free)} frei (VACUUM übersprungen)")
+        return 0
+    size_before, size_after = vacuum(conn)
+    print(f"Datenbank: {_megabytes(size_before)} -> {_megabytes(size_after)} "
+          f"({_megabytes(max(size_before - size_after, 0))} freigegeben)")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Rechnungsverwaltung ohne Oberfläche")
+    parser.add_argument("--db", default=DB_PATH, help="Pfad zur Datenbank (Standard: %(default)s)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    # Gemeinsame Auswahl der Rechnungen (ohne Angaben: alle)
+    selection = argparse.ArgumentParser(add_help=False)
+    selection.add_argument("invoice_nrs", nargs="*", metavar="RECHNUNGSNR", help="Rechnungsnummern")
+    selection.add_argument("--from", dest="date_from", type=_parse_date, help="Erstellt ab (TT.MM.JJJJ)")
+    selection.add_argument("--to", dest="date_to", type=_parse_date, help="Erstellt bis (TT.MM.JJJJ)")
+    selection.add_argument("--customer", help="Kundennummer")
+    selection.add_argument("--provider", help="UStIdNr des Dienstleisters")
+    selection.add_argument("-v", "--verbose", action="store_true", help="Erzeugte Dateien einzeln ausgeben")
+
+    parallel = argparse.ArgumentParser(add_help=False)
+    parallel.add_argument("-j", "--jobs", type=int, default=None,
+                          help="Anzahl paralleler Prozesse (Standard: PDF_WORKERS bzw. CPU-Kerne)")
+
+    render = subparsers.add_parser("render", parents=[selection, parallel], help="Rechnungs-PDFs erzeugen")
+    render.add_argument("--missing", action="store_true", help="Nur Rechnungen ohne PDF im Cache")
+    render.add_argument("-o", "--output", default=None, help="Zielordner (Standard: PDF-Cache)")
+    render.set_defaults(func=cmd_render)
+
+    xml = subparsers.add_parser("xml", parents=[selection], help="Rechnungs-XMLs exportieren")
+    xml.add_argument("-o", "--output", required=True, help="Zielordner")
+    xml.set_defaults(func=cmd_xml)
+
+    archive = subparsers.add_parser("archive", parents=[selection, parallel],
+                                    help="XML und PDF in verschlüsselte ZIP-Archive exportieren")
+    archive.add_argument("-o", "--output", required=True,
+                         help="ZIP-Datei bzw. Zielordner bei --per-customer")
+    archive.add_argument("--per-customer", action="store_true", help="Ein Archiv pro Kunde")
+    archive.add_argument("--password-env", default=PASSWORD_ENV_VAR,
+                         help="Umgebungsvariable mit dem Passwort (Standard: %(default)s), sonst Abfrage")
+    archive.set_defaults(func=cmd_archive)
+
+    logos = subparsers.add_parser("logos", help="Gespeicherte Logos verkleinern und doppelte zusammenführen")
+    logos.add_argument("-v", "--verbose", action="store_true", help="Größe jedes Logos ausgeben")
+    logos.set_defaults(func=cmd_logos)
+
+    maintenance = subparsers.add_parser(
+        "maintenance", help="Unbenutzte Logos löschen und die Datenbank verkleinern (Programm vorher schließen)")
+    maintenance.add_argument("--no-vacuum", action="store_true", help="Nur Logos aufräumen, kein VACUUM")
+    maintenance.set_defaults(func=cmd_maintenance)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        conn = get_connection(args.db)
+        applied, warnings = migrate(conn)
+        for version, description in applied:
+            print(f"Datenbank-Migration {version}: {description}")
+        for warning in warnings:
+            print(f"Warnung: {warning}", file=sys.stderr)
+        return args.func(args, conn)
+    finally:
+        close_all_connections()
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -5,10 +5,46 @@ DB_PATH = "data/rechnungsverwaltung.db"
 UI_PATH = "Qt/main.ui"
 POSITION_DIALOG_PATH = "./Qt/position_dialog.ui"
 DEBOUNCE_TIME=300
-CACHE_OUTPUT_PATH=os.getenv("PROGRAMDATA") + r"\Rechnungsverwaltung\export"
+# Grenzen der an die gemessene Suchdauer angepassten Debounce-Time (ms)
+DEBOUNCE_TIME_MIN=100
+DEBOUNCE_TIME_MAX=1000
+TABLE_PAGE_SIZE=256
+CACHE_OUTPUT_PATH=os.path.join(os.getenv("PROGRAMDATA") or os.path.expanduser("~"), "Rechnungsverwaltung", "export")
 MIN_LENGTH_EXPORT=8
+# Kostenfaktor für bcrypt (2^n Runden); Messung mit benchmarks/bench_bcrypt.py. Bestehende Hashes
+# mit anderem Faktor werden bei der nächsten Anmeldung des Nutzers neu erzeugt.
+BCRYPT_ROUNDS=12
+# Kompression im verschlüsselten Export-ZIP je Dateiart: "stored", "deflated", "bzip2" oder "lzma"
+# (PDFs sind bereits komprimiert, LZMA kostet dort viel CPU-Zeit für kaum kleinere Dateien)
+EXPORT_COMPRESSION={"xml": "deflated", "pdf": "stored"}
+EXPORT_COMPRESSION_LEVEL=6  # 0-9 für deflated/bzip2, None = Standard
+PDF_WORKERS=None  # Prozesse für das Erzeugen der Rechnungs-PDFs (None = Anzahl CPU-Kerne)
 DEFAULT_MWST=19
 
+# SQLite connection tuning (applied once per pooled connection)
+DB_CACHE_SIZE_KB = 20000
+DB_MMAP_SIZE = 256 * 1024 * 1024
+DB_STATEMENT_CACHE_SIZE = 256
+QUERY_CACHE_SIZE = 16  # Verbindungen mit vorbereiteten Rechnungsabfragen (invoice_data)
+DB_BUSY_TIMEOUT_MS = 5000
+DB_PROGRESS_STEPS = 1000  # VM-Instruktionen zwischen zwei Abbruchprüfungen laufender Suchen
+
+# Suchen im Hintergrund: Threads im Pool und Zeilen, die pro Schritt an die Tabelle gehen
+SEARCH_WORKERS = 2
+SEARCH_CHUNK_SIZE = 500
+# Zwischengespeicherte Suchergebnisse (Anzahl Suchen) und maximale Trefferzahl je gespeicherter Suche
+SEARCH_CACHE_SIZE = 64
+SEARCH_CACHE_MAX_ROWS = 20000
+
+# Zwischengespeicherte Logos (dekodiert, je Logo und Anzeigegröße) für die Dienstleister-Ansicht und die PDFs
+LOGO_CACHE_SIZE = 32
+# Logos werden beim Hochladen auf die Auflösung des Logo-Felds der PDF (60 x 20 mm) verkleinert
+LOGO_SLOT_MM = (60, 20)
+LOGO_DPI = 300
+LOGO_JPEG_QUALITY = 90
+# Vorschaubild für das Logo-Label der Dienstleister-Ansicht (Pixel)
+LOGO_THUMBNAIL_SIZE = (400, 150)
+
 IS_VALIDATION_ACTIVE = True
 IS_AUTHENTICATION_ACTIVE = True
-IS_AUTHORIZATION_ACTIVE = True
\ No newline at end of file
+IS_AUTHORIZATION_ACTIVE = True
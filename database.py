@@ -1,79 +1,307 @@
 # This file provides helper functions for database interactions
 
+import json
 import sqlite3
-from config import DB_PATH
-from utils import show_error
+import threading
+from contextlib import contextmanager
+from config import DB_PATH, DB_CACHE_SIZE_KB, DB_MMAP_SIZE, DB_STATEMENT_CACHE_SIZE, DB_BUSY_TIMEOUT_MS, \
+    DB_PROGRESS_STEPS, TABLE_PAGE_SIZE
 
 MAX_INVOICE_CUSTOMER_ID = 100000
 MAX_SERVICE_PROVIDER_ID = 1000000000
 
-def get_connection():
+PK_SEQUENCES_DDL_PATH = "ddl/pk_sequences.sql"
+
+# Sequence name (pk_type) -> ((numeric value of the key, condition for keys belonging to the number range),
+#                             printf format, exclusive upper bound)
+PK_SEQUENCE_FORMATS = {
+    "invoice": (("CAST({col} AS INTEGER)", "{col} <> '' AND {col} NOT GLOB '*[^0-9]*'"),
+                "%05d", MAX_INVOICE_CUSTOMER_ID),
+    "customer": (("CAST({col} AS INTEGER)", "{col} <> '' AND {col} NOT GLOB '*[^0-9]*'"),
+                 "%05d", MAX_INVOICE_CUSTOMER_ID),
+    "service_provider": (("CAST(substr({col}, 3) AS INTEGER)",
+                          "{col} GLOB 'DE[0-9][0-9][0-9][0-9][0-9][0-9][0-9][0-9][0-9]'"),
+                         "DE%09d", MAX_SERVICE_PROVIDER_ID),
+}
+_pk_sequences_ready = False
+
+# Every thread keeps one long-lived connection per database file
+_local = threading.local()
+_all_connections = []
+_all_connections_lock = threading.Lock()
+_pool_generation = 0
+# Called by close_all_connections(), e.g. to drop caches that belong to the open databases
+_close_callbacks = []
+# Called by schema_changed(), e.g. to drop queries built from the column lists of the tables
+_schema_callbacks = []
+
+
+def _configure_connection(conn):
+    """
+    Applies the performance pragmas once when a pooled connection is opened.
+    """
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{int(DB_CACHE_SIZE_KB)}")
+    conn.execute(f"PRAGMA mmap_size={int(DB_MMAP_SIZE)}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute(f"PRAGMA busy_timeout={int(DB_BUSY_TIMEOUT_MS)}")
+    # Fremdschlüssel sind in SQLite pro Verbindung abgeschaltet; die ON DELETE-Regeln brauchen sie
+    conn.execute("PRAGMA foreign_keys=ON")
+
+
+def get_connection(db_path=None):
+    """
+    Returns the reusable connection of the calling thread to the SQLite database.
+    The connection is opened and configured on first use and stays open until
+    close_all_connections() is called, so callers must not close it themselves.
+    Use it as context manager ("with get_connection() as conn:") to get a transaction
+    that is committed on success and rolled back on error.
+    """
+    db_path = db_path or DB_PATH
+    connections = getattr(_local, "connections", None)
+    if connections is None or getattr(_local, "generation", None) != _pool_generation:
+        # First use in this thread or the pool was closed in the meantime
+        connections = _local.connections = {}
+        _local.generation = _pool_generation
+    conn = connections.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path,
+                               cached_statements=DB_STATEMENT_CACHE_SIZE,
+                               check_same_thread=False)
+        _configure_connection(conn)
+        connections[db_path] = conn
+        with _all_connections_lock:
+            _all_connections.append(conn)
+    return conn
+
+
+def on_close_all_connections(callback):
+    """
+    Registers callback() to run whenever close_all_connections() closes the pool.
+    """
+    _close_callbacks.append(callback)
+
+
+def on_schema_changed(callback):
     """
-    Returns a new connection to the SQLite database.
+    Registers callback() to run whenever schema_changed() reports a changed schema.
     """
-    return sqlite3.connect(DB_PATH)
+    _schema_callbacks.append(callback)
+
+
+def schema_changed():
+    """
+    Reports that tables were created or altered (e.g. by migrations.migrate).
+    """
+    for callback in _schema_callbacks:
+        callback()
+
+
+def close_all_connections():
+    """
+    Closes every pooled connection of all threads (e.g. on application exit).
+    """
+    global _pool_generation
+    with _all_connections_lock:
+        connections = list(_all_connections)
+        _all_connections.clear()
+        _pool_generation += 1
+    for conn in connections:
+        try:
+            # Statistiken der Tabellen nachziehen, deren Abfragen davon profitieren (ANALYZE nur bei Bedarf)
+            conn.execute("PRAGMA optimize")
+        except Exception:
+            pass
+        try:
+            conn.close()
+        except Exception:
+            pass
+    for callback in _close_callbacks:
+        callback()
+
+
+def close_thread_connections():
+    """
+    Closes the pooled connections of the calling thread, e.g. at the end of a worker thread's run(),
+    which would otherwise stay open until close_all_connections().
+    """
+    connections = getattr(_local, "connections", None)
+    _local.connections = None
+    if not connections or getattr(_local, "generation", None) != _pool_generation:
+        # Schon von close_all_connections() geschlossen
+        return
+    with _all_connections_lock:
+        for conn in connections.values():
+            if conn in _all_connections:
+                _all_connections.remove(conn)
+    for conn in connections.values():
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+@contextmanager
+def cancelable(conn, is_canceled, steps=DB_PROGRESS_STEPS):
+    """
+    Lets is_canceled() abort the statements running on conn inside the with block: it is polled
+    every 'steps' SQLite VM instructions and a running query then fails with
+    sqlite3.OperationalError ("interrupted").
+    """
+    conn.set_progress_handler(lambda: 1 if is_canceled() else 0, steps)
+    try:
+        yield conn
+    finally:
+        conn.set_progress_handler(None, 0)
+
 
 def fetch_all(query, params=None):
     """
     Executes a query and returns all results.
     """
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(query, params or ())
-        data = cursor.fetchall()
-        columns = [description[0] for description in cursor.description]
+    cursor = get_connection().execute(query, params or ())
+    data = cursor.fetchall()
+    columns = [description[0] for description in cursor.description]
     return data, columns
 
 
+def fetch_page(query, key_column=None, after=None, limit=TABLE_PAGE_SIZE, params=None):
+    """
+    Keyset pagination: returns the next rows of 'query' ordered by 'key_column'
+    whose key is greater than 'after' (None = first page), plus the column names.
+    Without key_column the first result column is used.
+    Rows sharing the key of the last row are always returned completely,
+    so the key does not have to be unique (e.g. service providers with several accounts).
+    """
+    params = tuple(params or ())
+    conn = get_connection()
+    if after is None:
+        order_by = f'"{key_column}"' if key_column else "1"
+        cursor = conn.execute(f"SELECT * FROM ({query}) ORDER BY {order_by} LIMIT ?", params + (limit,))
+    else:
+        cursor = conn.execute(f'SELECT * FROM ({query}) WHERE "{key_column}" > ? ORDER BY "{key_column}" LIMIT ?',
+                              params + (after, limit))
+    rows = cursor.fetchall()
+    columns = [description[0] for description in cursor.description]
+
+    if len(rows) == limit:
+        key_column = key_column or columns[0]
+        key_idx = columns.index(key_column)
+        last_key = rows[-1][key_idx]
+        rows = [row for row in rows if row[key_idx] != last_key]
+        rows += conn.execute(f'SELECT * FROM ({query}) WHERE "{key_column}" = ?', params + (last_key,)).fetchall()
+    return rows, columns
+
+
+def fetch_rows_by_key(query, key_column, keys, params=None):
+    """
+    Returns the rows of 'query' whose key_column is one of 'keys' (ordered by key), plus the column names.
+    Used to refresh single rows of a table model after they were written.
+    """
+    params = tuple(params or ())
+    cursor = get_connection().execute(
+        f'SELECT * FROM ({query}) WHERE "{key_column}" IN (SELECT value FROM json_each(?)) ORDER BY "{key_column}"',
+        params + (json.dumps(list(keys)),))
+    rows = cursor.fetchall()
+    columns = [description[0] for description in cursor.description]
+    return rows, columns
+
+
+def ensure_pk_sequences(conn=None):
+    """
+    Creates the PK_SEQUENCES table and the triggers that keep it ahead of manually entered numbers.
+    """
+    global _pk_sequences_ready
+    conn = conn or get_connection()
+    with open(PK_SEQUENCES_DDL_PATH, encoding="utf-8") as f:
+        conn.executescript(f.read())
+    _pk_sequences_ready = True
+
+
+def _initial_sequence_value(conn, pk_type, table_name, pk_column):
+    """
+    Returns NEXT_VALUE for a sequence that has no row yet: one above the highest number in the table.
+    """
+    expr, condition = PK_SEQUENCE_FORMATS[pk_type][0]
+    return conn.execute(
+        f"SELECT COALESCE(MAX({expr.format(col=pk_column)}), 0) + 1 "
+        f"FROM {table_name} WHERE {condition.format(col=pk_column)}").fetchone()[0]
+
+
+def _peek_sequence_value(conn, pk_type, table_name, pk_column):
+    """
+    Returns the next number of a sequence without handing it out (None if the number range is exhausted).
+    """
+    row = conn.execute("SELECT NEXT_VALUE FROM PK_SEQUENCES WHERE NAME = ?", (pk_type,)).fetchone()
+    number = row[0] if row else _initial_sequence_value(conn, pk_type, table_name, pk_column)
+    return number if number < PK_SEQUENCE_FORMATS[pk_type][2] else None
+
+
+def _reserve_sequence_value(conn, pk_type, table_name, pk_column):
+    """
+    Atomically hands out the next number of a sequence (None if the number range is exhausted).
+    Runs in the caller's transaction, so the number is only used up if that transaction commits.
+    The sequence row is initialized from the highest number in the table on first use.
+    """
+    max_id = PK_SEQUENCE_FORMATS[pk_type][2]
+    reserve = ("UPDATE PK_SEQUENCES SET NEXT_VALUE = NEXT_VALUE + 1 "
+               "WHERE NAME = ? AND NEXT_VALUE < ? RETURNING NEXT_VALUE - 1")
+    row = conn.execute(reserve, (pk_type, max_id)).fetchone()
+    if row is None and conn.execute("SELECT 1 FROM PK_SEQUENCES WHERE NAME = ?", (pk_type,)).fetchone() is None:
+        conn.execute("INSERT INTO PK_SEQUENCES (NAME, NEXT_VALUE) VALUES (?, ?)",
+                     (pk_type, _initial_sequence_value(conn, pk_type, table_name, pk_column)))
+        row = conn.execute(reserve, (pk_type, max_id)).fetchone()
+    return row[0] if row else None
+
+
+def _find_free_number(conn, pk_type, table_name, pk_column):
+    """
+    Fallback when the sequence reached the end of the number range: smallest free number.
+    Only keys in the canonical (zero-padded) format are read, in primary-key index order,
+    so the scan stops at the first gap.
+    """
+    (expr, condition), fmt, max_id = PK_SEQUENCE_FORMATS[pk_type]
+    width = len(fmt % 0)
+    cursor = conn.execute(
+        f"SELECT {expr.format(col=pk_column)} FROM {table_name} "
+        f"WHERE {condition.format(col=pk_column)} AND length({pk_column}) = ? ORDER BY {pk_column}",
+        (width,))
+    candidate = 1
+    for (number,) in cursor:
+        if number > candidate:
+            break
+        if number == candidate:
+            candidate += 1
+    return candidate if candidate < max_id else None
+
+
 def get_next_primary_key(self, table_name, pk_column, pk_type):
+    """
+    Returns the next free primary key for the "Eintrag hinzufügen" form.
+    Invoice, customer and service provider numbers are only proposed from PK_SEQUENCES here,
+    reserve_primary_key hands them out when the entry is saved (opening the form uses up no number).
+    Positions get the next rowid (the database assigns POS_ID on insert).
+    """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cur = conn.cursor()
-        cur.execute(f"SELECT {pk_column} FROM {table_name}")
-        ids = [row[0] for row in cur.fetchall()]
-
-        if pk_type in ("invoice", "customer"):
-            used_numbers = set()
-            for id_str in ids:
-                try:
-                    num = int(str(id_str))
-                    used_numbers.add(num)
-                except Exception:
-                    continue
-            for candidate in range(1, MAX_INVOICE_CUSTOMER_ID):
-                if candidate not in used_numbers:
-                    return f"{candidate:05d}"
-            return "99999"  # fallback
-
-        elif pk_type == "service_provider":
-            used_numbers = set()
-            for id_str in ids:
-                if isinstance(id_str, str) and id_str.startswith("DE") and len(id_str) == 11:
-                    try:
-                        num = int(id_str[2:])
-                        used_numbers.add(num)
-                    except Exception:
-                        continue
-            for candidate in range(1, MAX_SERVICE_PROVIDER_ID):
-                if candidate not in used_numbers:
-                    return f"DE{candidate:09d}"
-            return "DE999999999"  # fallback
-
-        elif pk_type == "positions":
-            max_value = 0
-            for val in ids:
-                try:
-                    num = int(val)
-                    if num > max_value:
-                        max_value = num
-                except Exception:
-                    continue
-            return max_value + 1
+        conn = get_connection()
+        if pk_type == "positions":
+            max_value = conn.execute(f"SELECT MAX({pk_column}) FROM {table_name}").fetchone()[0]
+            return int(max_value or 0) + 1
 
-        else:
+        if pk_type not in PK_SEQUENCE_FORMATS:
             # Default: gib leeren String zurück für unbekannte Typen
             return ""
 
+        if not _pk_sequences_ready:
+            ensure_pk_sequences(conn)
+        number = _peek_sequence_value(conn, pk_type, table_name, pk_column)
+        if number is None:
+            number = _find_free_number(conn, pk_type, table_name, pk_column)
+        if number is None:
+            return "DE999999999" if pk_type == "service_provider" else "99999"  # fallback
+        return PK_SEQUENCE_FORMATS[pk_type][1] % number
+
     except Exception as e:
         print(f"Fehler beim Ermitteln des nächsten Primary Keys: {e}")
         if pk_type == "service_provider":
@@ -84,8 +312,22 @@ def get_next_primary_key(self, table_name, pk_column, pk_type):
             return 1
         else:
             return ""
-    finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
\ No newline at end of file
+
+
+def reserve_primary_key(conn, table_name, pk_column, pk_type):
+    """
+    Hands out the next invoice, customer or service provider number for an INSERT in the
+    caller's transaction on conn; call it before the other statements of that transaction.
+    The UPDATE of PK_SEQUENCES takes the write lock first, so
+    concurrent writers never get the same number, and the fallback search for a free number
+    (number range exhausted) is only valid because the INSERT follows in the same transaction.
+    Raises ValueError if no number is left.
+    """
+    if not _pk_sequences_ready:
+        ensure_pk_sequences(conn)
+    number = _reserve_sequence_value(conn, pk_type, table_name, pk_column)
+    if number is None:
+        number = _find_free_number(conn, pk_type, table_name, pk_column)
+    if number is None:
+        raise ValueError(f"Alle Nummern für {table_name} sind vergeben.")
+    return PK_SEQUENCE_FORMATS[pk_type][1] % number
@@ -0,0 +1,12 @@
+-- Indizes auf den Fremdschlüsseln: Joins der Views, Zählungen vor dem Löschen und die
+-- ON DELETE-Kaskaden (ohne Index müsste SQLite je gelöschter Zeile die Kindtabelle scannen).
+-- Die Verknüpfungstabelle ist in beiden Richtungen abgedeckt, Lookups brauchen so keinen Tabellenzugriff.
+
+CREATE INDEX IF NOT EXISTS idx_ref_invoices_positions_invoice
+    ON REF_INVOICES_POSITIONS (FK_INVOICES_INVOICE_NR, FK_POSITIONS_POS_ID);
+CREATE INDEX IF NOT EXISTS idx_ref_invoices_positions_position
+    ON REF_INVOICES_POSITIONS (FK_POSITIONS_POS_ID, FK_INVOICES_INVOICE_NR);
+CREATE INDEX IF NOT EXISTS idx_invoices_custid ON INVOICES (FK_CUSTID);
+CREATE INDEX IF NOT EXISTS idx_invoices_ust_idnr ON INVOICES (FK_UST_IDNR);
+CREATE INDEX IF NOT EXISTS idx_ref_labor_cost_ust_idnr ON REF_LABOR_COST (FK_UST_IDNR, FK_ST_NR);
+CREATE INDEX IF NOT EXISTS idx_account_ust_idnr ON ACCOUNT (FK_UST_IDNR);
@@ -0,0 +1,25 @@
+-- Referenzzähler der Logos: Anzahl der Dienstleister, die ein Logo verwenden (identische Logos werden
+-- nur einmal gespeichert und von mehreren Dienstleistern geteilt, siehe logo_ingest.py).
+-- Die Trigger halten den Zähler aktuell; Logos mit REF_COUNT = 0 entfernt "python cli.py maintenance".
+
+ALTER TABLE LOGOS ADD COLUMN REF_COUNT INTEGER NOT NULL DEFAULT 0;
+UPDATE LOGOS SET REF_COUNT = (SELECT COUNT(*) FROM SERVICE_PROVIDER s WHERE s.FK_LOGO_ID = LOGOS.ID);
+
+CREATE TRIGGER IF NOT EXISTS trg_logo_ref_ai AFTER INSERT ON SERVICE_PROVIDER
+WHEN NEW.FK_LOGO_ID IS NOT NULL
+BEGIN
+    UPDATE LOGOS SET REF_COUNT = REF_COUNT + 1 WHERE ID = NEW.FK_LOGO_ID;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_logo_ref_au AFTER UPDATE OF FK_LOGO_ID ON SERVICE_PROVIDER
+WHEN OLD.FK_LOGO_ID IS NOT NEW.FK_LOGO_ID
+BEGIN
+    UPDATE LOGOS SET REF_COUNT = REF_COUNT - 1 WHERE ID = OLD.FK_LOGO_ID;
+    UPDATE LOGOS SET REF_COUNT = REF_COUNT + 1 WHERE ID = NEW.FK_LOGO_ID;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_logo_ref_ad AFTER DELETE ON SERVICE_PROVIDER
+WHEN OLD.FK_LOGO_ID IS NOT NULL
+BEGIN
+    UPDATE LOGOS SET REF_COUNT = REF_COUNT - 1 WHERE ID = OLD.FK_LOGO_ID;
+END;
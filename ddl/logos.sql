@@ -0,0 +1,7 @@
+-- Normalisierte Logos (logo_ingest.py): der Inhalts-Hash findet identische Logos, damit sie nur
+-- einmal gespeichert werden, THUMBNAIL ist die kleine Variante für das Logo-Label der Oberfläche.
+-- Vorher gespeicherte Logos haben NULL, bis sie mit "python cli.py logos" normalisiert werden.
+
+ALTER TABLE LOGOS ADD COLUMN CONTENT_HASH TEXT;
+ALTER TABLE LOGOS ADD COLUMN THUMBNAIL BLOB;
+CREATE INDEX IF NOT EXISTS idx_logos_content_hash ON LOGOS (CONTENT_HASH);
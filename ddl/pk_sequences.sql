@@ -0,0 +1,32 @@
+-- Nummernkreise für Rechnungen, Kunden und Dienstleister.
+-- NEXT_VALUE ist die nächste freie Nummer; get_next_primary_key schlägt sie nur vor,
+-- reserve_primary_key vergibt sie beim Speichern atomar (UPDATE ... RETURNING in derselben
+-- Transaktion wie das INSERT), damit gleichzeitige Schreiber nie dieselbe Nummer erhalten.
+-- Die Trigger ziehen den Zähler nach, wenn eine Nummer manuell (größer) vergeben wurde.
+-- Fehlt eine Zeile, wird sie beim ersten Aufruf aus dem aktuellen Maximum initialisiert.
+
+CREATE TABLE IF NOT EXISTS PK_SEQUENCES (
+    NAME TEXT PRIMARY KEY,
+    NEXT_VALUE INTEGER NOT NULL
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_seq_invoices_ai AFTER INSERT ON INVOICES
+WHEN NEW.INVOICE_NR <> '' AND NEW.INVOICE_NR NOT GLOB '*[^0-9]*'
+BEGIN
+    UPDATE PK_SEQUENCES SET NEXT_VALUE = CAST(NEW.INVOICE_NR AS INTEGER) + 1
+    WHERE NAME = 'invoice' AND NEXT_VALUE <= CAST(NEW.INVOICE_NR AS INTEGER);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_seq_customers_ai AFTER INSERT ON CUSTOMERS
+WHEN NEW.CUSTID <> '' AND NEW.CUSTID NOT GLOB '*[^0-9]*'
+BEGIN
+    UPDATE PK_SEQUENCES SET NEXT_VALUE = CAST(NEW.CUSTID AS INTEGER) + 1
+    WHERE NAME = 'customer' AND NEXT_VALUE <= CAST(NEW.CUSTID AS INTEGER);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_seq_service_provider_ai AFTER INSERT ON SERVICE_PROVIDER
+WHEN NEW.UST_IDNR GLOB 'DE[0-9][0-9][0-9][0-9][0-9][0-9][0-9][0-9][0-9]'
+BEGIN
+    UPDATE PK_SEQUENCES SET NEXT_VALUE = CAST(substr(NEW.UST_IDNR, 3) AS INTEGER) + 1
+    WHERE NAME = 'service_provider' AND NEXT_VALUE <= CAST(substr(NEW.UST_IDNR, 3) AS INTEGER);
+END;
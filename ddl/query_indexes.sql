@@ -0,0 +1,8 @@
+-- Indizes für häufige Abfragen außerhalb der Fremdschlüssel (siehe ddl/indexes.sql):
+-- Anmeldung (Benutzername -> ID und Passwort-Hash ohne Tabellenzugriff), Rechteprüfung
+-- (utils.get_max_permission) und die Dienstleister eines Logos.
+-- Ältere Datenbanken haben die Primärschlüssel/UNIQUE-Constraints aus ddl/tables.sql nicht immer.
+
+CREATE INDEX IF NOT EXISTS idx_users_username ON USERS (USERNAME, ID, PASSWORD_HASH);
+CREATE INDEX IF NOT EXISTS idx_ref_user_permissions_user ON REF_USER_PERMISSIONS (USER_ID, PERMISSION_ID);
+CREATE INDEX IF NOT EXISTS idx_service_provider_logo ON SERVICE_PROVIDER (FK_LOGO_ID);
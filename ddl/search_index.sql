@@ -0,0 +1,223 @@
+-- Volltextsuche (FTS5) für die Suchfelder der Oberfläche.
+-- Jede Schattentabelle verwendet die rowid der Basistabelle und wird über Trigger synchron gehalten.
+-- Die Hilfs-Views liefern den zu indexierenden Inhalt (erste Spalte ROW_ID = rowid der Basistabelle).
+
+-- Inhalt der Kunden-Suche
+DROP VIEW IF EXISTS view_search_customers;
+CREATE VIEW view_search_customers AS
+SELECT
+    c.rowid AS ROW_ID,
+    c.CUSTID,
+    c.FIRST_NAME,
+    c.LAST_NAME,
+    c.GENDER,
+    c.CREATION_DATE,
+    a.STREET,
+    a.NUMBER,
+    a.ZIP,
+    a.CITY,
+    a.COUNTRY
+FROM CUSTOMERS c
+LEFT JOIN ADDRESSES a ON c.FK_ADDRESS_ID = a.ID;
+
+-- Inhalt der Dienstleister-Suche (mehrere Bankverbindungen werden zusammengefasst)
+DROP VIEW IF EXISTS view_search_service_provider;
+CREATE VIEW view_search_service_provider AS
+SELECT
+    sp.rowid AS ROW_ID,
+    sp.UST_IDNR,
+    sp.PROVIDER_NAME,
+    sp.EMAIL,
+    sp.WEBSITE,
+    sp.TELNR,
+    sp.MOBILTELNR,
+    sp.FAXNR,
+    sp.CREATION_DATE,
+    a.STREET,
+    a.NUMBER,
+    a.ZIP,
+    a.CITY,
+    a.COUNTRY,
+    (SELECT group_concat(acc.IBAN, ' ') FROM ACCOUNT acc WHERE acc.FK_UST_IDNR = sp.UST_IDNR) AS IBAN,
+    (SELECT group_concat(b.BIC || ' ' || b.BANK_NAME, ' ')
+       FROM ACCOUNT acc JOIN BANK b ON acc.FK_BANK_ID = b.BIC
+      WHERE acc.FK_UST_IDNR = sp.UST_IDNR) AS BANK
+FROM SERVICE_PROVIDER sp
+LEFT JOIN ADDRESSES a ON sp.FK_ADDRESS_ID = a.ID;
+
+-- Inhalt der Rechnungs-Suche
+DROP VIEW IF EXISTS view_search_invoices;
+CREATE VIEW view_search_invoices AS
+SELECT
+    i.rowid AS ROW_ID,
+    i.INVOICE_NR,
+    i.CREATION_DATE,
+    c.FIRST_NAME || ' ' || c.LAST_NAME AS CUSTOMER,
+    sp.PROVIDER_NAME,
+    i.LABOR_COST,
+    i.VAT_RATE_LABOR,
+    i.VAT_RATE_POSITIONS
+FROM INVOICES i
+LEFT JOIN CUSTOMERS c ON c.CUSTID = i.FK_CUSTID
+LEFT JOIN SERVICE_PROVIDER sp ON sp.UST_IDNR = i.FK_UST_IDNR;
+
+-- Inhalt der Positions-Suche
+DROP VIEW IF EXISTS view_search_positions;
+CREATE VIEW view_search_positions AS
+SELECT
+    p.rowid AS ROW_ID,
+    p.POS_ID,
+    p.CREATION_DATE,
+    p.NAME,
+    p.DESCRIPTION,
+    p.UNIT_PRICE,
+    p.AREA
+FROM POSITIONS p;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS FTS_CUSTOMERS USING fts5(
+    CUSTID, FIRST_NAME, LAST_NAME, GENDER, CREATION_DATE, STREET, NUMBER, ZIP, CITY, COUNTRY,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS FTS_SERVICE_PROVIDER USING fts5(
+    UST_IDNR, PROVIDER_NAME, EMAIL, WEBSITE, TELNR, MOBILTELNR, FAXNR, CREATION_DATE,
+    STREET, NUMBER, ZIP, CITY, COUNTRY, IBAN, BANK,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS FTS_INVOICES USING fts5(
+    INVOICE_NR, CREATION_DATE, CUSTOMER, PROVIDER_NAME, LABOR_COST, VAT_RATE_LABOR, VAT_RATE_POSITIONS,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS FTS_POSITIONS USING fts5(
+    POS_ID, CREATION_DATE, NAME, DESCRIPTION, UNIT_PRICE, AREA,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+-- Trigger: Kunden
+CREATE TRIGGER IF NOT EXISTS trg_fts_customers_ai AFTER INSERT ON CUSTOMERS BEGIN
+    INSERT INTO FTS_CUSTOMERS (rowid, CUSTID, FIRST_NAME, LAST_NAME, GENDER, CREATION_DATE, STREET, NUMBER, ZIP, CITY, COUNTRY)
+    SELECT * FROM view_search_customers WHERE ROW_ID = NEW.rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fts_customers_au AFTER UPDATE ON CUSTOMERS BEGIN
+    DELETE FROM FTS_CUSTOMERS WHERE rowid = OLD.rowid;
+    INSERT INTO FTS_CUSTOMERS (rowid, CUSTID, FIRST_NAME, LAST_NAME, GENDER, CREATION_DATE, STREET, NUMBER, ZIP, CITY, COUNTRY)
+    SELECT * FROM view_search_customers WHERE ROW_ID = NEW.rowid;
+END;
+
+-- Rechnungen zeigen den Kundennamen
+CREATE TRIGGER IF NOT EXISTS trg_fts_customers_name_au AFTER UPDATE OF CUSTID, FIRST_NAME, LAST_NAME ON CUSTOMERS BEGIN
+    DELETE FROM FTS_INVOICES WHERE rowid IN (SELECT rowid FROM INVOICES WHERE FK_CUSTID IN (OLD.CUSTID, NEW.CUSTID));
+    INSERT INTO FTS_INVOICES (rowid, INVOICE_NR, CREATION_DATE, CUSTOMER, PROVIDER_NAME, LABOR_COST, VAT_RATE_LABOR, VAT_RATE_POSITIONS)
+    SELECT * FROM view_search_invoices WHERE ROW_ID IN (SELECT rowid FROM INVOICES WHERE FK_CUSTID IN (OLD.CUSTID, NEW.CUSTID));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fts_customers_ad AFTER DELETE ON CUSTOMERS BEGIN
+    DELETE FROM FTS_CUSTOMERS WHERE rowid = OLD.rowid;
+END;
+
+-- Trigger: Dienstleister
+CREATE TRIGGER IF NOT EXISTS trg_fts_service_provider_ai AFTER INSERT ON SERVICE_PROVIDER BEGIN
+    INSERT INTO FTS_SERVICE_PROVIDER (rowid, UST_IDNR, PROVIDER_NAME, EMAIL, WEBSITE, TELNR, MOBILTELNR, FAXNR, CREATION_DATE,
+                                      STREET, NUMBER, ZIP, CITY, COUNTRY, IBAN, BANK)
+    SELECT * FROM view_search_service_provider WHERE ROW_ID = NEW.rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fts_service_provider_au AFTER UPDATE ON SERVICE_PROVIDER BEGIN
+    DELETE FROM FTS_SERVICE_PROVIDER WHERE rowid = OLD.rowid;
+    INSERT INTO FTS_SERVICE_PROVIDER (rowid, UST_IDNR, PROVIDER_NAME, EMAIL, WEBSITE, TELNR, MOBILTELNR, FAXNR, CREATION_DATE,
+                                      STREET, NUMBER, ZIP, CITY, COUNTRY, IBAN, BANK)
+    SELECT * FROM view_search_service_provider WHERE ROW_ID = NEW.rowid;
+END;
+
+-- Rechnungen zeigen den Unternehmensnamen
+CREATE TRIGGER IF NOT EXISTS trg_fts_service_provider_name_au AFTER UPDATE OF UST_IDNR, PROVIDER_NAME ON SERVICE_PROVIDER BEGIN
+    DELETE FROM FTS_INVOICES WHERE rowid IN (SELECT rowid FROM INVOICES WHERE FK_UST_IDNR IN (OLD.UST_IDNR, NEW.UST_IDNR));
+    INSERT INTO FTS_INVOICES (rowid, INVOICE_NR, CREATION_DATE, CUSTOMER, PROVIDER_NAME, LABOR_COST, VAT_RATE_LABOR, VAT_RATE_POSITIONS)
+    SELECT * FROM view_search_invoices WHERE ROW_ID IN (SELECT rowid FROM INVOICES WHERE FK_UST_IDNR IN (OLD.UST_IDNR, NEW.UST_IDNR));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fts_service_provider_ad AFTER DELETE ON SERVICE_PROVIDER BEGIN
+    DELETE FROM FTS_SERVICE_PROVIDER WHERE rowid = OLD.rowid;
+END;
+
+-- Trigger: Adressen (Kunden und Dienstleister zeigen die Adresse in der Suche)
+CREATE TRIGGER IF NOT EXISTS trg_fts_addresses_au AFTER UPDATE ON ADDRESSES BEGIN
+    DELETE FROM FTS_CUSTOMERS WHERE rowid IN (SELECT rowid FROM CUSTOMERS WHERE FK_ADDRESS_ID = NEW.ID);
+    INSERT INTO FTS_CUSTOMERS (rowid, CUSTID, FIRST_NAME, LAST_NAME, GENDER, CREATION_DATE, STREET, NUMBER, ZIP, CITY, COUNTRY)
+    SELECT * FROM view_search_customers WHERE ROW_ID IN (SELECT rowid FROM CUSTOMERS WHERE FK_ADDRESS_ID = NEW.ID);
+    DELETE FROM FTS_SERVICE_PROVIDER WHERE rowid IN (SELECT rowid FROM SERVICE_PROVIDER WHERE FK_ADDRESS_ID = NEW.ID);
+    INSERT INTO FTS_SERVICE_PROVIDER (rowid, UST_IDNR, PROVIDER_NAME, EMAIL, WEBSITE, TELNR, MOBILTELNR, FAXNR, CREATION_DATE,
+                                      STREET, NUMBER, ZIP, CITY, COUNTRY, IBAN, BANK)
+    SELECT * FROM view_search_service_provider WHERE ROW_ID IN (SELECT rowid FROM SERVICE_PROVIDER WHERE FK_ADDRESS_ID = NEW.ID);
+END;
+
+-- Trigger: Bankverbindungen der Dienstleister
+CREATE TRIGGER IF NOT EXISTS trg_fts_account_ai AFTER INSERT ON ACCOUNT BEGIN
+    DELETE FROM FTS_SERVICE_PROVIDER WHERE rowid IN (SELECT rowid FROM SERVICE_PROVIDER WHERE UST_IDNR = NEW.FK_UST_IDNR);
+    INSERT INTO FTS_SERVICE_PROVIDER (rowid, UST_IDNR, PROVIDER_NAME, EMAIL, WEBSITE, TELNR, MOBILTELNR, FAXNR, CREATION_DATE,
+                                      STREET, NUMBER, ZIP, CITY, COUNTRY, IBAN, BANK)
+    SELECT * FROM view_search_service_provider WHERE ROW_ID IN (SELECT rowid FROM SERVICE_PROVIDER WHERE UST_IDNR = NEW.FK_UST_IDNR);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fts_account_ad AFTER DELETE ON ACCOUNT BEGIN
+    DELETE FROM FTS_SERVICE_PROVIDER WHERE rowid IN (SELECT rowid FROM SERVICE_PROVIDER WHERE UST_IDNR = OLD.FK_UST_IDNR);
+    INSERT INTO FTS_SERVICE_PROVIDER (rowid, UST_IDNR, PROVIDER_NAME, EMAIL, WEBSITE, TELNR, MOBILTELNR, FAXNR, CREATION_DATE,
+                                      STREET, NUMBER, ZIP, CITY, COUNTRY, IBAN, BANK)
+    SELECT * FROM view_search_service_provider WHERE ROW_ID IN (SELECT rowid FROM SERVICE_PROVIDER WHERE UST_IDNR = OLD.FK_UST_IDNR);
+END;
+
+-- Geänderte IBAN/BIC oder Bankverbindung, die zu einem anderen Dienstleister wechselt (beide aktualisieren)
+CREATE TRIGGER IF NOT EXISTS trg_fts_account_au AFTER UPDATE ON ACCOUNT BEGIN
+    DELETE FROM FTS_SERVICE_PROVIDER WHERE rowid IN (SELECT rowid FROM SERVICE_PROVIDER WHERE UST_IDNR IN (OLD.FK_UST_IDNR, NEW.FK_UST_IDNR));
+    INSERT INTO FTS_SERVICE_PROVIDER (rowid, UST_IDNR, PROVIDER_NAME, EMAIL, WEBSITE, TELNR, MOBILTELNR, FAXNR, CREATION_DATE,
+                                      STREET, NUMBER, ZIP, CITY, COUNTRY, IBAN, BANK)
+    SELECT * FROM view_search_service_provider
+    WHERE ROW_ID IN (SELECT rowid FROM SERVICE_PROVIDER WHERE UST_IDNR IN (OLD.FK_UST_IDNR, NEW.FK_UST_IDNR));
+END;
+
+-- Trigger: Banken (BIC und Name stehen bei allen Dienstleistern mit einem Konto dieser Bank)
+CREATE TRIGGER IF NOT EXISTS trg_fts_bank_au AFTER UPDATE ON BANK BEGIN
+    DELETE FROM FTS_SERVICE_PROVIDER WHERE rowid IN (
+        SELECT sp.rowid FROM SERVICE_PROVIDER sp JOIN ACCOUNT acc ON acc.FK_UST_IDNR = sp.UST_IDNR
+        WHERE acc.FK_BANK_ID IN (OLD.BIC, NEW.BIC));
+    INSERT INTO FTS_SERVICE_PROVIDER (rowid, UST_IDNR, PROVIDER_NAME, EMAIL, WEBSITE, TELNR, MOBILTELNR, FAXNR, CREATION_DATE,
+                                      STREET, NUMBER, ZIP, CITY, COUNTRY, IBAN, BANK)
+    SELECT * FROM view_search_service_provider WHERE ROW_ID IN (
+        SELECT sp.rowid FROM SERVICE_PROVIDER sp JOIN ACCOUNT acc ON acc.FK_UST_IDNR = sp.UST_IDNR
+        WHERE acc.FK_BANK_ID IN (OLD.BIC, NEW.BIC));
+END;
+
+-- Trigger: Rechnungen
+CREATE TRIGGER IF NOT EXISTS trg_fts_invoices_ai AFTER INSERT ON INVOICES BEGIN
+    INSERT INTO FTS_INVOICES (rowid, INVOICE_NR, CREATION_DATE, CUSTOMER, PROVIDER_NAME, LABOR_COST, VAT_RATE_LABOR, VAT_RATE_POSITIONS)
+    SELECT * FROM view_search_invoices WHERE ROW_ID = NEW.rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fts_invoices_au AFTER UPDATE ON INVOICES BEGIN
+    DELETE FROM FTS_INVOICES WHERE rowid = OLD.rowid;
+    INSERT INTO FTS_INVOICES (rowid, INVOICE_NR, CREATION_DATE, CUSTOMER, PROVIDER_NAME, LABOR_COST, VAT_RATE_LABOR, VAT_RATE_POSITIONS)
+    SELECT * FROM view_search_invoices WHERE ROW_ID = NEW.rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fts_invoices_ad AFTER DELETE ON INVOICES BEGIN
+    DELETE FROM FTS_INVOICES WHERE rowid = OLD.rowid;
+END;
+
+-- Trigger: Positionen
+CREATE TRIGGER IF NOT EXISTS trg_fts_positions_ai AFTER INSERT ON POSITIONS BEGIN
+    INSERT INTO FTS_POSITIONS (rowid, POS_ID, CREATION_DATE, NAME, DESCRIPTION, UNIT_PRICE, AREA)
+    SELECT * FROM view_search_positions WHERE ROW_ID = NEW.rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fts_positions_au AFTER UPDATE ON POSITIONS BEGIN
+    DELETE FROM FTS_POSITIONS WHERE rowid = OLD.rowid;
+    INSERT INTO FTS_POSITIONS (rowid, POS_ID, CREATION_DATE, NAME, DESCRIPTION, UNIT_PRICE, AREA)
+    SELECT * FROM view_search_positions WHERE ROW_ID = NEW.rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fts_positions_ad AFTER DELETE ON POSITIONS BEGIN
+    DELETE FROM FTS_POSITIONS WHERE rowid = OLD.rowid;
+END;
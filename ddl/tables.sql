@@ -0,0 +1,111 @@
+-- Tabellen der Rechnungsverwaltung. Bestehende Tabellen bleiben unverändert (IF NOT EXISTS);
+-- fehlende Fremdschlüssel älterer Datenbanken ergänzt schema.ensure_schema.
+-- Datumswerte werden wie in der Oberfläche als Text im Format TT.MM.JJJJ gespeichert.
+
+CREATE TABLE IF NOT EXISTS ADDRESSES (
+    ID INTEGER PRIMARY KEY,
+    STREET TEXT,
+    NUMBER TEXT,
+    ZIP TEXT,
+    CITY TEXT,
+    COUNTRY TEXT,
+    CREATION_DATE TEXT
+);
+
+CREATE TABLE IF NOT EXISTS LOGOS (
+    ID INTEGER PRIMARY KEY,
+    FILE_NAME TEXT,
+    LOGO_BINARY BLOB,
+    MIME_TYPE TEXT,
+    CREATION_DATE TEXT
+);
+
+CREATE TABLE IF NOT EXISTS CUSTOMERS (
+    CUSTID TEXT PRIMARY KEY,
+    FIRST_NAME TEXT,
+    LAST_NAME TEXT,
+    GENDER TEXT,
+    CREATION_DATE TEXT,
+    FK_ADDRESS_ID INTEGER REFERENCES ADDRESSES (ID)
+);
+
+CREATE TABLE IF NOT EXISTS SERVICE_PROVIDER (
+    UST_IDNR TEXT PRIMARY KEY,
+    PROVIDER_NAME TEXT,
+    EMAIL TEXT,
+    WEBSITE TEXT,
+    TELNR TEXT,
+    MOBILTELNR TEXT,
+    FAXNR TEXT,
+    CREATION_DATE TEXT,
+    FK_ADDRESS_ID INTEGER REFERENCES ADDRESSES (ID),
+    FK_LOGO_ID INTEGER REFERENCES LOGOS (ID)
+);
+
+CREATE TABLE IF NOT EXISTS BANK (
+    BIC TEXT PRIMARY KEY,
+    BANK_NAME TEXT
+);
+
+CREATE TABLE IF NOT EXISTS ACCOUNT (
+    IBAN TEXT PRIMARY KEY,
+    FK_BANK_ID TEXT REFERENCES BANK (BIC),
+    FK_UST_IDNR TEXT,
+    FOREIGN KEY ("FK_UST_IDNR") REFERENCES "SERVICE_PROVIDER" ("UST_IDNR") ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS CEO (
+    ST_NR TEXT PRIMARY KEY,
+    CEO_NAME TEXT
+);
+
+CREATE TABLE IF NOT EXISTS REF_LABOR_COST (
+    FK_ST_NR TEXT REFERENCES CEO (ST_NR),
+    FK_UST_IDNR TEXT,
+    FOREIGN KEY ("FK_UST_IDNR") REFERENCES "SERVICE_PROVIDER" ("UST_IDNR") ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS POSITIONS (
+    POS_ID INTEGER PRIMARY KEY,
+    NAME TEXT,
+    DESCRIPTION TEXT,
+    AREA REAL,
+    UNIT_PRICE REAL,
+    CREATION_DATE TEXT
+);
+
+CREATE TABLE IF NOT EXISTS INVOICES (
+    INVOICE_NR TEXT PRIMARY KEY,
+    CREATION_DATE TEXT,
+    FK_CUSTID TEXT,
+    FK_UST_IDNR TEXT,
+    LABOR_COST REAL,
+    VAT_RATE_LABOR REAL,
+    VAT_RATE_POSITIONS REAL,
+    FOREIGN KEY ("FK_CUSTID") REFERENCES "CUSTOMERS" ("CUSTID") ON DELETE CASCADE,
+    FOREIGN KEY ("FK_UST_IDNR") REFERENCES "SERVICE_PROVIDER" ("UST_IDNR") ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS REF_INVOICES_POSITIONS (
+    FK_POSITIONS_POS_ID INTEGER,
+    FK_INVOICES_INVOICE_NR TEXT,
+    FOREIGN KEY ("FK_INVOICES_INVOICE_NR") REFERENCES "INVOICES" ("INVOICE_NR") ON DELETE CASCADE,
+    FOREIGN KEY ("FK_POSITIONS_POS_ID") REFERENCES "POSITIONS" ("POS_ID") ON DELETE RESTRICT
+);
+
+CREATE TABLE IF NOT EXISTS USERS (
+    ID INTEGER PRIMARY KEY,
+    USERNAME TEXT NOT NULL UNIQUE,
+    PASSWORD_HASH TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS PERMISSIONS (
+    ID INTEGER PRIMARY KEY,
+    APP_PERM TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS REF_USER_PERMISSIONS (
+    USER_ID INTEGER NOT NULL REFERENCES USERS (ID) ON DELETE CASCADE,
+    PERMISSION_ID INTEGER NOT NULL REFERENCES PERMISSIONS (ID),
+    PRIMARY KEY (USER_ID, PERMISSION_ID)
+);
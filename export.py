@@ -0,0 +1,189 @@
+# This file writes the password protected ZIP export of invoices (no Qt, everything stays in memory)
+
+import json
+import os
+
+from config import DB_PATH, EXPORT_COMPRESSION, EXPORT_COMPRESSION_LEVEL
+from database import get_connection
+from invoice_data import load_invoice, load_invoices, build_invoice_xml, invoice_pdf_bytes
+from pdf_jobs import map_chunks
+
+# Names of the compression methods in EXPORT_COMPRESSION -> attribute of pyzipper
+_COMPRESSION_METHODS = {
+    "stored": "ZIP_STORED",
+    "deflated": "ZIP_DEFLATED",
+    "bzip2": "ZIP_BZIP2",
+    "lzma": "ZIP_LZMA",
+}
+
+
+def _compression(pyzipper, kind):
+    """
+    Returns the pyzipper constant configured for a file kind ("xml" or "pdf").
+    """
+    name = EXPORT_COMPRESSION.get(kind, "deflated")
+    if name not in _COMPRESSION_METHODS:
+        raise ValueError(f"Unbekannte Kompression '{name}' für {kind}-Dateien im Export")
+    return getattr(pyzipper, _COMPRESSION_METHODS[name])
+
+
+def _write_entry(pyzipper, zip_file, arcname, data, kind):
+    compression = _compression(pyzipper, kind)
+    level = EXPORT_COMPRESSION_LEVEL if compression in (pyzipper.ZIP_DEFLATED, pyzipper.ZIP_BZIP2) else None
+    zip_file.writestr(arcname, data, compress_type=compression, compresslevel=level)
+
+
+def invoice_export_files(invoice_nr, conn=None, prefix=""):
+    """
+    Builds the files of an invoice for the export in memory.
+    Returns a list of (archive name, data, kind).
+    """
+    export_data, logo_bytes = load_invoice(invoice_nr, conn)
+    return [
+        (f"{prefix}rechnung.xml", build_invoice_xml(export_data).encode("utf-8"), "xml"),
+        (f"{prefix}rechnung.pdf", invoice_pdf_bytes(export_data, logo_bytes), "pdf"),
+    ]
+
+
+def write_encrypted_zip(zip_path, files, password):
+    """
+    Streams in-memory files into an AES encrypted ZIP archive.
+    files: iterable of (archive name, data, kind); kind selects the compression (EXPORT_COMPRESSION).
+    """
+    import pyzipper
+
+    with pyzipper.AESZipFile(zip_path, 'w', encryption=pyzipper.WZ_AES) as zip_file:
+        zip_file.setpassword(password.encode("utf-8"))
+        for arcname, data, kind in files:
+            _write_entry(pyzipper, zip_file, arcname, data, kind)
+
+
+def export_invoice(invoice_nr, zip_path, password, conn=None):
+    """
+    Exports XML and PDF of one invoice into an encrypted ZIP, without temporary files.
+    """
+    write_encrypted_zip(zip_path, invoice_export_files(invoice_nr, conn), password)
+
+
+def find_invoices(invoice_nrs=None, date_from=None, date_to=None, customer_id=None, provider_id=None, conn=None):
+    """
+    Returns [(invoice_nr, customer_id)] of all invoices matching every given filter, ordered by number.
+    date_from/date_to are datetime.date (inclusive); CREATION_DATE is stored as dd.MM.yyyy.
+    """
+    conn = conn or get_connection()
+    iso_date = "substr(CREATION_DATE, 7, 4) || '-' || substr(CREATION_DATE, 4, 2) || '-' || substr(CREATION_DATE, 1, 2)"
+    clauses = []
+    params = []
+    if invoice_nrs is not None:
+        clauses.append("INVOICE_NR IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps(list(invoice_nrs)))
+    if date_from is not None:
+        clauses.append(f"{iso_date} >= ?")
+        params.append(date_from.isoformat())
+    if date_to is not None:
+        clauses.append(f"{iso_date} <= ?")
+        params.append(date_to.isoformat())
+    if customer_id:
+        clauses.append("FK_CUSTID = ?")
+        params.append(customer_id)
+    if provider_id:
+        clauses.append("FK_UST_IDNR = ?")
+        params.append(provider_id)
+    sql = "SELECT INVOICE_NR, FK_CUSTID FROM INVOICES"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    return conn.execute(sql + " ORDER BY INVOICE_NR", params).fetchall()
+
+
+def _export_files_job(invoice_nrs, db_path):
+    """
+    Runs in a worker process: builds XML and PDF of several invoices (loaded with one bulk query).
+    Returns a list of (invoice_nr, files, error message).
+    """
+    invoices = load_invoices(invoice_nrs, get_connection(db_path))
+    results = []
+    for invoice_nr in invoice_nrs:
+        if invoice_nr not in invoices:
+            results.append((invoice_nr, None, f"Rechnung {invoice_nr} nicht gefunden"))
+            continue
+        export_data, logo_bytes = invoices[invoice_nr]
+        try:
+            files = [
+                (f"rechnung_{invoice_nr}.xml", build_invoice_xml(export_data).encode("utf-8"), "xml"),
+                (f"rechnung_{invoice_nr}.pdf", invoice_pdf_bytes(export_data, logo_bytes), "pdf"),
+            ]
+            results.append((invoice_nr, files, None))
+        except Exception as e:
+            results.append((invoice_nr, None, str(e)))
+    return results
+
+
+def export_invoices(invoices, target, password, per_customer=False, workers=None, db_path=None,
+                    progress=None, is_canceled=None):
+    """
+    Exports many invoices into encrypted ZIP archives. The files are rendered in a process pool
+    and streamed into the archive(s) as they arrive.
+    invoices: [(invoice_nr, customer_id)] as returned by find_invoices.
+    target: path of the archive, or with per_customer=True the directory for one archive per customer
+    (rechnungen_kunde_<Kundennummer>.zip).
+    progress(done, total) is called after every invoice; is_canceled is polled between results,
+    on cancel the archives written so far are removed.
+    Returns (archive paths, [(invoice_nr, error message)]), or (None, errors) when canceled.
+    """
+    import pyzipper
+
+    customer_of = dict(invoices)
+    remaining = {}
+    for customer_id in customer_of.values():
+        remaining[customer_id] = remaining.get(customer_id, 0) + 1
+
+    archives = {}
+    written = []
+    errors = []
+
+    def archive_for(customer_id):
+        key = customer_id if per_customer else None
+        if key not in archives:
+            path = os.path.join(target, f"rechnungen_kunde_{customer_id}.zip") if per_customer else target
+            zip_file = pyzipper.AESZipFile(path, 'w', encryption=pyzipper.WZ_AES)
+            zip_file.setpassword(password.encode("utf-8"))
+            archives[key] = zip_file
+            written.append(path)
+        return key, archives[key]
+
+    done = 0
+    completed = False
+    try:
+        for chunk, results, error in map_chunks(_export_files_job, customer_of.keys(), db_path or DB_PATH,
+                                                workers=workers, is_canceled=is_canceled):
+            if error is not None:
+                results = [(invoice_nr, None, str(error)) for invoice_nr in chunk]
+            for invoice_nr, files, message in results:
+                customer_id = customer_of[invoice_nr]
+                key, zip_file = archive_for(customer_id)
+                if message is not None:
+                    errors.append((invoice_nr, message))
+                else:
+                    for arcname, data, kind in files:
+                        _write_entry(pyzipper, zip_file, arcname, data, kind)
+                # Archiv eines Kunden schließen, sobald alle seine Rechnungen geschrieben sind
+                remaining[customer_id] -= 1
+                if per_customer and remaining[customer_id] == 0:
+                    archives.pop(key).close()
+                done += 1
+                if progress is not None:
+                    progress(done, len(customer_of))
+            if is_canceled is not None and is_canceled():
+                break
+        # map_chunks hört bei einem Abbruch auch ohne break einfach auf, Ergebnisse zu liefern
+        completed = done == len(customer_of) and not (is_canceled is not None and is_canceled())
+    finally:
+        for zip_file in archives.values():
+            zip_file.close()
+        if not completed:
+            for path in written:
+                if os.path.exists(path):
+                    os.remove(path)
+    if not completed:
+        return None, errors
+    return written, errors
@@ -0,0 +1,217 @@
+# This file collects the data of an invoice and renders its XML/PDF (no Qt, usable from worker processes)
+
+import json
+import os
+from io import BytesIO
+import xml.etree.ElementTree as ET
+from xml.dom import minidom
+
+from cache import LRUCache
+from config import CACHE_OUTPUT_PATH, QUERY_CACHE_SIZE
+from database import get_connection, on_close_all_connections, on_schema_changed
+from invoice_model import InvoiceData
+
+# id(conn) -> (conn, query for one invoice, query for several invoices). The entry keeps its connection,
+# so the id cannot be reused by another one. The queries list the columns of the tables, so they are
+# built again after a migration; shared by the GUI and the PDF/export threads, hence the locked LRUCache.
+_query_cache = LRUCache(QUERY_CACHE_SIZE)
+on_close_all_connections(_query_cache.clear)
+on_schema_changed(_query_cache.clear)
+
+
+def invoice_pdf_path(invoice_nr, output_dir=None):
+    """
+    Returns the path of the cached PDF of an invoice.
+    """
+    return os.path.join(output_dir or CACHE_OUTPUT_PATH, f"rechnung_{invoice_nr}.pdf")
+
+
+def _json_object(conn, parts):
+    """
+    Builds a json_object(...) expression from (table, alias) pairs. Like dict(zip(columns, row))
+    on "SELECT c.*, a.*", a column name that appears twice keeps its first position but takes
+    the value of the later table.
+    """
+    fields = {}
+    for table, alias in parts:
+        for column in (row[1] for row in conn.execute(f"PRAGMA table_info({table})")):
+            fields[column] = f"{alias}.{column}"
+    return "json_object(" + ", ".join(f"'{key}', {expr}" for key, expr in fields.items()) + ")"
+
+
+def _invoice_select(conn, with_logo):
+    """
+    SELECT over INVOICES i that returns one complete invoice per row: the number, every part as JSON,
+    the logo id and (with_logo) the logo itself.
+    """
+    logo = """,
+            (SELECT l.LOGO_BINARY FROM SERVICE_PROVIDER s
+             JOIN LOGOS l ON l.ID = s.FK_LOGO_ID
+             WHERE s.UST_IDNR = i.FK_UST_IDNR)""" if with_logo else ""
+    return f"""
+        SELECT
+            i.INVOICE_NR,
+            {_json_object(conn, [("INVOICES", "i")])},
+            (SELECT {_json_object(conn, [("CUSTOMERS", "c"), ("ADDRESSES", "a")])}
+             FROM CUSTOMERS c
+             LEFT JOIN ADDRESSES a ON c.FK_ADDRESS_ID = a.ID
+             WHERE c.CUSTID = i.FK_CUSTID),
+            (SELECT {_json_object(conn, [("SERVICE_PROVIDER", "s"), ("ADDRESSES", "a")])}
+             FROM SERVICE_PROVIDER s
+             LEFT JOIN ADDRESSES a ON s.FK_ADDRESS_ID = a.ID
+             WHERE s.UST_IDNR = i.FK_UST_IDNR),
+            (SELECT json_group_array(json_object('ST_NR', ceo.ST_NR, 'CEO_NAME', ceo.CEO_NAME))
+             FROM SERVICE_PROVIDER sp
+             JOIN REF_LABOR_COST rel ON rel.FK_UST_IDNR = sp.UST_IDNR
+             JOIN CEO ceo ON rel.FK_ST_NR = ceo.ST_NR
+             WHERE sp.UST_IDNR = i.FK_UST_IDNR),
+            (SELECT json_group_array({_json_object(conn, [("POSITIONS", "p")])})
+             FROM REF_INVOICES_POSITIONS ref
+             JOIN POSITIONS p ON ref.FK_POSITIONS_POS_ID = p.POS_ID
+             WHERE ref.FK_INVOICES_INVOICE_NR = i.INVOICE_NR),
+            (SELECT json_group_array(json_object('IBAN', acc.IBAN, 'BIC', acc.FK_BANK_ID, 'BANK_NAME', b.BANK_NAME))
+             FROM ACCOUNT acc
+             JOIN BANK b ON acc.FK_BANK_ID = b.BIC
+             WHERE acc.FK_UST_IDNR = i.FK_UST_IDNR),
+            (SELECT s.FK_LOGO_ID FROM SERVICE_PROVIDER s WHERE s.UST_IDNR = i.FK_UST_IDNR){logo}
+        FROM INVOICES i
+    """
+
+
+def _invoice_queries(conn):
+    entry = _query_cache.get(id(conn))
+    if entry is None or entry[0] is not conn:
+        entry = (
+            conn,
+            _invoice_select(conn, with_logo=True) + " WHERE i.INVOICE_NR = ?",
+            _invoice_select(conn, with_logo=False) + " WHERE i.INVOICE_NR IN (SELECT value FROM json_each(?))",
+        )
+        _query_cache.put(id(conn), entry)
+    return entry[1], entry[2]
+
+
+def _to_export_data(row):
+    """
+    Converts a row of _invoice_select into the export data structure (list of single-key dicts).
+    """
+    invoice, customer, provider, ceos, positions, accounts = (json.loads(part) if part else None for part in row[1:7])
+    return [
+        {"invoice": invoice or {}},
+        {"customer": customer or {}},
+        {"service_provider": provider or {}},
+        {"ceos": ceos or []},
+        {"positions": positions or []},
+        {"accounts": accounts or []}
+    ]
+
+
+def load_invoice(invoice_nr, conn=None):
+    """
+    Loads a complete invoice (invoice, customer and provider with address, CEOs, positions,
+    accounts and logo) with a single query.
+    Returns (export_data, logo_bytes); export_data is a list of single-key dicts:
+    invoice, customer, service_provider, ceos, positions, accounts.
+    """
+    conn = conn or get_connection()
+    single_query, _ = _invoice_queries(conn)
+    row = conn.execute(single_query, (invoice_nr,)).fetchone()
+    if row is None:
+        return _to_export_data((invoice_nr,) + (None,) * 6), None
+    return _to_export_data(row), row[8]
+
+
+def load_invoices(invoice_nrs, conn=None):
+    """
+    Bulk variant of load_invoice for batch rendering and export: loads all given invoices with one
+    query and their logos with a second one (each logo only once).
+    Returns {invoice_nr: (export_data, logo_bytes)}, unknown numbers are missing in the result.
+    """
+    conn = conn or get_connection()
+    _, bulk_query = _invoice_queries(conn)
+    rows = conn.execute(bulk_query, (json.dumps(list(invoice_nrs)),)).fetchall()
+    logo_ids = sorted({row[7] for row in rows if row[7] is not None})
+    logos = dict(conn.execute("SELECT ID, LOGO_BINARY FROM LOGOS WHERE ID IN (SELECT value FROM json_each(?))",
+                              (json.dumps(logo_ids),))) if logo_ids else {}
+    return {row[0]: (_to_export_data(row), logos.get(row[7])) for row in rows}
+
+
+def get_export_data(invoice_nr, conn=None):
+    """
+    Loads everything needed for the XML/PDF of an invoice (see load_invoice).
+    """
+    return load_invoice(invoice_nr, conn)[0]
+
+
+def build_invoice_xml(export_data):
+    """
+    Converts the export data into the (pretty printed) invoice XML.
+    """
+    root = ET.Element("invoice_data")
+
+    for entry in export_data:
+        for key, value in entry.items():
+            section = ET.SubElement(root, key)
+
+            if isinstance(value, list):
+                for item in value:
+                    item_el = ET.SubElement(section, key[:-1])  # z. B. ceo aus ceos
+                    for sub_key, sub_val in item.items():
+                        ET.SubElement(item_el, sub_key).text = str(sub_val)
+
+            elif isinstance(value, dict):
+                for sub_key, sub_val in value.items():
+                    ET.SubElement(section, sub_key).text = str(sub_val)
+
+            # Extra-Fall für 'service_provider', falls 'logo_id' als separates Feld übergeben wird
+            if key == "service_provider" and isinstance(value, dict):
+                if "logo_id" in value:
+                    ET.SubElement(section, "FK_LOGO_ID").text = str(value["logo_id"])
+
+    rough_string = ET.tostring(root, encoding='utf-8')
+    reparsed = minidom.parseString(rough_string)
+    xml_string = reparsed.toprettyxml(indent="  ", encoding="utf-8").decode('utf-8')
+
+    return xml_string
+
+
+def _pdf_builder(export_data, logo_bytes):
+    # reportlab erst beim ersten PDF importieren: es dominiert sonst die Startzeit der Anwendung
+    from pdfCreation import InvoicePDFBuilder
+    logo_id = next((part["service_provider"].get("FK_LOGO_ID") for part in export_data if "service_provider" in part),
+                   None)
+    return InvoicePDFBuilder(InvoiceData.from_export_data(export_data), logo_bytes, logo_id)
+
+
+def write_invoice_pdf(export_data, logo_bytes, output_path):
+    """
+    Renders already loaded invoice data into output_path.
+    The file is written under a temporary name and moved into place afterwards,
+    so readers never see a half written PDF.
+    """
+    # Der Zielordner (z.B. der PDF-Cache) fehlt, wenn die Oberfläche auf diesem Rechner nie lief
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    try:
+        _pdf_builder(export_data, logo_bytes).build(tmp_path)
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return output_path
+
+
+def invoice_pdf_bytes(export_data, logo_bytes):
+    """
+    Renders already loaded invoice data into memory and returns the PDF bytes.
+    """
+    buffer = BytesIO()
+    _pdf_builder(export_data, logo_bytes).build(buffer)
+    return buffer.getvalue()
+
+
+def render_invoice_pdf(invoice_nr, output_path=None, conn=None):
+    """
+    Loads the data of an invoice, renders its PDF and returns the path.
+    """
+    export_data, logo_bytes = load_invoice(invoice_nr, conn)
+    return write_invoice_pdf(export_data, logo_bytes, output_path or invoice_pdf_path(invoice_nr))
@@ -0,0 +1,172 @@
+# This file contains the typed invoice data passed to the PDF builder
+
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+
+
+def _text(values, key, default=""):
+    """
+    Returns a field as display text, exactly like it ends up in the invoice XML
+    (str() of the value, stripped; default for missing or empty fields).
+    """
+    if values is None or key not in values:
+        return default
+    text = str(values[key])
+    return text.strip() if text else default
+
+
+@dataclass
+class Customer:
+    first_name: str = ""
+    last_name: str = ""
+    street: str = ""
+    number: str = ""
+    zip: str = ""
+    city: str = ""
+
+    @classmethod
+    def from_dict(cls, values):
+        return cls(
+            first_name=_text(values, "FIRST_NAME"),
+            last_name=_text(values, "LAST_NAME"),
+            street=_text(values, "STREET"),
+            number=_text(values, "NUMBER"),
+            zip=_text(values, "ZIP"),
+            city=_text(values, "CITY"),
+        )
+
+
+@dataclass
+class ServiceProvider:
+    name: str = ""
+    street: str = ""
+    number: str = ""
+    zip: str = ""
+    city: str = ""
+    mobile: str = ""
+    phone: str = ""
+    fax: str = ""
+    email: str = ""
+    website: str = ""
+
+    @classmethod
+    def from_dict(cls, values):
+        return cls(
+            name=_text(values, "PROVIDER_NAME"),
+            street=_text(values, "STREET"),
+            number=_text(values, "NUMBER"),
+            zip=_text(values, "ZIP"),
+            city=_text(values, "CITY"),
+            mobile=_text(values, "MOBILTELNR"),
+            phone=_text(values, "TELNR"),
+            fax=_text(values, "FAXNR"),
+            email=_text(values, "EMAIL"),
+            website=_text(values, "WEBSITE"),
+        )
+
+
+@dataclass
+class Position:
+    name: str = ""
+    description: str = ""
+    area: str = ""
+    unit_price: str = ""
+
+    @classmethod
+    def from_dict(cls, values):
+        return cls(
+            name=_text(values, "NAME"),
+            description=_text(values, "DESCRIPTION"),
+            area=_text(values, "AREA"),
+            unit_price=_text(values, "UNIT_PRICE"),
+        )
+
+
+@dataclass
+class Account:
+    bank_name: str = ""
+    iban: str = ""
+    bic: str = ""
+
+    @classmethod
+    def from_dict(cls, values):
+        return cls(
+            bank_name=_text(values, "BANK_NAME"),
+            iban=_text(values, "IBAN"),
+            bic=_text(values, "BIC"),
+        )
+
+
+@dataclass
+class InvoiceData:
+    """
+    Everything the PDF of an invoice shows. Values are kept as display text, numbers are
+    converted by the builder (labor cost and VAT rates default to "0"/"19" like before).
+    """
+    invoice_nr: str = ""
+    customer_nr: str = ""
+    creation_date: str = ""
+    labor_cost: str = "0"
+    vat_rate_labor: str = "19"
+    vat_rate_positions: str = "19"
+    customer: Customer = field(default_factory=Customer)
+    provider: ServiceProvider = field(default_factory=ServiceProvider)
+    ceo_names: list = field(default_factory=list)
+    positions: list = field(default_factory=list)
+    accounts: list = field(default_factory=list)
+
+    @classmethod
+    def _from_parts(cls, invoice, customer, provider, ceos, positions, accounts):
+        return cls(
+            invoice_nr=_text(invoice, "INVOICE_NR"),
+            customer_nr=_text(invoice, "FK_CUSTID"),
+            creation_date=_text(invoice, "CREATION_DATE"),
+            labor_cost=_text(invoice, "LABOR_COST", "0"),
+            vat_rate_labor=_text(invoice, "VAT_RATE_LABOR", "19"),
+            vat_rate_positions=_text(invoice, "VAT_RATE_POSITIONS", "19"),
+            customer=Customer.from_dict(customer),
+            provider=ServiceProvider.from_dict(provider),
+            ceo_names=[_text(ceo, "CEO_NAME") for ceo in ceos],
+            positions=[Position.from_dict(pos) for pos in positions],
+            accounts=[Account.from_dict(acc) for acc in accounts],
+        )
+
+    @classmethod
+    def from_export_data(cls, export_data):
+        """
+        Creates the invoice data from the result of invoice_data.get_export_data.
+        """
+        parts = {}
+        for entry in export_data:
+            parts.update(entry)
+        return cls._from_parts(
+            parts.get("invoice") or {},
+            parts.get("customer") or {},
+            parts.get("service_provider") or {},
+            parts.get("ceos") or [],
+            parts.get("positions") or [],
+            parts.get("accounts") or [],
+        )
+
+    @classmethod
+    def from_xml(cls, xml_string):
+        """
+        Creates the invoice data from an exported invoice XML (see invoice_data.build_invoice_xml).
+        """
+        root = ET.fromstring(xml_string)
+
+        def section(tag):
+            element = root.find(tag)
+            return {} if element is None else {child.tag: child.text or "" for child in element}
+
+        def items(tag, item_tag):
+            return [{child.tag: child.text or "" for child in item} for item in root.findall(f"{tag}/{item_tag}")]
+
+        return cls._from_parts(
+            section("invoice"),
+            section("customer"),
+            section("service_provider"),
+            items("ceos", "ceo"),
+            items("positions", "position"),
+            items("accounts", "account"),
+        )
@@ -0,0 +1,78 @@
+# This file caches the decoded provider logos (Qt pixmaps for the provider form, ImageReaders for the PDFs)
+
+from io import BytesIO
+
+from cache import LRUCache
+from config import LOGO_CACHE_SIZE
+from database import get_connection
+
+# (Logo-ID, Breite, Höhe) -> skalierte QPixmap; nur im GUI-Thread verwenden
+_pixmaps = LRUCache(LOGO_CACHE_SIZE)
+# Logo-ID -> (Logo-Bytes, ImageReader); je Prozess, auch in den PDF-Worker-Prozessen
+_readers = LRUCache(LOGO_CACHE_SIZE)
+
+
+def _load_pixmap(conn, column, logo_id):
+    from PyQt6.QtGui import QPixmap
+
+    row = conn.execute(f"SELECT {column} FROM LOGOS WHERE ID = ?", (logo_id,)).fetchone()
+    if not row or not row[0]:
+        return None
+    pixmap = QPixmap()
+    pixmap.loadFromData(row[0])
+    return pixmap
+
+
+def logo_pixmap(logo_id, width, height, conn=None):
+    """
+    Returns the logo scaled into width x height (aspect ratio kept), or None if it does not exist.
+    The BLOB is only read and decoded the first time a logo is shown at that size; the small
+    THUMBNAIL (logo_ingest) is used unless it would have to be enlarged.
+    """
+    key = (logo_id, width, height)
+    pixmap = _pixmaps.get(key)
+    if pixmap is None:
+        from PyQt6.QtCore import Qt
+
+        conn = conn or get_connection()
+        pixmap = _load_pixmap(conn, "THUMBNAIL", logo_id)
+        if pixmap is None or pixmap.size().scaled(width, height, Qt.AspectRatioMode.KeepAspectRatio).width() \
+                > pixmap.width():
+            pixmap = _load_pixmap(conn, "LOGO_BINARY", logo_id)
+        if pixmap is None:
+            return None
+        pixmap = pixmap.scaled(width, height, Qt.AspectRatioMode.KeepAspectRatio,
+                               Qt.TransformationMode.SmoothTransformation)
+        _pixmaps.put(key, pixmap)
+    return pixmap
+
+
+def logo_reader(logo_id, logo_bytes):
+    """
+    Returns the ImageReader of a logo, decoded once per process and logo.
+    The bytes are compared as well, so a logo replaced under the same ID (e.g. by another
+    process, where invalidate_logos is not called) is decoded again.
+    Without logo_id (e.g. PDFs built from XML) the bytes themselves are the key.
+    """
+    from reportlab.lib.utils import ImageReader
+
+    key = logo_bytes if logo_id is None else logo_id
+    entry = _readers.get(key)
+    if entry is None or entry[0] != logo_bytes:
+        entry = (logo_bytes, ImageReader(BytesIO(logo_bytes)))
+        _readers.put(key, entry)
+    return entry[1]
+
+
+def invalidate_logos(logo_ids=None):
+    """
+    Drops the cached pixmaps and readers of the given logos (all logos without logo_ids),
+    subscriber of the change notifier for LOGOS.
+    """
+    if logo_ids is None:
+        _pixmaps.clear()
+        _readers.clear()
+        return
+    logo_ids = set(logo_ids)
+    _pixmaps.discard(lambda key: key[0] in logo_ids)
+    _readers.discard(lambda key: key in logo_ids)
@@ -0,0 +1,115 @@
+# This file normalizes logos before they are stored in LOGOS: scaled down to the resolution of the
+# logo slot in the PDF, SVGs rasterized, metadata stripped and identical logos stored only once
+
+import hashlib
+from dataclasses import dataclass
+from io import BytesIO
+
+from config import LOGO_SLOT_MM, LOGO_DPI, LOGO_JPEG_QUALITY, LOGO_THUMBNAIL_SIZE
+
+
+@dataclass
+class NormalizedLogo:
+    data: bytes
+    mime_type: str
+    thumbnail: bytes
+    content_hash: str
+
+
+def slot_pixels(dpi=LOGO_DPI):
+    """
+    Returns the size in pixels of the logo slot in InvoicePDFBuilder._draw_logo at the given resolution.
+    """
+    width_mm, height_mm = LOGO_SLOT_MM
+    return round(width_mm / 25.4 * dpi), round(height_mm / 25.4 * dpi)
+
+
+def is_svg(data, file_name=""):
+    return file_name.lower().endswith(".svg") or b"<svg" in data[:1024]
+
+
+def _rasterize_svg(data, size):
+    """
+    Renders an SVG into a PNG that fills size (aspect ratio kept). Uses QtSvg and therefore
+    needs a running QApplication, i.e. only works in the GUI.
+    """
+    from PyQt6.QtCore import QBuffer, QByteArray, QIODevice, Qt
+    from PyQt6.QtGui import QImage, QPainter
+    from PyQt6.QtSvg import QSvgRenderer
+
+    renderer = QSvgRenderer(QByteArray(data))
+    if not renderer.isValid():
+        raise ValueError("Die SVG-Datei kann nicht gelesen werden.")
+    target = renderer.defaultSize().scaled(size[0], size[1], Qt.AspectRatioMode.KeepAspectRatio)
+    image = QImage(target, QImage.Format.Format_ARGB32_Premultiplied)
+    image.fill(Qt.GlobalColor.transparent)
+    painter = QPainter(image)
+    renderer.render(painter)
+    painter.end()
+    buffer = QBuffer()
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    image.save(buffer, "PNG")
+    return bytes(buffer.data())
+
+
+def _encode(image, as_jpeg):
+    # Ohne exif/icc_profile/pnginfo schreibt Pillow keine Metadaten
+    buffer = BytesIO()
+    if as_jpeg:
+        image.save(buffer, "JPEG", quality=LOGO_JPEG_QUALITY, optimize=True)
+    else:
+        image.save(buffer, "PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def normalize_logo(data, file_name="", rasterize_svg=True):
+    """
+    Returns the logo as it is stored: at most as large as the logo slot at LOGO_DPI (smaller
+    images are not enlarged), rotated by its EXIF orientation, without metadata, as JPEG for
+    photos without transparency and as PNG otherwise, plus a thumbnail for the UI.
+    Raises ValueError for files that are no readable image.
+    """
+    from PIL import Image, ImageOps
+
+    if is_svg(data, file_name):
+        if not rasterize_svg:
+            raise ValueError("SVG-Logos können nur in der Oberfläche umgewandelt werden.")
+        data = _rasterize_svg(data, slot_pixels())
+    try:
+        image = Image.open(BytesIO(data))
+        source_format = image.format
+        # JPEGs gleich verkleinert dekodieren, große Fotos brauchen sonst viel Zeit und Speicher
+        image.draft("RGB", slot_pixels())
+        image = ImageOps.exif_transpose(image)
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ValueError(f"Die Datei ist kein lesbares Bild: {e}")
+
+    has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+    image = image.convert("RGBA" if has_alpha else "RGB")
+    as_jpeg = source_format == "JPEG" and not has_alpha
+    image.thumbnail(slot_pixels(), Image.Resampling.LANCZOS)
+    logo_bytes = _encode(image, as_jpeg)
+
+    thumbnail = image.copy()
+    thumbnail.thumbnail(LOGO_THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
+    return NormalizedLogo(
+        data=logo_bytes,
+        mime_type="image/jpeg" if as_jpeg else "image/png",
+        thumbnail=_encode(thumbnail, as_jpeg),
+        content_hash=hashlib.sha256(logo_bytes).hexdigest(),
+    )
+
+
+def store_logo(conn, logo, file_name, creation_date):
+    """
+    Inserts a normalized logo unless an identical one is already stored (same content hash).
+    Runs in the caller's transaction. Returns (logo_id, inserted).
+    """
+    row = conn.execute("SELECT ID FROM LOGOS WHERE CONTENT_HASH = ?", (logo.content_hash,)).fetchone()
+    if row:
+        return row[0], False
+    cur = conn.execute(
+        "INSERT INTO LOGOS (FILE_NAME, LOGO_BINARY, MIME_TYPE, CREATION_DATE, CONTENT_HASH, THUMBNAIL) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (file_name, logo.data, logo.mime_type, creation_date, logo.content_hash, logo.thumbnail))
+    return cur.lastrowid, True
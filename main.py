@@ -1,11 +1,20 @@
+import multiprocessing
 import sys
 from PyQt6.QtWidgets import QApplication, QMessageBox
 from config import IS_AUTHENTICATION_ACTIVE
-from mainwindow import MainWindow
+from database import close_all_connections
+from migrations import migrate
+from search import ensure_search_index
 
 def main():
     app = QApplication(sys.argv)
 
+    # Tabellen, Indizes und Views auf den aktuellen Stand bringen (nur neue Migrationen laufen),
+    # vor dem Login, da dieser schon die Benutzertabellen und ihre Indizes verwendet
+    _, warnings = migrate()
+    if warnings:
+        QMessageBox.warning(None, "Datenbank aktualisiert", "\n".join(warnings))
+
     user_id = None
     username = None
 
@@ -25,9 +34,21 @@ def main():
         user_id = None  # z.B. 0 für Gast
         username = "Gast"
 
+    # Volltextindex anlegen/befüllen, falls er in dieser Datenbank noch fehlt
+    available, error = ensure_search_index()
+    if not available:
+        QMessageBox.warning(None, "Volltextsuche nicht verfügbar",
+                            f"Die Suche verwendet die langsamere einfache Textsuche.\n\n{error}")
+
+    # Erst nach dem Login importieren, damit der Login-Dialog sofort erscheint
+    from mainwindow import MainWindow
     window = MainWindow(user_id=user_id, username=username)
     window.show()
-    sys.exit(app.exec())
+    exit_code = app.exec()
+    close_all_connections()
+    sys.exit(exit_code)
 
 if __name__ == "__main__":
+    # Nötig für die PDF-Worker-Prozesse in der gepackten Windows-Anwendung
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
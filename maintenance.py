@@ -0,0 +1,101 @@
+# This file contains the database maintenance: sharing identical logos, removing unused ones and VACUUM
+
+import hashlib
+
+from search import SEARCH_INDEXES, ensure_search_index, rebuild_search_index
+
+# Logos, die kein Dienstleister mehr verwendet (der Zähler wird zur Sicherheit gegengeprüft)
+_UNUSED_LOGOS = """
+    FROM LOGOS
+    WHERE REF_COUNT = 0 AND NOT EXISTS (SELECT 1 FROM SERVICE_PROVIDER s WHERE s.FK_LOGO_ID = LOGOS.ID)
+"""
+
+
+def merge_duplicate_logos(conn):
+    """
+    Points the providers of identical logos to the oldest of them. Logos are identical if their
+    content hash matches; for logos stored before logo_ingest it is computed from the BLOB.
+    The copies are left with REF_COUNT 0 for collect_unused_logos. Returns the number of copies
+    that were still in use.
+    """
+    first_ids = {}
+    merged = 0
+    with conn:
+        for logo_id, content_hash in conn.execute("SELECT ID, CONTENT_HASH FROM LOGOS ORDER BY ID").fetchall():
+            if content_hash is None:
+                data = conn.execute("SELECT LOGO_BINARY FROM LOGOS WHERE ID = ?", (logo_id,)).fetchone()[0]
+                if not data:
+                    continue
+                content_hash = hashlib.sha256(data).hexdigest()
+            if content_hash not in first_ids:
+                first_ids[content_hash] = logo_id
+                continue
+            # Kopien, die schon umgehängt wurden (noch nicht gelöscht), nicht erneut zählen
+            if conn.execute("UPDATE SERVICE_PROVIDER SET FK_LOGO_ID = ? WHERE FK_LOGO_ID = ?",
+                            (first_ids[content_hash], logo_id)).rowcount:
+                merged += 1
+    return merged
+
+
+def collect_unused_logos(conn):
+    """
+    Deletes the logos no provider uses any more. Returns (number of logos, bytes of their BLOBs).
+    """
+    with conn:
+        count, size = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(LOGO_BINARY) + COALESCE(LENGTH(THUMBNAIL), 0)), 0)"
+            + _UNUSED_LOGOS).fetchone()
+        conn.execute("DELETE" + _UNUSED_LOGOS)
+    return count, size
+
+
+def database_size(conn):
+    """
+    Returns (size of the database file, thereof free pages) in bytes.
+    """
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return page_count * page_size, free_pages * page_size
+
+
+def _moved_search_indexes(conn):
+    """
+    Returns the FTS tables with entries whose rowid no longer belongs to the row they were
+    indexed from (the key stored in the index differs from the key of the base row).
+    """
+    moved = []
+    for idx in SEARCH_INDEXES.values():
+        stale = conn.execute(
+            f"SELECT 1 FROM {idx['fts']} f LEFT JOIN {idx['table']} t ON t.rowid = f.rowid "
+            f"WHERE CAST(t.{idx['pk_col']} AS TEXT) IS NOT CAST(f.{idx['pk_col']} AS TEXT) LIMIT 1").fetchone()
+        if stale:
+            moved.append(idx["fts"])
+    return moved
+
+
+def vacuum(conn):
+    """
+    Rewrites the database file without free pages. The search index is created beforehand
+    (ensure_search_index rewrites its views), so VACUUM compacts that as well. VACUUM may
+    renumber the rowids of tables without INTEGER PRIMARY KEY, which the FTS tables refer to:
+    only tables whose rowids actually moved are refilled and optimized, followed by a second
+    VACUUM so the refill does not leave free pages behind. Needs exclusive access, so the
+    application should be closed. Returns (size before, size after) in bytes.
+    """
+    size_before, _ = database_size(conn)
+    has_search_index, _ = ensure_search_index(conn)
+    conn.commit()
+    conn.execute("VACUUM")
+    moved = _moved_search_indexes(conn) if has_search_index else []
+    if moved:
+        rebuild_search_index(conn, moved)
+        with conn:
+            for fts in moved:
+                # Die beim Neubefüllen entstandenen Segmente zu einem zusammenführen
+                conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('optimize')")
+        conn.execute("VACUUM")
+    # Den WAL zurückschreiben, damit die Datei auf der Platte wirklich kleiner wird
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    size_after, _ = database_size(conn)
+    return size_before, size_after
@@ -1,6 +1,4 @@
 # IMPORT other Packages
-import mimetypes
-import sqlite3
 import subprocess
 import webbrowser
 import pathlib
@@ -8,38 +6,44 @@ from datetime import date
 import sys
 from functools import partial
 
-from xml.dom import minidom
-import xml.etree.ElementTree as ET
-
 import os
 
 # IMPORT PyQt6 Packages
 from PyQt6.QtWidgets import QMainWindow, QTableView, QHeaderView, QLineEdit, QLabel, QComboBox, \
     QDoubleSpinBox, QPlainTextEdit, QTextBrowser, QTextEdit, QPushButton, QWidget, QDateEdit, \
-    QDialog, QFormLayout, QFileDialog, QMessageBox, QVBoxLayout, QProgressDialog, QAbstractItemView
-from PyQt6.QtGui import QStandardItemModel, QStandardItem, QPixmap
-from PyQt6.QtCore import QModelIndex, Qt, QTimer
-from PyQt6 import uic
-from PyQt6.QtPdf import QPdfDocument
-from PyQt6.QtPdfWidgets import QPdfView
+    QDialog, QFormLayout, QFileDialog, QMessageBox, QVBoxLayout, QProgressBar, QAbstractItemView, QCheckBox, \
+    QRadioButton, QProgressDialog
+from PyQt6.QtGui import QStandardItemModel, QPixmap
+from PyQt6.QtCore import QModelIndex, Qt, QThread, QTimer, pyqtSignal
 
 import config
 # IMPORT Functions from local scripts
-from database import get_next_primary_key, fetch_all
+from database import get_next_primary_key, reserve_primary_key, get_connection, close_thread_connections
 from validation import *
-from config import UI_PATH, DB_PATH, POSITION_DIALOG_PATH, DEBOUNCE_TIME, CACHE_OUTPUT_PATH, IS_AUTHORIZATION_ACTIVE, \
+from config import UI_PATH, POSITION_DIALOG_PATH, CACHE_OUTPUT_PATH, IS_AUTHORIZATION_ACTIVE, \
     MIN_LENGTH_EXPORT
 from auth.user_management_dialog import UserManagementDialog
-from utils import show_error, format_exception, show_info, get_max_permission
+from utils import show_error, format_exception, show_info
+from auth.session import current_session, start_session
 from logic import get_service_provider_ceos
+from search import note_write
+from search_worker import SearchDispatcher, SearchScheduler
+from table_model import SqlTableModel
+from change_notifier import ChangeNotifier
+from logo_cache import logo_pixmap, invalidate_logos
+from logo_ingest import normalize_logo, store_logo
+from ui_loader import load_ui
 
-from pdfCreation import InvoicePDFBuilder
+from invoice_data import get_export_data, build_invoice_xml
+from pdf_cache import get_invoice_pdf
+# export, pdf_jobs (Prozesspool) und QtPdf werden erst bei der ersten Verwendung importiert,
+# damit das Fenster schneller erscheint
 
 
 class InfoDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
-        uic.loadUi("Qt/info_dialog.ui", self)
+        load_ui(self, "Qt/info_dialog.ui")
 
 class PasswordDialog(QDialog):
     def __init__(self, min_length=MIN_LENGTH_EXPORT, parent=None):
@@ -85,6 +89,57 @@ class PasswordDialog(QDialog):
     def get_password(self):
         return self.password
 
+# Class :QDialog: for choosing which invoices go into a bulk export
+class BulkExportDialog(QDialog):
+    def __init__(self, selected_count=0, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Sammelexport")
+
+        self.rb_selected = QRadioButton(f"Markierte Rechnungen ({selected_count})")
+        self.rb_selected.setEnabled(selected_count > 0)
+        self.rb_date = QRadioButton("Zeitraum")
+        self.de_from = QDateEdit(date.today().replace(month=1, day=1))
+        self.de_to = QDateEdit(date.today())
+        for date_edit in (self.de_from, self.de_to):
+            date_edit.setCalendarPopup(True)
+            date_edit.setDisplayFormat("dd.MM.yyyy")
+        self.rb_customer = QRadioButton("Kunde")
+        self.le_customer = QLineEdit()
+        self.le_customer.setPlaceholderText("Kundennummer")
+        self.rb_provider = QRadioButton("Dienstleister")
+        self.le_provider = QLineEdit()
+        self.le_provider.setPlaceholderText("UStIdNr")
+        (self.rb_selected if selected_count > 0 else self.rb_date).setChecked(True)
+
+        self.cb_per_customer = QCheckBox("Ein Archiv pro Kunde")
+
+        self.button_ok = QPushButton("Exportieren")
+        self.button_ok.clicked.connect(self.accept)
+
+        layout = QFormLayout()
+        layout.addRow(self.rb_selected)
+        layout.addRow(self.rb_date)
+        layout.addRow("Von:", self.de_from)
+        layout.addRow("Bis:", self.de_to)
+        layout.addRow(self.rb_customer, self.le_customer)
+        layout.addRow(self.rb_provider, self.le_provider)
+        layout.addRow(self.cb_per_customer)
+        layout.addRow(self.button_ok)
+        self.setLayout(layout)
+
+    # Function to get the filter arguments for export.find_invoices
+    def get_filter(self, selected_nrs):
+        if self.rb_selected.isChecked():
+            return {"invoice_nrs": selected_nrs}
+        if self.rb_date.isChecked():
+            return {"date_from": self.de_from.date().toPyDate(), "date_to": self.de_to.date().toPyDate()}
+        if self.rb_customer.isChecked():
+            return {"customer_id": self.le_customer.text().strip()}
+        return {"provider_id": self.le_provider.text().strip()}
+
+    def per_customer(self):
+        return self.cb_per_customer.isChecked()
+
 # Class :QDialog: for gathering StNr of CEOs
 class CEOStNrDialog(QDialog):
     def __init__(self, ceo_names, parent=None):
@@ -109,7 +164,7 @@ class CEOStNrDialog(QDialog):
 class PositionDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
-        uic.loadUi(POSITION_DIALOG_PATH, self)
+        load_ui(self, POSITION_DIALOG_PATH)
 
     # Function to get the data
     def get_data(self):
@@ -120,15 +175,82 @@ class PositionDialog(QDialog):
             "Einzelpreis": self.sb_unit_price.value(),
         }
 
+# Class :QThread: for rendering missing invoice PDFs in the background
+class PdfBatchThread(QThread):
+    """
+    Renders invoice PDFs in a process pool without blocking the GUI thread.
+    """
+    progress = pyqtSignal(int, int)  # erledigt, gesamt
+    batch_finished = pyqtSignal(int, int)  # erfolgreich, fehlgeschlagen
+
+    def __init__(self, invoice_nrs, parent=None):
+        super().__init__(parent)
+        self.invoice_nrs = list(invoice_nrs)
+        self._canceled = False
+
+    def cancel(self):
+        self._canceled = True
+
+    def run(self):
+        from pdf_jobs import render_invoice_pdfs
+        done = failed = 0
+        try:
+            for invoice_nr, _, error in render_invoice_pdfs(self.invoice_nrs, is_canceled=lambda: self._canceled):
+                done += 1
+                if error is not None:
+                    failed += 1
+                    print(f"Fehler beim Erstellen des PDFs für Rechnung {invoice_nr}: {error}")
+                self.progress.emit(done, len(self.invoice_nrs))
+        finally:
+            # Die Verbindung, mit der render_invoice_pdfs die PDF-Hashes gespeichert hat, schließen
+            close_thread_connections()
+        self.batch_finished.emit(done - failed, failed)
+
+
+# Class :QThread: for writing a bulk export in the background
+class BulkExportThread(QThread):
+    """
+    Writes a bulk export (export.export_invoices) without blocking the GUI thread.
+    """
+    progress = pyqtSignal(int, int)  # erledigt, gesamt
+    export_finished = pyqtSignal(object, object)  # Archivpfade (None bei Abbruch), Fehler
+    export_failed = pyqtSignal(str)
+
+    def __init__(self, invoices, target, password, per_customer, parent=None):
+        super().__init__(parent)
+        self.invoices = invoices
+        self.target = target
+        self.password = password
+        self.per_customer = per_customer
+        self._canceled = False
+
+    def cancel(self):
+        self._canceled = True
+
+    def run(self):
+        from export import export_invoices
+        try:
+            paths, errors = export_invoices(self.invoices, self.target, self.password, per_customer=self.per_customer,
+                                            progress=self.progress.emit, is_canceled=lambda: self._canceled)
+        except Exception as e:
+            self.export_failed.emit(str(e))
+            return
+        self.export_finished.emit(paths, errors)
+
+
 # Class :QMainWindow: for the whole UI functionality
 class MainWindow(QMainWindow):
     def __init__(self, user_id=None, username=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.current_user_id = user_id
         self.current_username = username
+        # Rechte des Nutzers werden einmal gelesen und in der Session gehalten
+        self.session = current_session()
+        if self.session is None or self.session.user_id != user_id:
+            self.session = start_session(user_id, username)
         try:
             # load UI file
-            uic.loadUi(UI_PATH, self)
+            load_ui(self, UI_PATH)
         except Exception as e:
             print("UI Loading Error", f"Could not load UI file.\nError: {str(e)}")
             sys.exit(1)
@@ -143,6 +265,29 @@ class MainWindow(QMainWindow):
             "tv_positionen": "view_positions_full",
         }
 
+        # Mapping: changed entities (tables) to the QTableViews showing their rows
+        self.change_mapping = {
+            "INVOICES": ["tv_rechnungen"],
+            "CUSTOMERS": ["tv_kunden", "tv_rechnungen_form_kunde"],
+            "SERVICE_PROVIDER": ["tv_dienstleister", "tv_rechnungen_form_dienstleister"],
+            "POSITIONS": ["tv_positionen", "tv_rechnungen_form_positionen"],
+        }
+        self.change_notifier = ChangeNotifier()
+        for entity, table_view_names in self.change_mapping.items():
+            for table_view_name in table_view_names:
+                self.change_notifier.subscribe(entity, partial(self.refresh_table_rows, table_view_name))
+            # Zwischengespeicherte Suchergebnisse der betroffenen Views verwerfen
+            self.change_notifier.subscribe(entity, partial(note_write, entity))
+        # Dekodierte Logos verwerfen, wenn ein Logo ersetzt wird
+        self.change_notifier.subscribe("LOGOS", invalidate_logos)
+
+        # Suchen laufen im Thread-Pool, Ergebnisse kommen stückweise je QTableView zurück
+        self.search_dispatcher = SearchDispatcher(self)
+        self.search_dispatcher.results_started.connect(self.on_search_results_started)
+        self.search_dispatcher.results_chunk.connect(self.on_search_results_chunk)
+        self.search_dispatcher.search_failed.connect(lambda key, message: show_error(self, "Suchfehler", message))
+        self.search_scheduler = SearchScheduler(self.search_dispatcher, self)
+
         # Mapping: QTableViews to detail QTableViews
         self.detail_mapping = {
             "tv_rechnungen": self.tv_detail_rechnungen,
@@ -156,6 +301,8 @@ class MainWindow(QMainWindow):
             "tab_dienstleister": {"field": "tv_dienstleister_UStIdNr", "table": "SERVICE_PROVIDER", "pk_col": "UST_IDNR", "type": "service_provider"},
             "tab_positionen": {"field": "tv_positionen_PositionsID", "table": "POSITIONS", "pk_col": "POS_ID", "type": "positions"}
         }
+        # Vom Formular vorgeschlagene Nummer je Tab, sie wird erst beim Speichern vergeben
+        self.proposed_pks = {}
 
         # Mapping: Search label
         self.tab_search_label_text = {
@@ -216,30 +363,15 @@ class MainWindow(QMainWindow):
 
         # Initiation of UI and program itself
         self.temp_positionen = []
-        self.init_tables()
         self.w_rechnung_hinzufuegen.setVisible(False)
         self.de_erstellungsdatum.setDate(date.today())
         self.showMaximized()
         self.selected_kunde_id = None
         self.selected_dienstleister_id = None
-        self.init_tv_rechnungen_form_tabellen()
         self.tv_detail_positionen = self.findChild(QTableView, "tv_detail_positionen")
         os.makedirs(CACHE_OUTPUT_PATH, exist_ok=True)
-
-
-        # PDF Dokument & Viewer erstellen
-        self.pdf_document = QPdfDocument(self)
-        self.pdf_view = QPdfView(self)
-        self.pdf_view.setDocument(self.pdf_document)
-        self.pdf_view.setMinimumSize(400, 600)  # Optional: Mindestgröße setzen
-        self.pdf_view.show()  # initial ausblenden
-        self.create_missing_invoice_pdfs()
-
-        # PDF-Viewer rechts im Rechnungen-Tab platzieren
-        rechnungen_tab = self.findChild(QWidget, "tab_rechnungen")
-        main_layout = rechnungen_tab.layout()  # Das ist das QHBoxLayout layoutTabRechnungenMain
-        if main_layout is not None:
-            main_layout.addWidget(self.pdf_view)
+        # Tabellen, PDF-Viewer und fehlende PDFs erst laden, wenn das Fenster angezeigt wird
+        QTimer.singleShot(0, self.finish_startup)
 
         # Connect Signal for Tab Change
         self.tabWidget.currentChanged.connect(self.on_tab_changed)
@@ -282,6 +414,11 @@ class MainWindow(QMainWindow):
         if self.btn_rechnung_exportieren:
             self.btn_rechnung_exportieren.clicked.connect(self.on_rechnung_exportieren_clicked)
 
+        # Connect Signal for Click on 'btn_sammelexport'
+        self.btn_sammelexport = self.findChild(QPushButton, "btn_sammelexport")
+        if self.btn_sammelexport:
+            self.btn_sammelexport.clicked.connect(self.on_sammelexport_clicked)
+
         # Connect Signal for Click on 'btn_drucken'
         self.btn_drucken = self.findChild(QPushButton, "btn_drucken")
         if self.btn_drucken:
@@ -289,8 +426,6 @@ class MainWindow(QMainWindow):
 
         # Connect Signal for Click on 'btn_close_rechnung_hinzufuegen'
         self.btn_close_form = self.findChild(QPushButton, "btn_close_rechnung_hinzufuegen")
-        if self.btn_close_form:
-            self.btn_close_form.clicked.connect(self.pdf_view.show)
 
         # Connect Signal for Click on 'btn_nutzer_verwalten'
         self.btn_nutzer_verwalten = self.findChild(QPushButton, "btn_nutzer_verwalten")
@@ -302,61 +437,77 @@ class MainWindow(QMainWindow):
         if self.btn_info:
             self.btn_info.clicked.connect(self.show_info_dialog)
 
-        # Set DEBOUNCE Timer for every search field
-        self.search_timer = QTimer(self)
-        self.search_timer.setSingleShot(True)
-        self.tb_search_entries.textChanged.connect(self.on_search_text_changed)
-
-        self.search_timer_kunden = QTimer(self)
-        self.search_timer_kunden.setSingleShot(True)
-        self.search_timer_kunden.timeout.connect(self.search_kunden)
-
-        self.search_timer_dienstleister = QTimer(self)
-        self.search_timer_dienstleister.setSingleShot(True)
-        self.search_timer_dienstleister.timeout.connect(self.search_dienstleister)
-
-        self.search_timer_positionen = QTimer(self)
-        self.search_timer_positionen.setSingleShot(True)
-        self.search_timer_positionen.timeout.connect(self.search_positionen)
+        # DEBOUNCE for every search field (the delay adapts to the measured search time)
+        self.search_scheduler.register(self.tb_search_entries, self.search_entries)
 
         # get QLineEdit search fields in Rechnungen Form
         self.le_search_kunden = self.findChild(QLineEdit, "tb_search_kunden")
         self.le_search_dienstleister = self.findChild(QLineEdit, "tb_search_dienstleister")
         self.le_search_positionen = self.findChild(QLineEdit, "tb_search_positionen")
 
-        # Connect Signal for Text Changed on QLineEdit search fields in Rechnungen Form
+        # Register QLineEdit search fields in Rechnungen Form
         if self.le_search_kunden:
-            self.le_search_kunden.textChanged.connect(self.on_search_kunden_text_changed)
+            self.search_scheduler.register(self.le_search_kunden, self.search_kunden)
         if self.le_search_dienstleister:
-            self.le_search_dienstleister.textChanged.connect(self.on_search_dienstleister_text_changed)
+            self.search_scheduler.register(self.le_search_dienstleister, self.search_dienstleister)
         if self.le_search_positionen:
-            self.le_search_positionen.textChanged.connect(self.on_search_positionen_text_changed)
+            self.search_scheduler.register(self.le_search_positionen, self.search_positionen)
 
         self.btn_drucken.setEnabled(False)
         self.btn_nutzer_verwalten.setEnabled(False)
         self.btn_rechnung_exportieren.setEnabled(False)
+        self.btn_sammelexport.setEnabled(False)
         self.tb_search_entries.setEnabled(False)
         self.btn_eintrag_hinzufuegen.setEnabled(False)
         self.btn_eintrag_speichern.setEnabled(False)
         self.btn_eintrag_loeschen.setEnabled(False)
 
         # RECHTEPRÜFUNG
-        if get_max_permission(self.current_user_id) >= 1:
+        if self.session.max_permission() >= 1:
             self.tb_search_entries.setEnabled(True)
             self.btn_rechnung_exportieren.setEnabled(True)
+            self.btn_sammelexport.setEnabled(True)
             self.btn_drucken.setEnabled(True)
 
-        if get_max_permission(self.current_user_id) >= 2:
+        if self.session.max_permission() >= 2:
             self.btn_eintrag_hinzufuegen.setEnabled(True)
             self.btn_eintrag_speichern.setEnabled(True)
 
-        if get_max_permission(self.current_user_id) >= 3:
+        if self.session.max_permission() >= 3:
             self.btn_eintrag_loeschen.setEnabled(True)
 
-        if get_max_permission(self.current_user_id) >= 100:
+        if self.session.max_permission() >= 100:
             self.btn_nutzer_verwalten.setEnabled(True)
 
 
+    # Second part of the initialization, runs in the event loop right after the window is shown
+    def finish_startup(self):
+        self.init_pdf_view()
+        self.init_tables()
+        self.init_tv_rechnungen_form_tabellen()
+        self.create_missing_invoice_pdfs()
+
+    # Creates the PDF viewer on the right of the Rechnungen tab
+    def init_pdf_view(self):
+        from PyQt6.QtPdf import QPdfDocument
+        from PyQt6.QtPdfWidgets import QPdfView
+
+        # PDF Dokument & Viewer erstellen
+        self.pdf_document = QPdfDocument(self)
+        self.pdf_view = QPdfView(self)
+        self.pdf_view.setDocument(self.pdf_document)
+        self.pdf_view.setMinimumSize(400, 600)  # Optional: Mindestgröße setzen
+        self.pdf_view.show()  # initial ausblenden
+
+        # PDF-Viewer rechts im Rechnungen-Tab platzieren
+        rechnungen_tab = self.findChild(QWidget, "tab_rechnungen")
+        main_layout = rechnungen_tab.layout()  # Das ist das QHBoxLayout layoutTabRechnungenMain
+        if main_layout is not None:
+            main_layout.addWidget(self.pdf_view)
+
+        if self.btn_close_form:
+            self.btn_close_form.clicked.connect(self.pdf_view.show)
+
     # Initializes all table views by loading data from corresponding database views
     def init_tables(self):
         # Zuerst alle TableViews leeren
@@ -373,12 +524,13 @@ class MainWindow(QMainWindow):
 
     # Loads data into a QTableView from a database view.
     def load_table(self, table_view: QTableView, db_view: str):
-        if not get_max_permission(self.current_user_id) >= 1:
+        if not self.session.max_permission() >= 1:
             table_view.setModel(QStandardItemModel())
             return
 
         try:
-            data, columns = fetch_all(f"SELECT * FROM {db_view}")
+            # Nur die erste Seite laden, weitere Zeilen holt die View beim Scrollen (fetchMore)
+            model = SqlTableModel(f"SELECT * FROM {db_view}")
         except Exception as e:
             error_message = f"Error while loading {db_view}: {format_exception(e)}"
             print(error_message)
@@ -386,27 +538,14 @@ class MainWindow(QMainWindow):
             return
 
         try:
-            model = QStandardItemModel()
-            model.setHorizontalHeaderLabels(columns)
-            for row in data:
-                items = [QStandardItem(str(cell)) for cell in row]
-                # Erste Spalte rechtsbündig
-                if items:
-                    items[0].setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                for item in items:
-                    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                model.appendRow(items)
-            # Alle Spalten: Breite automatisch an Inhalt und Header anpassen
-            header = table_view.horizontalHeader()
-            for col in range(header.count()):
-                header.setSectionResizeMode(col, QHeaderView.ResizeMode.ResizeToContents)
-            # (Optional: danach Stretch für letzte Spalte, falls du willst:)
-            # header.setStretchLastSection(True)
-
             table_view.setModel(model)
             self.adjust_tableview_columns(table_view)
             table_view.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
-            table_view.setSelectionMode(QTableView.SelectionMode.SingleSelection)
+            # Rechnungen: Mehrfachauswahl für den Sammelexport
+            if table_view.objectName() == "tv_rechnungen":
+                table_view.setSelectionMode(QTableView.SelectionMode.ExtendedSelection)
+            else:
+                table_view.setSelectionMode(QTableView.SelectionMode.SingleSelection)
 
             self.connect_row_selected_signal(table_view, db_view)
         except Exception as e:
@@ -445,6 +584,7 @@ class MainWindow(QMainWindow):
                         pk_column=pk_conf["pk_col"],
                         pk_type=pk_conf["type"]
                     )
+                    self.proposed_pks[current_tab] = str(next_pk)
                     pk_field_widget.setText(str(next_pk))
 
         except Exception as e:
@@ -490,7 +630,7 @@ class MainWindow(QMainWindow):
                 if ceo_widget:
                     ceo_names = []
                     try:
-                        with sqlite3.connect(DB_PATH) as conn:
+                        with get_connection() as conn:
                             cur = conn.cursor()
                             cur.execute("""
                                 SELECT CEO.CEO_NAME
@@ -539,12 +679,7 @@ class MainWindow(QMainWindow):
     def load_service_provider_details(self, service_provider_id: str):
         try:
             data = get_service_provider_ceos(service_provider_id)
-            model = QStandardItemModel()
-            model.setHorizontalHeaderLabels(["ST_NR", "CEO Name"])
-            for row in data:
-                items = [QStandardItem(str(cell)) for cell in row]
-                model.appendRow(items)
-            self.tv_detail_dienstleister.setModel(model)
+            model = SqlTableModel.from_rows(data, ["ST_NR", "CEO Name"])
             self.tv_detail_dienstleister.setModel(model)
             self.adjust_tableview_columns(self.tv_detail_dienstleister)
             self.tv_detail_dienstleister.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
@@ -570,14 +705,7 @@ class MainWindow(QMainWindow):
                 JOIN POSITIONS p ON ref.FK_POSITIONS_POS_ID = p.POS_ID
                 WHERE ref.FK_INVOICES_INVOICE_NR = ?
             """
-            data, columns = fetch_all(query, (invoice_id,))
-            model = QStandardItemModel()
-            model.setHorizontalHeaderLabels(columns)
-            for row in data:
-                items = [QStandardItem(str(cell)) for cell in row]
-                for item in items:
-                    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                model.appendRow(items)
+            model = SqlTableModel(query, (invoice_id,), key_column="PositionsID")
             self.tv_detail_rechnungen.setModel(model)
             self.adjust_tableview_columns(self.tv_detail_rechnungen)
             self.tv_detail_rechnungen.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
@@ -598,14 +726,7 @@ class MainWindow(QMainWindow):
                 JOIN INVOICES i ON ref.FK_INVOICES_INVOICE_NR = i.INVOICE_NR
                 WHERE ref.FK_POSITIONS_POS_ID = ?
             """
-            data, columns = fetch_all(query, (row_id,))
-            model = QStandardItemModel()
-            model.setHorizontalHeaderLabels(columns)
-            for row in data:
-                items = [QStandardItem(str(cell)) for cell in row]
-                for item in items:
-                    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                model.appendRow(items)
+            model = SqlTableModel(query, (row_id,), key_column="Rechnungsnummer")
 
             if self.tv_detail_positionen:
                 self.tv_detail_positionen.setModel(model)
@@ -625,12 +746,14 @@ class MainWindow(QMainWindow):
                 lbl = self.findChild(QLabel, "lbl_search_for")
                 if lbl:
                     lbl.setText(label_value)
+            # Anderer Tab = andere Tabelle, gleicher Suchtext muss erneut gesucht werden
+            self.search_scheduler.invalidate(self.tb_search_entries)
         except Exception as e:
             print(f"Fehler beim Setzen des Suchlabels: {e}")
 
     # Saves and commits the data from form current form into DB
     def on_save_entry(self):
-        if not get_max_permission(self.current_user_id) >= 2:
+        if not self.session.max_permission() >= 2:
             return
 
         current_tab = self.tabWidget.currentWidget().objectName()
@@ -710,7 +833,11 @@ class MainWindow(QMainWindow):
                         return 0.0
                 return 0.0
 
-            with sqlite3.connect(DB_PATH) as conn:
+            # Geänderte Zeilen je Tabelle, danach werden nur diese in den Views aktualisiert
+            changes = {}
+            # Beim Speichern vergebene Nummer (None, wenn sie manuell eingetragen wurde)
+            saved_pk = None
+            with get_connection() as conn:
                 cur = conn.cursor()
 
                 if current_tab == "tab_rechnungen":
@@ -726,6 +853,7 @@ class MainWindow(QMainWindow):
                         show_error(self, "Kein Dienstleister ausgewählt", "Bitte wähle einen Dienstleister aus!")
                         return
                     main_data["FK_UST_IDNR"] = dl_index.sibling(dl_index.row(), 0).data()
+                    saved_pk = self.reserve_proposed_pk(conn, current_tab, main_data)
                     # Rechnung speichern
                     cur.execute(
                         "INSERT INTO INVOICES (INVOICE_NR, CREATION_DATE, FK_CUSTID, FK_UST_IDNR, LABOR_COST, VAT_RATE_LABOR, VAT_RATE_POSITIONS) VALUES (?, ?, ?, ?, ?, ?, ?)",
@@ -740,6 +868,8 @@ class MainWindow(QMainWindow):
                         )
                     )
 
+                    changes["INVOICES"] = [main_data.get("tb_rechnungsnummer", "")]
+                    changes["POSITIONS"] = []
                     selected_indexes = self.tv_rechnungen_form_positionen.selectionModel().selectedRows()
                     for idx in selected_indexes:
                         pos_id = idx.sibling(idx.row(), 0).data()
@@ -766,6 +896,7 @@ class MainWindow(QMainWindow):
                                 )
                             )
                             new_pos_id = cur.lastrowid
+                            changes["POSITIONS"].append(new_pos_id)
                             # Verknüpfung mit Rechnung speichern
                             cur.execute(
                                 "INSERT INTO REF_INVOICES_POSITIONS (FK_POSITIONS_POS_ID, FK_INVOICES_INVOICE_NR) VALUES (?, ?)",
@@ -785,10 +916,10 @@ class MainWindow(QMainWindow):
                     # Commit
                     conn.commit()
                     self.temp_positionen = []
-                    self.load_all_and_temp_positions_for_rechnungsformular()
                     self.create_and_show_invoice_pdf(main_data.get("tb_rechnungsnummer", ""))
 
                 elif current_tab == "tab_kunden":
+                    saved_pk = self.reserve_proposed_pk(conn, current_tab, main_data)
                     address_id = None
                     if "address" in rel_data:
                         addr = rel_data["address"]
@@ -816,8 +947,10 @@ class MainWindow(QMainWindow):
                             address_id
                         )
                     )
+                    changes["CUSTOMERS"] = [main_data.get("tv_kunden_Kundennummer", "")]
 
                 elif current_tab == "tab_dienstleister":
+                    saved_pk = self.reserve_proposed_pk(conn, current_tab, main_data)
                     address_data = rel_data.get("addresses", {})
                     cur.execute(
                         "INSERT INTO ADDRESSES (STREET, NUMBER, CITY, ZIP, COUNTRY, CREATION_DATE) VALUES (?, ?, ?, ?, ?, ?)",
@@ -832,21 +965,12 @@ class MainWindow(QMainWindow):
                     )
                     address_id = cur.lastrowid
                     logo_id = None
-                    if (getattr(self, "file_name", None) and getattr(self, "logo_data", None) and len(
-                            self.logo_data) > 0):
-                        logo_file_name = self.file_name
-                        logo_data = self.logo_data
-                        file_type = getattr(self, "mime_type", "") or ""
-                        cur.execute(
-                            "INSERT INTO LOGOS (FILE_NAME, LOGO_BINARY, MIME_TYPE, CREATION_DATE) VALUES (?, ?, ?, ?)",
-                            (
-                                logo_file_name,
-                                logo_data,
-                                file_type,
-                                date.today().strftime("%d.%m.%Y"),
-                            )
-                        )
-                        logo_id = cur.lastrowid
+                    if getattr(self, "file_name", None) and getattr(self, "logo", None) is not None:
+                        # Ein bereits gespeichertes identisches Logo wird wiederverwendet
+                        logo_id, inserted = store_logo(cur.connection, self.logo, self.file_name,
+                                                       date.today().strftime("%d.%m.%Y"))
+                        if inserted:
+                            changes["LOGOS"] = [logo_id]
                     cur.execute(
                         "INSERT INTO SERVICE_PROVIDER (UST_IDNR, MOBILTELNR, PROVIDER_NAME, FAXNR, WEBSITE, EMAIL, TELNR, CREATION_DATE, FK_ADDRESS_ID, FK_LOGO_ID) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
                         (
@@ -862,11 +986,13 @@ class MainWindow(QMainWindow):
                             logo_id
                         )
                     )
+                    changes["SERVICE_PROVIDER"] = [main_data.get("tv_dienstleister_UStIdNr", "")]
                     bank_data = rel_data.get("accounts", {})
                     bic = bank_data.get("tv_dienstleister_BIC", "")
                     bank_name = bank_data.get("tv_dienstleister_Kreditinstitut", "")
                     iban = bank_data.get("tv_dienstleister_IBAN", "")
-                    if bic and bank_name:
+                    # ACCOUNT.FK_BANK_ID verweist auf BANK: unbekannte BICs auch ohne Namen des Kreditinstituts anlegen
+                    if bic:
                         cur.execute("SELECT COUNT(*) FROM BANK WHERE BIC=?", (bic,))
                         if cur.fetchone()[0] == 0:
                             cur.execute("INSERT INTO BANK (BIC, BANK_NAME) VALUES (?, ?)", (bic, bank_name))
@@ -968,20 +1094,35 @@ class MainWindow(QMainWindow):
                             date.today().strftime("%d.%m.%Y")
                         )
                     )
-                    pos_id = cur.lastrowid
+                    changes["POSITIONS"] = [cur.lastrowid]
 
                 conn.commit()
-                self.refresh_tab_table_views()
-
-                self.load_all_and_temp_positions_for_rechnungsformular()
-            show_info(self, "Erfolg", "Eintrag erfolgreich gespeichert.")
+            # Nur die gespeicherten Zeilen in den betroffenen Views nachladen
+            self.change_notifier.notify_all(changes)
+            if saved_pk is None:
+                show_info(self, "Erfolg", "Eintrag erfolgreich gespeichert.")
+            elif saved_pk != self.proposed_pks.get(current_tab):
+                show_info(self, "Erfolg", f"Eintrag erfolgreich unter der Nummer {saved_pk} gespeichert.\n"
+                                          f"Die vorgeschlagene Nummer {self.proposed_pks.get(current_tab)} "
+                                          f"wurde inzwischen vergeben.")
+            else:
+                show_info(self, "Erfolg", f"Eintrag {saved_pk} erfolgreich gespeichert.")
             self.clear_and_enable_form_fields()
-            self.init_tables()
         except Exception as e:
             import traceback
             print(traceback.format_exc())
             show_error(self, "Speicherfehler", str(e))
 
+    # Replaces the number proposed by the form with one reserved in the save transaction and returns it
+    # (shown in the success message); a manually entered number is kept and None is returned
+    def reserve_proposed_pk(self, conn, current_tab, main_data):
+        pk_conf = self.pk_field_config.get(current_tab)
+        if not pk_conf or main_data.get(pk_conf["field"]) != self.proposed_pks.get(current_tab):
+            return None
+        number = reserve_primary_key(conn, pk_conf["table"], pk_conf["pk_col"], pk_conf["type"])
+        main_data[pk_conf["field"]] = number
+        return number
+
     # Validates collected data before commiting into DB
     def validate_and_collect_fields(self, field_names, current_tab):
         errors = []
@@ -1117,14 +1258,9 @@ class MainWindow(QMainWindow):
         self.tv_rechnungen_form_kunde = self.findChild(QTableView, "tv_rechnungen_form_kunde")
         if self.tv_rechnungen_form_kunde:
             try:
-                data, _ = fetch_all("SELECT CUSTID, FIRST_NAME || ' ' || LAST_NAME AS NAME FROM CUSTOMERS")
-                model = QStandardItemModel()
-                model.setHorizontalHeaderLabels(["Kundennummer", "Name"])
-                for row in data:
-                    items = [QStandardItem(str(cell)) for cell in row]
-                    for item in items:
-                        item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                    model.appendRow(items)
+                model = SqlTableModel(
+                    "SELECT CUSTID AS Kundennummer, FIRST_NAME || ' ' || LAST_NAME AS Name FROM CUSTOMERS"
+                )
                 self.tv_rechnungen_form_kunde.setModel(model)
                 self.adjust_tableview_columns(self.tv_rechnungen_form_kunde)
                 self.tv_rechnungen_form_kunde.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
@@ -1136,14 +1272,9 @@ class MainWindow(QMainWindow):
         self.tv_rechnungen_form_dienstleister = self.findChild(QTableView, "tv_rechnungen_form_dienstleister")
         if self.tv_rechnungen_form_dienstleister:
             try:
-                data, _ = fetch_all("SELECT UST_IDNR, PROVIDER_NAME FROM SERVICE_PROVIDER")
-                model = QStandardItemModel()
-                model.setHorizontalHeaderLabels(["UStIdNr", "Unternehmensname"])
-                for row in data:
-                    items = [QStandardItem(str(cell)) for cell in row]
-                    for item in items:
-                        item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                    model.appendRow(items)
+                model = SqlTableModel(
+                    "SELECT UST_IDNR AS UStIdNr, PROVIDER_NAME AS Unternehmensname FROM SERVICE_PROVIDER"
+                )
                 self.tv_rechnungen_form_dienstleister.setModel(model)
                 self.adjust_tableview_columns(self.tv_rechnungen_form_dienstleister)
                 self.tv_rechnungen_form_dienstleister.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
@@ -1164,9 +1295,7 @@ class MainWindow(QMainWindow):
         index = selected.indexes()[0]
         model = self.tv_rechnungen_form_kunde.model()
         if model:
-            self.selected_kunde_id = model.item(index.row(), 0).text()
-
-    import sqlite3
+            self.selected_kunde_id = model.index(index.row(), 0).data()
 
     def on_dienstleister_selected(self, selected, deselected):
         if not selected.indexes():
@@ -1184,12 +1313,12 @@ class MainWindow(QMainWindow):
             self.tv_dienstleister_CEOS.setDisabled(False)
             return
 
-        self.selected_dienstleister_id = model.item(index.row(), 0).text()
+        self.selected_dienstleister_id = model.index(index.row(), 0).data()
 
         # Geschäftsführer aus der DB laden
         ceo_names = []
         try:
-            with sqlite3.connect(DB_PATH) as conn:
+            with get_connection() as conn:
                 cur = conn.cursor()
                 cur.execute("""
                     SELECT CEO.CEO_NAME
@@ -1206,19 +1335,12 @@ class MainWindow(QMainWindow):
         self.tv_dienstleister_CEOS.setDisabled(True)
 
     def update_positionen_tableview(self):
-        model = QStandardItemModel()
-        model.setHorizontalHeaderLabels(["PositionsID", "Bezeichnung", "Beschreibung", "Einzelpreis", "Flaeche"])
-        for pos in self.temp_positionen:
-            items = [
-                QStandardItem(str(pos.get("POS_ID", ""))),
-                QStandardItem(str(pos.get("NAME", ""))),
-                QStandardItem(str(pos.get("DESCRIPTION", ""))),
-                QStandardItem(str(pos.get("UNIT_PRICE", ""))),
-                QStandardItem(str(pos.get("AREA", ""))),
-            ]
-            for item in items:
-                item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-            model.appendRow(items)
+        rows = [
+            (pos.get("POS_ID", ""), pos.get("NAME", ""), pos.get("DESCRIPTION", ""),
+             pos.get("UNIT_PRICE", ""), pos.get("AREA", ""))
+            for pos in self.temp_positionen
+        ]
+        model = SqlTableModel.from_rows(rows, ["PositionsID", "Bezeichnung", "Beschreibung", "Einzelpreis", "Flaeche"])
         self.tv_rechnungen_form_positionen.setModel(model)
         self.adjust_tableview_columns(self.tv_rechnungen_form_positionen)
         self.tv_rechnungen_form_positionen.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
@@ -1252,15 +1374,15 @@ class MainWindow(QMainWindow):
 
     def on_entry_delete(self):
         """
-        Löscht je nach Tab:
-        - Rechnungen: Warnung, m:n-Relationen und Rechnung selbst.
-        - Dienstleister: Warnung mit Zählung, löscht zugehörige Rechnungen inkl. m:n-Relationen, Dienstleister, Adresse, ACCOUNTS, REF_LABOR_COST. BANK und CEO bleiben.
-        - Kunden: Warnung mit Zählung, löscht zugehörige Rechnungen inkl. m:n-Relationen, Kunde, Adresse.
-        - Positionen: Warnung mit Zählung, löscht zugehörige Rechnungen inkl. m:n-Relationen, Position.
+        Löscht je nach Tab (abhängige Zeilen entfernen die ON DELETE-Regeln aus schema.py):
+        - Rechnungen: Warnung, Rechnung samt m:n-Relationen.
+        - Dienstleister: Warnung mit Zählung, Dienstleister samt Rechnungen, ACCOUNTS, REF_LABOR_COST und Adresse. BANK und CEO bleiben.
+        - Kunden: Warnung mit Zählung, Kunde samt Rechnungen und Adresse.
+        - Positionen: nur wenn sie in keiner Rechnung verwendet wird.
         """
         current_tab = self.tabWidget.currentWidget().objectName()
         try:
-            with sqlite3.connect(DB_PATH) as conn:
+            with get_connection() as conn:
                 cur = conn.cursor()
 
                 if current_tab == "tab_rechnungen":
@@ -1278,11 +1400,10 @@ class MainWindow(QMainWindow):
                     if reply != QMessageBox.StandardButton.Yes:
                         return
 
-                    cur.execute("DELETE FROM REF_INVOICES_POSITIONS WHERE FK_INVOICES_INVOICE_NR=?", (invoice_id,))
                     cur.execute("DELETE FROM INVOICES WHERE INVOICE_NR=?", (invoice_id,))
                     conn.commit()
                     show_info(self, "Erfolg", f"Rechnung {invoice_id} wurde gelöscht.")
-                    self.refresh_tab_table_views()
+                    self.change_notifier.notify("INVOICES", [invoice_id])
                     return
 
                 elif current_tab == "tab_dienstleister":
@@ -1291,9 +1412,10 @@ class MainWindow(QMainWindow):
                         show_error(self, "Nichts ausgewählt!", "Bitte wählen Sie einen Dienstleister aus!")
                         return
                     ust_idnr = idx.sibling(idx.row(), 0).data()
-                    # Rechnungen zählen
-                    cur.execute("SELECT COUNT(*) FROM INVOICES WHERE FK_UST_IDNR=?", (ust_idnr,))
-                    rechnungs_anzahl = cur.fetchone()[0]
+                    # Betroffene Rechnungen (für Warnung und Aktualisierung der Rechnungsliste)
+                    cur.execute("SELECT INVOICE_NR FROM INVOICES WHERE FK_UST_IDNR=?", (ust_idnr,))
+                    invoice_nrs = [row[0] for row in cur.fetchall()]
+                    rechnungs_anzahl = len(invoice_nrs)
                     msg = f"Möchten Sie den Dienstleister {ust_idnr} wirklich löschen?\n\n"
                     if rechnungs_anzahl > 0:
                         msg += f"Achtung: Es werden dabei {rechnungs_anzahl} zugehörige Rechnung(en) gelöscht!"
@@ -1308,28 +1430,17 @@ class MainWindow(QMainWindow):
                     if reply != QMessageBox.StandardButton.Yes:
                         return
 
-                    # Rechnungen löschen
-                    cur.execute("SELECT INVOICE_NR FROM INVOICES WHERE FK_UST_IDNR=?", (ust_idnr,))
-                    invoice_nrs = [row[0] for row in cur.fetchall()]
-                    for invoice_id in invoice_nrs:
-                        cur.execute("DELETE FROM REF_INVOICES_POSITIONS WHERE FK_INVOICES_INVOICE_NR=?", (invoice_id,))
-                        cur.execute("DELETE FROM INVOICES WHERE INVOICE_NR=?", (invoice_id,))
-
-                    # Accounts löschen
-                    cur.execute("DELETE FROM ACCOUNT WHERE FK_UST_IDNR=?", (ust_idnr,))
-                    # REF_LABOR_COST löschen
-                    cur.execute("DELETE FROM REF_LABOR_COST WHERE FK_UST_IDNR=?", (ust_idnr,))
-                    # Adresse zu Dienstleister löschen (erst ID holen)
+                    # Adresse des Dienstleisters merken, sie hängt nicht per Fremdschlüssel am Dienstleister
                     cur.execute("SELECT FK_ADDRESS_ID FROM SERVICE_PROVIDER WHERE UST_IDNR=?", (ust_idnr,))
                     adr_row = cur.fetchone()
-                    if adr_row and adr_row[0]:
-                        cur.execute("DELETE FROM ADDRESSES WHERE ID=?", (adr_row[0],))
-                    # Dienstleister selbst löschen
+                    # Rechnungen (inkl. m:n-Relationen), ACCOUNT und REF_LABOR_COST löschen die Kaskaden mit
                     cur.execute("DELETE FROM SERVICE_PROVIDER WHERE UST_IDNR=?", (ust_idnr,))
+                    if adr_row and adr_row[0]:
+                        self.delete_unused_address(cur, adr_row[0])
                     conn.commit()
                     show_info(self, "Erfolg",
                               f"Dienstleister {ust_idnr} wurde gelöscht.")
-                    self.refresh_tab_table_views()
+                    self.change_notifier.notify_all({"SERVICE_PROVIDER": [ust_idnr], "INVOICES": invoice_nrs})
                     return
 
                 elif current_tab == "tab_kunden":
@@ -1338,8 +1449,9 @@ class MainWindow(QMainWindow):
                         show_error(self, "Nichts ausgewählt!", "Bitte wählen Sie einen Kunden aus!")
                         return
                     custid = idx.sibling(idx.row(), 0).data()
-                    cur.execute("SELECT COUNT(*) FROM INVOICES WHERE FK_CUSTID=?", (custid,))
-                    rechnungs_anzahl = cur.fetchone()[0]
+                    cur.execute("SELECT INVOICE_NR FROM INVOICES WHERE FK_CUSTID=?", (custid,))
+                    invoice_nrs = [row[0] for row in cur.fetchall()]
+                    rechnungs_anzahl = len(invoice_nrs)
                     msg = f"Möchten Sie den Kunden {custid} wirklich löschen?\n\n"
                     if rechnungs_anzahl > 0:
                         msg += f"Achtung: Es werden dabei {rechnungs_anzahl} zugehörige Rechnung(en) gelöscht!"
@@ -1354,20 +1466,15 @@ class MainWindow(QMainWindow):
                     if reply != QMessageBox.StandardButton.Yes:
                         return
 
-                    cur.execute("SELECT INVOICE_NR FROM INVOICES WHERE FK_CUSTID=?", (custid,))
-                    invoice_nrs = [row[0] for row in cur.fetchall()]
-                    for invoice_id in invoice_nrs:
-                        cur.execute("DELETE FROM REF_INVOICES_POSITIONS WHERE FK_INVOICES_INVOICE_NR=?", (invoice_id,))
-                        cur.execute("DELETE FROM INVOICES WHERE INVOICE_NR=?", (invoice_id,))
-                    # Adresse zu Kunde löschen
                     cur.execute("SELECT FK_ADDRESS_ID FROM CUSTOMERS WHERE CUSTID=?", (custid,))
                     address_row = cur.fetchone()
-                    if address_row and address_row[0]:
-                        cur.execute("DELETE FROM ADDRESSES WHERE ID=?", (address_row[0],))
+                    # Rechnungen inkl. m:n-Relationen löscht die Kaskade mit
                     cur.execute("DELETE FROM CUSTOMERS WHERE CUSTID=?", (custid,))
+                    if address_row and address_row[0]:
+                        self.delete_unused_address(cur, address_row[0])
                     conn.commit()
                     show_info(self, "Erfolg", f"Kunde {custid} wurde gelöscht.")
-                    self.refresh_tab_table_views()
+                    self.change_notifier.notify_all({"CUSTOMERS": [custid], "INVOICES": invoice_nrs})
                     return
 
                 elif current_tab == "tab_positionen":
@@ -1378,55 +1485,55 @@ class MainWindow(QMainWindow):
                     pos_id = idx.sibling(idx.row(), 0).data()
                     cur.execute("SELECT COUNT(*) FROM REF_INVOICES_POSITIONS WHERE FK_POSITIONS_POS_ID=?", (pos_id,))
                     rechnungs_anzahl = cur.fetchone()[0]
-                    msg = f"Möchtest du die Position {pos_id} wirklich löschen?\n\n"
+                    # Rechnungen dürfen nicht nachträglich ihre Positionen verlieren (ON DELETE RESTRICT)
                     if rechnungs_anzahl > 0:
-                        msg += f"Achtung: Es werden dabei {rechnungs_anzahl} zugehörige Rechnung(en) gelöscht!"
-                    else:
-                        msg += "Es sind keine Rechnungen mit dieser Position verknüpft."
+                        show_error(self, "Position wird verwendet",
+                                   f"Die Position {pos_id} wird in {rechnungs_anzahl} Rechnung(en) verwendet "
+                                   "und kann nicht gelöscht werden.")
+                        return
                     reply = QMessageBox.question(
                         self,
                         "Position löschen",
-                        msg,
+                        f"Möchtest du die Position {pos_id} wirklich löschen?",
                         QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
                     )
                     if reply != QMessageBox.StandardButton.Yes:
                         return
-                    # Alle zugehörigen Rechnungen löschen
-                    cur.execute("""
-                        SELECT i.INVOICE_NR
-                        FROM REF_INVOICES_POSITIONS ref
-                        JOIN INVOICES i ON ref.FK_INVOICES_INVOICE_NR = i.INVOICE_NR
-                        WHERE ref.FK_POSITIONS_POS_ID = ?
-                    """, (pos_id,))
-                    invoice_nrs = [row[0] for row in cur.fetchall()]
-                    for invoice_id in invoice_nrs:
-                        cur.execute("DELETE FROM REF_INVOICES_POSITIONS WHERE FK_INVOICES_INVOICE_NR=?", (invoice_id,))
-                        cur.execute("DELETE FROM INVOICES WHERE INVOICE_NR=?", (invoice_id,))
-                    # Position selbst löschen
                     cur.execute("DELETE FROM POSITIONS WHERE POS_ID=?", (pos_id,))
                     conn.commit()
                     show_info(self, "Erfolg", f"Position {pos_id} wurde gelöscht.")
-                    self.refresh_tab_table_views()
+                    self.change_notifier.notify("POSITIONS", [pos_id])
                     return
 
         except Exception as e:
             show_error(self, "Löschfehler", str(e))
 
-    def refresh_tab_table_views(self):
+    # Deletes an address unless another customer or service provider still refers to it (foreign keys are enforced)
+    def delete_unused_address(self, cur, address_id):
+        cur.execute(
+            "DELETE FROM ADDRESSES WHERE ID=? "
+            "AND NOT EXISTS (SELECT 1 FROM CUSTOMERS WHERE FK_ADDRESS_ID=?) "
+            "AND NOT EXISTS (SELECT 1 FROM SERVICE_PROVIDER WHERE FK_ADDRESS_ID=?)",
+            (address_id, address_id, address_id)
+        )
+
+    def refresh_table_rows(self, table_view_name, keys):
         """
-        Aktualisiert alle QTableViews im gesamten Programm,
-        unabhängig von Sichtbarkeit oder Einbettung.
+        Subscriber of the change notifier: updates only the rows with the given keys
+        in the model of a QTableView. Views without refreshable model are reloaded.
         """
-        # Optional: Auch die Rechnungsform-Tabellen aktualisieren
-        self.init_tv_rechnungen_form_tabellen()
-
-        # Sammle alle QTableViews im Fenster
-        all_table_views = self.findChildren(QTableView)
-        for table_view in all_table_views:
-            obj_name = table_view.objectName()
-            db_view = self.table_mapping.get(obj_name)
-            if db_view:
-                self.load_table(table_view, db_view)
+        table_view = self.findChild(QTableView, table_view_name)
+        model = table_view.model() if table_view else None
+        if not isinstance(model, SqlTableModel):
+            return
+        try:
+            if model.refresh_rows(keys):
+                return
+        except Exception as e:
+            print(f"Fehler beim Aktualisieren von {table_view_name}: {format_exception(e)}")
+        db_view = self.table_mapping.get(table_view_name)
+        if db_view:
+            self.load_table(table_view, db_view)
 
     def load_all_and_temp_positions_for_rechnungsformular(self):
         """
@@ -1439,34 +1546,27 @@ class MainWindow(QMainWindow):
             search_text = le_search_positionen.text().strip() if le_search_positionen else ""
 
             if search_text:
-                # Nur DB durchsuchen, temp-array ignorieren
-                _, columns = fetch_all(f"SELECT * FROM view_positions_full LIMIT 1")
-                like_clauses = [f'"{col}" LIKE ?' for col in columns]
-                sql = f'SELECT * FROM view_positions_full WHERE ' + " OR ".join(like_clauses)
-                params = [f'%{search_text}%'] * len(columns)
-                data, _ = fetch_all(sql, tuple(params))
-                all_rows = list(data)
-            else:
-                # temp-array oben, dann alle DB-Positionen
-                data, columns = fetch_all("SELECT POS_ID, NAME, DESCRIPTION, UNIT_PRICE, AREA FROM POSITIONS")
-                temp_rows = []
-                for idx, pos in enumerate(self.temp_positionen):
-                    temp_rows.append([
-                        f"NEU-{idx + 1}",
-                        pos.get("NAME", ""),
-                        pos.get("DESCRIPTION", ""),
-                        pos.get("UNIT_PRICE", ""),
-                        pos.get("AREA", ""),
-                    ])
-                all_rows = temp_rows + list(data)
-
-            model = QStandardItemModel()
-            model.setHorizontalHeaderLabels(["PositionsID", "Bezeichnung", "Beschreibung", "Einzelpreis", "Flaeche"])
-            for row in all_rows:
-                items = [QStandardItem(str(cell)) for cell in row]
-                for item in items:
-                    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                model.appendRow(items)
+                # Nur DB durchsuchen (Volltextindex, im Hintergrund), temp-array ignorieren
+                self.search_dispatcher.submit("tv_rechnungen_form_positionen", "view_positions_full", search_text,
+                                              source="tb_search_positionen")
+                return
+
+            # temp-array oben, dann alle DB-Positionen (seitenweise)
+            self.search_dispatcher.cancel("tv_rechnungen_form_positionen")
+            temp_rows = []
+            for idx, pos in enumerate(self.temp_positionen):
+                temp_rows.append([
+                    f"NEU-{idx + 1}",
+                    pos.get("NAME", ""),
+                    pos.get("DESCRIPTION", ""),
+                    pos.get("UNIT_PRICE", ""),
+                    pos.get("AREA", ""),
+                ])
+            model = SqlTableModel(
+                "SELECT POS_ID AS PositionsID, NAME AS Bezeichnung, DESCRIPTION AS Beschreibung, "
+                "UNIT_PRICE AS Einzelpreis, AREA AS Flaeche FROM POSITIONS",
+                prefix_rows=temp_rows
+            )
             self.tv_rechnungen_form_positionen.setModel(model)
             self.adjust_tableview_columns(self.tv_rechnungen_form_positionen)
             self.tv_rechnungen_form_positionen.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
@@ -1491,6 +1591,7 @@ class MainWindow(QMainWindow):
             if table_view_name and db_view_name:
                 table_view = self.findChild(QTableView, table_view_name)
                 if table_view:
+                    self.search_dispatcher.cancel(table_view_name)
                     self.load_table(table_view, db_view_name)
             return
 
@@ -1510,57 +1611,49 @@ class MainWindow(QMainWindow):
         if not db_view_name:
             return
 
-        try:
-            # Spaltennamen holen
-            _, columns = fetch_all(f"SELECT * FROM {db_view_name} LIMIT 1")
-            # Baue WHERE: für jedes Suchwort muss es in mindestens einer Spalte vorkommen
-            like_clauses = []
-            params = []
-            for term in search_terms:
-                or_parts = [f'"{col}" LIKE ?' for col in columns]
-                like_clauses.append('(' + ' OR '.join(or_parts) + ')')
-                params.extend([f'%{term}%'] * len(columns))
-            # Alle Begriffe müssen irgendwo passen: UND-Verknüpfung
-            where_clause = ' AND '.join(like_clauses)
-            sql = f'SELECT * FROM {db_view_name} WHERE {where_clause}'
-            data, _ = fetch_all(sql, tuple(params))
-
-            # Anzeige aktualisieren
-            table_view = self.findChild(QTableView, table_view_name)
-            if table_view:
-                model = QStandardItemModel()
-                model.setHorizontalHeaderLabels(columns)
-                for row in data:
-                    items = [QStandardItem(str(cell)) for cell in row]
-                    for item in items:
-                        item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                    model.appendRow(items)
-                table_view.setModel(model)
-                self.connect_row_selected_signal(table_view, db_view_name)
-                table_view.resizeColumnsToContents()
-                table_view.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
-                table_view.setSelectionMode(QTableView.SelectionMode.SingleSelection)
-        except Exception as e:
-            show_error(self, "Suchfehler", str(e))
+        # Volltextsuche: jeder Begriff muss als Wortanfang vorkommen (UND), beste Treffer zuerst
+        self.search_dispatcher.submit(table_view_name, db_view_name, " ".join(search_terms),
+                                      source="tb_search_entries")
+
+    def on_search_results_started(self, table_view_name, db_view_name, columns, rows):
+        """
+        Shows the first rows of a finished search in its QTableView (further rows follow in chunks).
+        """
+        table_view = self.findChild(QTableView, table_view_name)
+        if not table_view:
+            return
+        model = SqlTableModel.from_rows(rows, columns, source=f"SELECT * FROM {db_view_name}")
+        table_view.setModel(model)
+        self.connect_row_selected_signal(table_view, db_view_name)
+        table_view.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        if table_view_name == "tv_rechnungen":
+            table_view.setSelectionMode(QTableView.SelectionMode.ExtendedSelection)
+        elif table_view_name == "tv_rechnungen_form_positionen":
+            table_view.setSelectionMode(QAbstractItemView.SelectionMode.MultiSelection)
+        else:
+            table_view.setSelectionMode(QTableView.SelectionMode.SingleSelection)
+        if table_view_name == "tv_rechnungen_form_positionen":
+            self.adjust_tableview_columns(table_view)
+        else:
+            table_view.resizeColumnsToContents()
 
-    # debouncing funktion verhindert performance crashes/probleme
-    def on_search_text_changed(self, text):
-        self.search_timer.stop()
-        self.search_timer.timeout.connect(self.search_entries)
-        self.search_timer.start(DEBOUNCE_TIME)  # DEBOUNCE_TIME warten
+    def on_search_results_chunk(self, table_view_name, rows):
+        table_view = self.findChild(QTableView, table_view_name)
+        model = table_view.model() if table_view else None
+        if isinstance(model, SqlTableModel):
+            model.append_rows(rows)
 
     def update_export_button_state(self, index):
         current_tab = self.tabWidget.widget(index)
-        if not get_max_permission(self.current_user_id) >= 1:
+        if not self.session.max_permission() >= 1:
             return
         if not self.btn_rechnung_exportieren or not self.btn_drucken:
             return
-        if current_tab and current_tab.objectName() == "tab_rechnungen":
-            self.btn_rechnung_exportieren.setEnabled(True)
-            self.btn_drucken.setEnabled(True)
-        else:
-            self.btn_rechnung_exportieren.setEnabled(False)
-            self.btn_drucken.setEnabled(False)
+        is_invoice_tab = bool(current_tab and current_tab.objectName() == "tab_rechnungen")
+        self.btn_rechnung_exportieren.setEnabled(is_invoice_tab)
+        self.btn_drucken.setEnabled(is_invoice_tab)
+        if self.btn_sammelexport:
+            self.btn_sammelexport.setEnabled(is_invoice_tab)
 
     def on_rechnung_exportieren_clicked(self):
         idx = self.tv_rechnungen.currentIndex()
@@ -1570,8 +1663,6 @@ class MainWindow(QMainWindow):
         invoice_nr = idx.sibling(idx.row(), 0).data()
 
         try:
-            export_data = self.get_export_data(invoice_nr)
-
             zip_output_path, _ = QFileDialog.getSaveFileName(
                 self,
                 "ZIP-Datei speichern unter",
@@ -1581,62 +1672,15 @@ class MainWindow(QMainWindow):
             if not zip_output_path:
                 return
 
-            output_dir = os.path.dirname(zip_output_path)
-            xml_path = os.path.join(output_dir, "rechnung.xml")
-            pdf_path = os.path.join(output_dir, "rechnung.pdf")
-
-            xml_string = self.build_invoice_xml(export_data)
-
-            # Logo aus DB laden (optional)
-            fk_logo_id = next(
-                (entry["service_provider"]["FK_LOGO_ID"] for entry in export_data if "service_provider" in entry),
-                None
-            )
-            logo_bytes = None
-            with sqlite3.connect(DB_PATH) as conn:
-                if fk_logo_id:
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT LOGO_BINARY FROM LOGOS WHERE ID = ?", (fk_logo_id,))
-                    result = cursor.fetchone()
-                    if result and result[0] is not None:
-                        logo_bytes = result[0]
-
-            # XML schreiben
-            with open(xml_path, "w", encoding="utf-8") as f:
-                f.write(xml_string)
-
-            # PDF erzeugen
-            builder = InvoicePDFBuilder(xml_string, logo_bytes)
-            builder.build(pdf_path)
-
-            # Passwort-Dialog
+            # Passwort-Dialog (vor dem Rendern, damit bei Abbruch nichts erzeugt wird)
             dialog = PasswordDialog(min_length=4)
             if not dialog.exec():
-                # Abbruch durch Nutzer
-                # Temporäre Dateien gleich wieder löschen
-                for tmpf in (xml_path, pdf_path):
-                    if os.path.exists(tmpf):
-                        os.remove(tmpf)
                 return
             passwort = dialog.get_password()
 
-            import pyzipper
-            with pyzipper.AESZipFile(zip_output_path,
-                                     'w',
-                                     compression=pyzipper.ZIP_LZMA,
-                                     encryption=pyzipper.WZ_AES) as zip_file:
-                zip_file.setpassword(passwort.encode("utf-8"))
-                files_to_add = [
-                    ("rechnung.xml", xml_path),
-                    ("rechnung.pdf", pdf_path)
-                ]
-                for arcname, filepath in files_to_add:
-                    zip_file.write(filepath, arcname=arcname)
-
-            # Temporäre Dateien löschen
-            for tmpf in (xml_path, pdf_path):
-                if os.path.exists(tmpf):
-                    os.remove(tmpf)
+            # XML und PDF entstehen im Speicher und werden direkt ins verschlüsselte ZIP geschrieben
+            from export import export_invoice
+            export_invoice(invoice_nr, zip_output_path, passwort)
 
             # Explorer-Öffnung anbieten
             msg_box = QMessageBox(self)
@@ -1664,9 +1708,65 @@ class MainWindow(QMainWindow):
         except Exception as e:
             show_error(self, "Export-Fehler", str(e))
 
-    def on_search_kunden_text_changed(self, text):
-        self.search_timer_kunden.stop()
-        self.search_timer_kunden.start(DEBOUNCE_TIME)
+    def on_sammelexport_clicked(self):
+        selected_nrs = [idx.data() for idx in self.tv_rechnungen.selectionModel().selectedRows(0)] \
+            if self.tv_rechnungen.selectionModel() else []
+        dialog = BulkExportDialog(len(selected_nrs), self)
+        if not dialog.exec():
+            return
+        try:
+            from export import find_invoices
+            invoices = find_invoices(**dialog.get_filter(selected_nrs))
+        except Exception as e:
+            show_error(self, "Export-Fehler", str(e))
+            return
+        if not invoices:
+            show_info(self, "Sammelexport", "Keine passenden Rechnungen gefunden.")
+            return
+
+        per_customer = dialog.per_customer()
+        if per_customer:
+            target = QFileDialog.getExistingDirectory(self, "Zielordner für die ZIP-Dateien wählen")
+        else:
+            target, _ = QFileDialog.getSaveFileName(
+                self,
+                "ZIP-Datei speichern unter",
+                filter="ZIP-Dateien (*.zip);;Alle Dateien (*)",
+                directory="rechnungen.zip"
+            )
+        if not target:
+            return
+
+        password_dialog = PasswordDialog(min_length=4)
+        if not password_dialog.exec():
+            return
+
+        self.bulk_export_progress = QProgressDialog("Rechnungen werden exportiert...", "Abbrechen", 0, len(invoices), self)
+        self.bulk_export_progress.setWindowTitle("Sammelexport")
+        self.bulk_export_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        self.bulk_export_progress.setMinimumDuration(0)
+
+        self.bulk_export_thread = BulkExportThread(invoices, target, password_dialog.get_password(), per_customer, self)
+        self.bulk_export_thread.progress.connect(lambda done, total: self.bulk_export_progress.setValue(done))
+        self.bulk_export_thread.export_finished.connect(self.on_bulk_export_finished)
+        self.bulk_export_thread.export_failed.connect(self.on_bulk_export_failed)
+        self.bulk_export_progress.canceled.connect(self.bulk_export_thread.cancel)
+        self.bulk_export_thread.start()
+
+    def on_bulk_export_finished(self, paths, errors):
+        self.bulk_export_progress.reset()
+        if paths is None:
+            self.statusBar().showMessage("Sammelexport abgebrochen", 5000)
+            return
+        message = f"{len(paths)} ZIP-Datei(en) gespeichert:\n" + "\n".join(paths)
+        if errors:
+            message += f"\n\n{len(errors)} Rechnung(en) fehlgeschlagen:\n" + \
+                       "\n".join(f"{invoice_nr}: {error}" for invoice_nr, error in errors)
+        show_info(self, "Export abgeschlossen", message)
+
+    def on_bulk_export_failed(self, message):
+        self.bulk_export_progress.reset()
+        show_error(self, "Export-Fehler", message)
 
     def search_kunden(self):
         self._search_in_table(
@@ -1675,10 +1775,6 @@ class MainWindow(QMainWindow):
             db_view_name="view_customers_full"
         )
 
-    def on_search_dienstleister_text_changed(self, text):
-        self.search_timer_dienstleister.stop()
-        self.search_timer_dienstleister.start(DEBOUNCE_TIME)
-
     def search_dienstleister(self):
         self._search_in_table(
             search_lineedit_name="tb_search_dienstleister",
@@ -1686,10 +1782,6 @@ class MainWindow(QMainWindow):
             db_view_name="view_service_provider_full"
         )
 
-    def on_search_positionen_text_changed(self, text):
-        self.search_timer_positionen.stop()
-        self.search_timer_positionen.start(DEBOUNCE_TIME)
-
     def search_positionen(self):
         """
         Sucht in Haupt-Tabelle (tv_positionen) und aktualisiert auch das Rechnungsformular-TableView.
@@ -1713,30 +1805,11 @@ class MainWindow(QMainWindow):
             return
 
         if not search_text:
+            self.search_dispatcher.cancel(table_view_name)
             self.load_table(table_view, db_view_name)
             return
 
-        try:
-            _, columns = fetch_all(f"SELECT * FROM {db_view_name} LIMIT 1")
-            like_clauses = [f'"{col}" LIKE ?' for col in columns]
-            sql = f'SELECT * FROM {db_view_name} WHERE ' + " OR ".join(like_clauses)
-            params = [f'%{search_text}%'] * len(columns)
-            data, _ = fetch_all(sql, tuple(params))
-
-            model = QStandardItemModel()
-            model.setHorizontalHeaderLabels(columns)
-            for row in data:
-                items = [QStandardItem(str(cell)) for cell in row]
-                for item in items:
-                    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                model.appendRow(items)
-            table_view.setModel(model)
-            self.connect_row_selected_signal(table_view, db_view_name)
-            table_view.resizeColumnsToContents()
-            table_view.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
-            table_view.setSelectionMode(QTableView.SelectionMode.SingleSelection)
-        except Exception as e:
-            show_error(self, "Suchfehler", str(e))
+        self.search_dispatcher.submit(table_view_name, db_view_name, search_text, source=search_lineedit_name)
 
     def open_logo_picker(self):
         file_path, _ = QFileDialog.getOpenFileName(
@@ -1745,23 +1818,29 @@ class MainWindow(QMainWindow):
             "",
             "Bilder (*.png *.jpg *.jpeg *.bmp *.svg)"
         )
+        logo = None
         if file_path:
+            with open(file_path, "rb") as f:
+                raw_data = f.read()
+            # Auf die Auflösung des Logo-Felds der PDF verkleinern, SVGs umwandeln, Metadaten entfernen
+            try:
+                logo = normalize_logo(raw_data, os.path.basename(file_path))
+            except ValueError as e:
+                show_error(self, "Logo kann nicht verwendet werden", str(e))
+        if logo is not None:
             self.selected_files = [file_path]
             if hasattr(self, "fileListWidget"):
                 self.fileListWidget.clear()
                 self.fileListWidget.addItem(file_path)
             self.file_path = file_path
             self.file_name = os.path.basename(file_path)
-            with open(file_path, "rb") as f:
-                self.logo_data = f.read()
-            mime_type, _ = mimetypes.guess_type(file_path)
-            self.mime_type = mime_type
+            self.logo = logo
 
             # === Logo-Vorschau ins Label laden ===
             label = self.findChild(QLabel, "lbl_dienstleister_logo")
-            if label and self.logo_data:
+            if label:
                 pixmap = QPixmap()
-                pixmap.loadFromData(self.logo_data)
+                pixmap.loadFromData(logo.thumbnail)
                 # Skaliere das Bild, damit es in das Label passt
                 scaled_pixmap = pixmap.scaled(
                     label.width(),
@@ -1776,8 +1855,7 @@ class MainWindow(QMainWindow):
             self.selected_files = []
             self.file_path = None
             self.file_name = None
-            self.logo_data = None
-            self.mime_type = None
+            self.logo = None
             if hasattr(self, "fileListWidget"):
                 self.fileListWidget.clear()
             # Label leeren, falls kein Bild gewählt
@@ -1786,27 +1864,16 @@ class MainWindow(QMainWindow):
                 label.clear()
 
     def show_service_provider_logo(self, ust_idnr):
-        with sqlite3.connect(DB_PATH) as conn:
+        with get_connection() as conn:
             cur = conn.cursor()
-            cur.execute("""
-                SELECT l.LOGO_BINARY
-                FROM SERVICE_PROVIDER s
-                JOIN LOGOS l ON s.FK_LOGO_ID = l.ID
-                WHERE s.UST_IDNR = ?
-            """, (ust_idnr,))
+            cur.execute("SELECT FK_LOGO_ID FROM SERVICE_PROVIDER WHERE UST_IDNR = ?", (ust_idnr,))
             row = cur.fetchone()
             label = self.findChild(QLabel, "lbl_dienstleister_logo")
             if label:
-                if row and row[0]:
-                    pixmap = QPixmap()
-                    pixmap.loadFromData(row[0])
-                    # Skaliere das Bild so, dass das Seitenverhältnis erhalten bleibt:
-                    scaled_pixmap = pixmap.scaled(
-                        label.width(),
-                        label.height(),
-                        Qt.AspectRatioMode.KeepAspectRatio,
-                        Qt.TransformationMode.SmoothTransformation
-                    )
+                # Skaliert mit erhaltenem Seitenverhältnis, je Logo und Labelgröße nur einmal dekodiert
+                scaled_pixmap = logo_pixmap(row[0], label.width(), label.height(), conn) \
+                    if row and row[0] is not None else None
+                if scaled_pixmap is not None:
                     label.setPixmap(scaled_pixmap)
                     label.setAlignment(Qt.AlignmentFlag.AlignLeft)
                     label.setScaledContents(False)
@@ -1814,43 +1881,13 @@ class MainWindow(QMainWindow):
                     label.clear()
 
     def build_invoice_xml(self, export_data):
-        root = ET.Element("invoice_data")
-
-        for entry in export_data:
-            for key, value in entry.items():
-                section = ET.SubElement(root, key)
-
-                if isinstance(value, list):
-                    for item in value:
-                        item_el = ET.SubElement(section, key[:-1])  # z. B. ceo aus ceos
-                        for sub_key, sub_val in item.items():
-                            ET.SubElement(item_el, sub_key).text = str(sub_val)
-
-                elif isinstance(value, dict):
-                    for sub_key, sub_val in value.items():
-                        ET.SubElement(section, sub_key).text = str(sub_val)
-
-                # Extra-Fall für 'service_provider', falls 'logo_id' als separates Feld übergeben wird
-                if key == "service_provider" and isinstance(value, dict):
-                    if "logo_id" in value:
-                        ET.SubElement(section, "FK_LOGO_ID").text = str(value["logo_id"])
-
-        rough_string = ET.tostring(root, encoding='utf-8')
-        reparsed = minidom.parseString(rough_string)
-        xml_string = reparsed.toprettyxml(indent="  ", encoding="utf-8").decode('utf-8')
-
-        return xml_string
+        return build_invoice_xml(export_data)
 
     def adjust_tableview_columns(self, table_view: QTableView):
-        """Setzt erste Spalte rechtsbündig, alle Spalten ResizeToContents, und erste Spalte etwas breiter."""
+        """Setzt alle Spalten ResizeToContents und erste Spalte etwas breiter (rechtsbündig ist sie über das Model)."""
         model = table_view.model()
         if not model or model.columnCount() == 0:
             return
-        # Erste Spalte rechtsbündig
-        for row in range(model.rowCount()):
-            item = model.item(row, 0)
-            if item:
-                item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
         # Spaltenbreite anpassen
         header = table_view.horizontalHeader()
         for col in range(header.count()):
@@ -1864,124 +1901,54 @@ class MainWindow(QMainWindow):
         return False
 
     def show_invoice_pdf(self, pdf_path):
+        from PyQt6.QtPdfWidgets import QPdfView
         self.pdf_document.load(pdf_path)
         self.pdf_view.setPageMode(QPdfView.PageMode.MultiPage)
         self.pdf_view.setZoomMode(QPdfView.ZoomMode.FitInView)
 
     def create_and_show_invoice_pdf(self, invoice_nr):
-        export_data = self.get_export_data(invoice_nr)
-        xml_string = self.build_invoice_xml(export_data)
-
-        # Logo laden
-        fk_logo_id = next(
-            (entry["service_provider"].get("FK_LOGO_ID") for entry in export_data if "service_provider" in entry),
-            None
-        )
-        logo_bytes = None
-        if fk_logo_id:
-            with sqlite3.connect(DB_PATH) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT LOGO_BINARY FROM LOGOS WHERE ID = ?", (fk_logo_id,))
-                result = cursor.fetchone()
-                if result and result[0] is not None:
-                    logo_bytes = result[0]
-
-        pdf_path = os.path.join(CACHE_OUTPUT_PATH, f"rechnung_{invoice_nr}.pdf")
-        builder = InvoicePDFBuilder(xml_string, logo_bytes)
-        builder.build(pdf_path)
+        # Nur neu erzeugen, wenn sich die Rechnungsdaten seit dem letzten PDF geändert haben
+        pdf_path = get_invoice_pdf(invoice_nr)
         self.show_invoice_pdf(pdf_path)
 
     def create_missing_invoice_pdfs(self):
-        with sqlite3.connect(DB_PATH) as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT INVOICE_NR FROM INVOICES")
-            all_invoices = [row[0] for row in cur.fetchall()]
-        missing = []
-        for invoice_nr in all_invoices:
-            pdf_path = os.path.join(CACHE_OUTPUT_PATH, f"rechnung_{invoice_nr}.pdf")
-            if not os.path.exists(pdf_path):
-                missing.append(invoice_nr)
+        """
+        Renders all missing invoice PDFs in the background, progress is shown in the status bar.
+        """
+        from pdf_jobs import find_missing_invoice_pdfs
+        missing = find_missing_invoice_pdfs()
         if not missing:
             return
-        progress = QProgressDialog("PDFs werden erstellt...", "Abbrechen", 0, len(missing), self)
-        progress.setWindowTitle("Rechnung-PDFs generieren")
-        progress.setWindowModality(Qt.WindowModality.ApplicationModal)
-        for i, invoice_nr in enumerate(missing, 1):
-            if progress.wasCanceled():
-                break
-            self.create_and_show_invoice_pdf(invoice_nr)
-            progress.setValue(i)
-        progress.setValue(len(missing))
+        self.pdf_batch_progress = QProgressBar(self)
+        self.pdf_batch_progress.setRange(0, len(missing))
+        self.pdf_batch_progress.setFormat("PDFs werden erstellt... %v/%m")
+        self.statusBar().addPermanentWidget(self.pdf_batch_progress)
+
+        self.pdf_batch_thread = PdfBatchThread(missing, self)
+        self.pdf_batch_thread.progress.connect(self.pdf_batch_progress.setValue)
+        self.pdf_batch_thread.batch_finished.connect(self.on_pdf_batch_finished)
+        self.pdf_batch_thread.start()
+
+    def on_pdf_batch_finished(self, succeeded, failed):
+        self.statusBar().removeWidget(self.pdf_batch_progress)
+        self.pdf_batch_progress.deleteLater()
+        message = f"{succeeded} Rechnungs-PDFs erstellt"
+        if failed:
+            message += f", {failed} fehlgeschlagen"
+        self.statusBar().showMessage(message, 5000)
+
+    def closeEvent(self, event):
+        # Laufende PDF-Erstellung abbrechen, bevor das Fenster geschlossen wird
+        for thread_name in ("pdf_batch_thread", "bulk_export_thread"):
+            thread = getattr(self, thread_name, None)
+            if thread is not None and thread.isRunning():
+                thread.cancel()
+                thread.wait()
+        self.search_dispatcher.shutdown()
+        super().closeEvent(event)
 
     def get_export_data(self, invoice_nr):
-        with sqlite3.connect(DB_PATH) as conn:
-            cur = conn.cursor()
-
-            # Rechnungsdaten
-            cur.execute("SELECT * FROM INVOICES WHERE INVOICE_NR = ?", (invoice_nr,))
-            invoice_row = cur.fetchone()
-            invoice_columns = [desc[0] for desc in cur.description]
-
-            # Kunde
-            cur.execute("""
-                SELECT c.*, a.*
-                FROM CUSTOMERS c
-                LEFT JOIN ADDRESSES a ON c.FK_ADDRESS_ID = a.ID
-                WHERE c.CUSTID = (SELECT FK_CUSTID FROM INVOICES WHERE INVOICE_NR = ?)
-            """, (invoice_nr,))
-            customer_row = cur.fetchone()
-            customer_columns = [desc[0] for desc in cur.description]
-
-            # Dienstleister
-            cur.execute("""
-                SELECT s.*, a.*
-                FROM SERVICE_PROVIDER s
-                LEFT JOIN ADDRESSES a ON s.FK_ADDRESS_ID = a.ID
-                WHERE s.UST_IDNR = (SELECT FK_UST_IDNR FROM INVOICES WHERE INVOICE_NR = ?)
-            """, (invoice_nr,))
-            provider_row = cur.fetchone()
-            provider_columns = [desc[0] for desc in cur.description]
-
-            # CEOs zum Dienstleister
-            cur.execute("""
-                SELECT ceo.ST_NR, ceo.CEO_NAME
-                FROM SERVICE_PROVIDER sp
-                JOIN REF_LABOR_COST rel ON rel.FK_UST_IDNR = sp.UST_IDNR
-                JOIN CEO ceo ON rel.FK_ST_NR = ceo.ST_NR
-                WHERE sp.UST_IDNR = (SELECT FK_UST_IDNR FROM INVOICES WHERE INVOICE_NR = ?)
-            """, (invoice_nr,))
-            ceos_rows = cur.fetchall()
-            ceos_columns = [desc[0] for desc in cur.description]
-
-            # Positionen
-            cur.execute("""
-                SELECT p.*
-                FROM REF_INVOICES_POSITIONS ref
-                JOIN POSITIONS p ON ref.FK_POSITIONS_POS_ID = p.POS_ID
-                WHERE ref.FK_INVOICES_INVOICE_NR = ?
-            """, (invoice_nr,))
-            positions_rows = cur.fetchall()
-            positions_columns = [desc[0] for desc in cur.description]
-
-            # Bankverbindung(en) zum Dienstleister
-            cur.execute("""
-                SELECT acc.IBAN, acc.FK_BANK_ID AS BIC, b.BANK_NAME
-                FROM ACCOUNT acc
-                JOIN BANK b ON acc.FK_BANK_ID = b.BIC
-                WHERE acc.FK_UST_IDNR = (SELECT FK_UST_IDNR FROM INVOICES WHERE INVOICE_NR = ?)
-            """, (invoice_nr,))
-            accounts_rows = cur.fetchall()
-            accounts_columns = [desc[0] for desc in cur.description]
-
-        export_data = [
-            {"invoice": dict(zip(invoice_columns, invoice_row)) if invoice_row else {}},
-            {"customer": dict(zip(customer_columns, customer_row)) if customer_row else {}},
-            {"service_provider": dict(zip(provider_columns, provider_row)) if provider_row else {}},
-            {"ceos": [dict(zip(ceos_columns, row)) for row in ceos_rows]},
-            {"positions": [dict(zip(positions_columns, row)) for row in positions_rows]},
-            {"accounts": [dict(zip(accounts_columns, row)) for row in accounts_rows]}
-        ]
-        return export_data
+        return get_export_data(invoice_nr)
 
     def on_drucken_clicked(self, pdf_path: str):
         """
@@ -2052,7 +2019,7 @@ class MainWindow(QMainWindow):
     def open_user_management(self):
         # Rechteprüfung nur, wenn aktiviert
         if IS_AUTHORIZATION_ACTIVE:
-            if not get_max_permission(self.current_user_id) >= 100:
+            if not self.session.max_permission() >= 100:
                 return
         dialog = UserManagementDialog(self)
         dialog.exec()
@@ -2069,7 +2036,7 @@ class MainWindow(QMainWindow):
         sel_model.currentChanged.connect(partial(self.on_row_selected, db_view=db_view, table_view=table_view))
 
     def on_eintrag_hinzufuegen_clicked(self):
-        if not get_max_permission(self.current_user_id) >= 2:
+        if not self.session.max_permission() >= 2:
             self.w_rechnung_hinzufuegen.setVisible(False)
             return
         self.clear_and_enable_form_fields()
@@ -0,0 +1,69 @@
+# This file brings a database to the current schema version (tracked in PRAGMA user_version)
+
+from database import get_connection, schema_changed
+from schema import ensure_schema
+
+# (version, description, step): step is a DDL file or a function taking the connection.
+# Neue Schritte nur hinten anhängen, bereits ausgelieferte Versionen nie ändern.
+MIGRATIONS = [
+    (1, "Tabellen anlegen", "ddl/tables.sql"),
+    (2, "Fremdschlüssel mit ON DELETE-Regeln und ihre Indizes", ensure_schema),
+    (3, "Indizes für Anmeldung, Rechteprüfung und Logos", "ddl/query_indexes.sql"),
+    (4, "Views", "ddl/views.sql"),
+    (5, "Inhalts-Hash und Vorschaubild der Logos", "ddl/logos.sql"),
+    (6, "Referenzzähler der Logos", "ddl/logo_ref_count.sql"),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn=None):
+    conn = conn or get_connection()
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn=None):
+    """
+    Applies all migrations newer than the version stored in the database, each together with
+    its new version number in one transaction, and refreshes the planner statistics (ANALYZE)
+    afterwards. Returns ([(version, description)] of the applied migrations, warnings); the
+    caller shows both to the user.
+    """
+    conn = conn or get_connection()
+    version = get_schema_version(conn)
+    if version > SCHEMA_VERSION:
+        return [], [f"Die Datenbank hat Schemaversion {version}, diese Programmversion kennt nur {SCHEMA_VERSION}."]
+
+    applied = []
+    warnings = []
+    for step_version, description, step in MIGRATIONS:
+        if step_version <= version:
+            continue
+        warnings += _apply(conn, step_version, step)
+        applied.append((step_version, description))
+
+    if applied:
+        conn.execute("ANALYZE")
+        conn.commit()
+        schema_changed()
+    return applied, warnings
+
+
+def _apply(conn, version, step):
+    conn.commit()
+    if callable(step):
+        # Funktionen verwalten ihre Transaktion selbst (z.B. Tabellenumbau ohne Fremdschlüsselprüfung)
+        # und geben ihre Warnungen zurück
+        warnings = step(conn) or []
+        conn.execute(f"PRAGMA user_version = {int(version)}")
+        conn.commit()
+        return warnings
+    with open(step, encoding="utf-8") as f:
+        script = f.read()
+    try:
+        conn.executescript(f"BEGIN;\n{script}\nPRAGMA user_version = {int(version)};\nCOMMIT;")
+    except Exception:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    return []
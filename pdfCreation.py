@@ -1,9 +1,6 @@
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import mm
-from reportlab.lib.utils import ImageReader
-from io import BytesIO
-import xml.etree.ElementTree as ET
 from reportlab.lib import colors
 from reportlab.platypus import Table, TableStyle
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -11,11 +8,85 @@ from reportlab.platypus import Paragraph
 from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
+from functools import lru_cache
+
+from invoice_model import InvoiceData
+from logo_cache import logo_reader
+
+
+# Shared render resources: created once per process and reused by every InvoicePDFBuilder
+def _create_styles():
+    styles = getSampleStyleSheet()
+
+    # Custom styles
+    styles.add(ParagraphStyle(
+        name='NormalWrap',
+        fontName='Helvetica',
+        fontSize=10,
+        leading=12,
+        alignment=TA_LEFT
+    ))
+
+    styles.add(ParagraphStyle(
+        name='RightWrap',
+        fontName='Helvetica',
+        fontSize=10,
+        leading=12,
+        alignment=TA_RIGHT
+    ))
+
+    styles.add(ParagraphStyle(
+        name='CenterWrap',
+        fontName='Helvetica',
+        fontSize=10,
+        leading=12,
+        alignment=TA_CENTER
+    ))
+
+    styles.add(ParagraphStyle(
+        name='Bold',
+        fontName='Helvetica-Bold',
+        fontSize=10,
+        leading=12,
+        alignment=TA_LEFT
+    ))
+
+    styles.add(ParagraphStyle(
+        name='RightBold',
+        fontName='Helvetica-Bold',
+        fontSize=10,
+        leading=12,
+        alignment=TA_RIGHT
+    ))
+
+    styles.add(ParagraphStyle(
+        name='CenterBold',
+        fontName='Helvetica-Bold',
+        fontSize=12,
+        leading=14,
+        alignment=TA_CENTER
+    ))
+    return styles
+
+
+STYLES = _create_styles()
+PROVIDER_NAME_STYLE = ParagraphStyle(name='ProviderName', fontName='Helvetica-Bold', fontSize=12, leading=12,
+                                     alignment=TA_LEFT)
+
+# Characters with a meaning in Paragraph markup, such text always goes through Paragraph
+_MARKUP_CHARS = frozenset("<>&")
+
+
+@lru_cache(maxsize=8192)
+def string_width(text, font_name, font_size):
+    return pdfmetrics.stringWidth(text, font_name, font_size)
+
 
 class InvoicePDFBuilder:
-    def __init__(self, xml_string: str, logo_bytes: bytes):
-        self.root = ET.fromstring(xml_string)
+    def __init__(self, invoice: InvoiceData, logo_bytes: bytes, logo_id=None):
+        self.data = invoice
         self.logo_bytes = logo_bytes
+        self.logo_id = logo_id  # Schlüssel im Logo-Cache
         self.canvas = None
         self.width, self.height = A4
         self.margin = 10 * mm
@@ -23,72 +94,13 @@ class InvoicePDFBuilder:
         self.y = self.height - self.margin
         self.page_num = 1
         self.min_y = 20 * mm
-        self.styles = getSampleStyleSheet()
-        
-        # Custom styles
-        self.styles.add(ParagraphStyle(
-            name='NormalWrap',
-            fontName='Helvetica',
-            fontSize=10,
-            leading=12,
-            alignment=TA_LEFT
-        ))
-
-        self.styles.add(ParagraphStyle(
-            name='RightWrap',
-            fontName='Helvetica',
-            fontSize=10,
-            leading=12,
-            alignment=TA_RIGHT
-        ))
-
-        self.styles.add(ParagraphStyle(
-            name='CenterWrap',
-            fontName='Helvetica',
-            fontSize=10,
-            leading=12,
-            alignment=TA_CENTER
-        ))
-
-        self.styles.add(ParagraphStyle(
-            name='Bold',
-            fontName='Helvetica-Bold',
-            fontSize=10,
-            leading=12,
-            alignment=TA_LEFT
-        ))
-
-        self.styles.add(ParagraphStyle(
-            name='RightBold',
-            fontName='Helvetica-Bold',
-            fontSize=10,
-            leading=12,
-            alignment=TA_RIGHT
-        ))
-
-        self.styles.add(ParagraphStyle(
-            name='CenterBold',
-            fontName='Helvetica-Bold',
-            fontSize=12,
-            leading=14,
-            alignment=TA_CENTER
-        ))
-        
-        # Parse XML with null checks
-        self.invoice = self.root.find("invoice") or ET.Element("dummy")
-        self.customer = self.root.find("customer") or ET.Element("dummy")
-        self.provider = self.root.find("service_provider") or ET.Element("dummy")
-        ceo_elem = self.root.find("ceos")
-        self.ceos = ceo_elem.findall("ceo") if ceo_elem is not None else []
-        positions_elem = self.root.find("positions")
-        self.positions = positions_elem.findall("position") if positions_elem is not None else []
-        self.bank = self.root.find("bank") or ET.Element("dummy")
-        
-    def _extract(self, element, tag, default=""):
-        if element is None:
-            return default
-        child = element.find(tag)
-        return child.text.strip() if child is not None and child.text else default
+        self.styles = STYLES
+        self.customer = invoice.customer
+        self.provider = invoice.provider
+
+    @classmethod
+    def from_xml(cls, xml_string: str, logo_bytes: bytes):
+        return cls(InvoiceData.from_xml(xml_string), logo_bytes)
 
     def _check_page_break(self, required_height):
         if self.y - required_height < self.min_y:
@@ -106,12 +118,12 @@ class InvoicePDFBuilder:
         font = "Helvetica-Bold" if bold else "Helvetica"
         self.canvas.setFont(font, size)
         self.canvas.drawString(x, y, text)
-        return self.canvas.stringWidth(text, font, size)
+        return string_width(text, font, size)
 
     def _draw_centered(self, y, text, size=10, bold=False):
         font = "Helvetica-Bold" if bold else "Helvetica"
         self.canvas.setFont(font, size)
-        text_width = self.canvas.stringWidth(text, font, size)
+        text_width = string_width(text, font, size)
         x = (self.width - text_width) / 2
         self.canvas.drawString(x, y, text)
         return text_width
@@ -119,13 +131,16 @@ class InvoicePDFBuilder:
     def _draw_right(self, x, y, text, size=10, bold=False):
         font = "Helvetica-Bold" if bold else "Helvetica"
         self.canvas.setFont(font, size)
-        text_width = self.canvas.stringWidth(text, font, size)
+        text_width = string_width(text, font, size)
         self.canvas.drawString(x - text_width, y, text)
         return text_width
 
     def _draw_paragraph(self, x, y, text, style, max_width):
         if not text:
             return 0
+        h = self._draw_single_line(x, y, text, style, max_width)
+        if h:
+            return h
         p = Paragraph(text, style)
         w, h = p.wrap(max_width, 1000)
         if w > max_width or h > 1000:  # Fallback if text too long
@@ -135,12 +150,37 @@ class InvoicePDFBuilder:
         p.drawOn(self.canvas, x, y - h)
         return h
 
+    def _draw_single_line(self, x, y, text, style, max_width):
+        """
+        Fast path for plain text that fits on one line: draws it exactly where Paragraph
+        would (baseline fontSize below y, aligned within max_width) without building a Paragraph.
+        Returns the used height or 0 if the text needs Paragraph.
+        """
+        if style.alignment not in (TA_LEFT, TA_RIGHT, TA_CENTER) \
+                or style.leftIndent or style.rightIndent or style.firstLineIndent:
+            return 0
+        if _MARKUP_CHARS.intersection(text) or " ".join(text.split()) != text:
+            return 0
+        text_width = string_width(text, style.fontName, style.fontSize)
+        if text_width > max_width:
+            return 0
+        if style.alignment == TA_RIGHT:
+            x += max_width - text_width
+        elif style.alignment == TA_CENTER:
+            x += (max_width - text_width) / 2
+        self.canvas.saveState()
+        self.canvas.setFillColor(style.textColor)
+        self.canvas.setFont(style.fontName, style.fontSize, style.leading)
+        self.canvas.drawString(x, y - style.fontSize, text)
+        self.canvas.restoreState()
+        return style.leading
+
     def _draw_logo(self):
         if not self.logo_bytes:
             return 0
             
         try:
-            logo = ImageReader(BytesIO(self.logo_bytes))
+            logo = logo_reader(self.logo_id, self.logo_bytes)
             logo_width = 60 * mm
             
             # Always position on right with margin
@@ -167,12 +207,12 @@ class InvoicePDFBuilder:
         self.y = self.height - self.margin - 5 * mm
         
         # Provider name with dynamic wrapping
-        provider_name = self._extract(self.provider, "PROVIDER_NAME")
+        provider_name = self.provider.name
         max_width = self.width - 2*self.margin - 45*mm  # Reserve space for logo
         
         # Center text only if it fits, otherwise left-align
-        if self.canvas and self.canvas.stringWidth(provider_name, "Helvetica-Bold", 12) < max_width:
-            h = self._draw_paragraph(self.margin, self.y, provider_name.upper(), ParagraphStyle(name = 'ProviderName', fontName='Helvetica-Bold', fontSize=12, leading=12, alignment=TA_LEFT), 105*mm)
+        if self.canvas and string_width(provider_name, "Helvetica-Bold", 12) < max_width:
+            h = self._draw_paragraph(self.margin, self.y, provider_name.upper(), PROVIDER_NAME_STYLE, 105*mm)
             if h > 0:
                 self.y -= h + 1*mm
 
@@ -192,9 +232,9 @@ class InvoicePDFBuilder:
         
         # Customer address with proper wrapping
         elements = [
-            f"{self._extract(self.customer, 'FIRST_NAME')} {self._extract(self.customer, 'LAST_NAME')}",
-            f"{self._extract(self.customer, 'STREET')} {self._extract(self.customer, 'NUMBER')}",
-            f"{self._extract(self.customer, 'ZIP')} {self._extract(self.customer, 'CITY')}"
+            f"{self.customer.first_name} {self.customer.last_name}",
+            f"{self.customer.street} {self.customer.number}",
+            f"{self.customer.zip} {self.customer.city}"
         ]
         
         for text in elements:
@@ -216,9 +256,9 @@ class InvoicePDFBuilder:
         self.y -= 10*mm
         
         invoice_data = [
-            f"Rechnungsnummer: {self._extract(self.invoice, 'INVOICE_NR')}",
-            f"Kundennummer: {self._extract(self.invoice, 'FK_CUSTID')}",
-            f"Datum: {self._extract(self.invoice, 'CREATION_DATE')}"
+            f"Rechnungsnummer: {self.data.invoice_nr}",
+            f"Kundennummer: {self.data.customer_nr}",
+            f"Datum: {self.data.creation_date}"
         ]
 
         for text in invoice_data:
@@ -238,15 +278,15 @@ class InvoicePDFBuilder:
         
         # Sender info with wrapping
         elements = [
-            (self._extract(self.provider, "PROVIDER_NAME"), True)
+            (self.provider.name, True)
         ]
 
-        for ceo in self.ceos:
-            elements += [(self._extract(ceo, "CEO_NAME"), False)]
+        for ceo_name in self.data.ceo_names:
+            elements += [(ceo_name, False)]
 
         elements += [
-            (self._extract(self.provider, 'STREET') + " " + self._extract(self.provider, 'NUMBER'), False),
-            (self._extract(self.provider, 'ZIP') + " " + self._extract(self.provider, 'CITY'), False)
+            (self.provider.street + " " + self.provider.number, False),
+            (self.provider.zip + " " + self.provider.city, False)
         ]
 
         meta_y = self.height - self.margin - 30*mm
@@ -269,11 +309,11 @@ class InvoicePDFBuilder:
 
         # Contact info with wrapping
         contacts = [
-            ("Mobil:", self._extract(self.provider, "MOBILTELNR")),
-            ("Tel.:", self._extract(self.provider, "TELNR")),
-            ("Fax:", self._extract(self.provider, "FAXNR")),
-            ("E-Mail:", self._extract(self.provider, "EMAIL")),
-            ("Web:", self._extract(self.provider, "WEBSITE"))
+            ("Mobil:", self.provider.mobile),
+            ("Tel.:", self.provider.phone),
+            ("Fax:", self.provider.fax),
+            ("E-Mail:", self.provider.email),
+            ("Web:", self.provider.website)
         ]
         
         for label, value in contacts:
@@ -293,7 +333,7 @@ class InvoicePDFBuilder:
     def _draw_greeting(self):
         self._check_page_break(20*mm)
         
-        last_name = self._extract(self.customer, 'LAST_NAME')
+        last_name = self.customer.last_name
         greeting = [
             f"Sehr geehrte Damen und Herren, ",
             "vielen Dank für Ihren Auftrag, den wir wie folgt in Rechnung stellen."
@@ -322,12 +362,12 @@ class InvoicePDFBuilder:
         
         # Positions data
         self.netto_summe = 0
-        for idx, pos in enumerate(self.positions, 1):
-            name = self._extract(pos, "NAME")
-            desc = self._extract(pos, "DESCRIPTION")
+        for idx, pos in enumerate(self.data.positions, 1):
+            name = pos.name
+            desc = pos.description
             try:
-                area = float(self._extract(pos, "AREA") or 0)
-                unit_price = float(self._extract(pos, "UNIT_PRICE") or 0)
+                area = float(pos.area or 0)
+                unit_price = float(pos.unit_price or 0)
                 total = area * unit_price
                 self.netto_summe += total
             except:
@@ -391,12 +431,12 @@ class InvoicePDFBuilder:
         # Extract values with null checks
         positions_netto = self.netto_summe
         try:
-            labor_netto = float(self._extract(self.invoice, "LABOR_COST", "0"))
+            labor_netto = float(self.data.labor_cost)
         except ValueError:
             labor_netto = 0.0
             
-        vat_rate_positions = float(self._extract(self.invoice, "VAT_RATE_POSITIONS", "19")) / 100
-        vat_rate_labor = float(self._extract(self.invoice, "VAT_RATE_LABOR", "19")) / 100
+        vat_rate_positions = float(self.data.vat_rate_positions) / 100
+        vat_rate_labor = float(self.data.vat_rate_labor) / 100
         
         # Calculate values
         tax_positions = positions_netto * vat_rate_positions
@@ -465,7 +505,7 @@ class InvoicePDFBuilder:
         self.y -= h + 3*mm if h > 0 else 5*mm
         
         # Add bank accounts
-        accounts = self.root.findall(".//account")
+        accounts = self.data.accounts
         if not accounts:
             h = self._draw_paragraph(
                 self.margin + 5*mm,  # Indent slightly
@@ -477,9 +517,9 @@ class InvoicePDFBuilder:
             if h > 0:
                 self.y -= h + 2*mm
         for account in accounts:
-            bank_name = self._extract(account, "BANK_NAME")  
-            iban = self._extract(account, "IBAN")
-            bic = self._extract(account, "BIC")
+            bank_name = account.bank_name
+            iban = account.iban
+            bic = account.bic
             
             bank_info = f"{bank_name}: IBAN {iban} • BIC {bic}"
             h = self._draw_paragraph(
@@ -500,11 +540,11 @@ class InvoicePDFBuilder:
         footer = [
             "Mit freundlichen Grüßen",
             "",
-            f"{self._extract(self.provider, 'PROVIDER_NAME')}"
+            f"{self.provider.name}"
         ]
         
-        for ceo in self.ceos:
-            ceo = f"{self._extract(ceo, 'CEO_NAME')} - Geschäftsführung" if self._extract(ceo, 'CEO_NAME') else ""
+        for ceo_name in self.data.ceo_names:
+            ceo = f"{ceo_name} - Geschäftsführung" if ceo_name else ""
             footer += [ceo]
 
         for text in footer:
@@ -532,13 +572,13 @@ class InvoicePDFBuilder:
         self._draw_centered(self.min_y, footer_text, 8)
         
         # Draw footer info
-        provider_name = self._extract(self.provider, 'PROVIDER_NAME')
-        street = self._extract(self.provider, 'STREET')
-        number = self._extract(self.provider, 'NUMBER')
-        zip_code = self._extract(self.provider, 'ZIP')
-        city = self._extract(self.provider, 'CITY')
-        tel = self._extract(self.provider, 'TELNR')
-        email = self._extract(self.provider, 'EMAIL')
+        provider_name = self.provider.name
+        street = self.provider.street
+        number = self.provider.number
+        zip_code = self.provider.zip
+        city = self.provider.city
+        tel = self.provider.phone
+        email = self.provider.email
         
         footer_info = " | ".join(filter(None, [
             provider_name,
@@ -0,0 +1,89 @@
+# This file keeps track of the rendered invoice PDFs so unchanged invoices are not rendered again
+
+import hashlib
+import json
+import os
+import threading
+
+from config import CACHE_OUTPUT_PATH
+from database import get_connection
+from invoice_data import load_invoice, invoice_pdf_path, write_invoice_pdf
+
+# The index lives next to the PDFs, it describes the files of this machine and not the invoices
+PDF_CACHE_INDEX_PATH = os.path.join(CACHE_OUTPUT_PATH, "pdf_cache.sqlite")
+
+# Bump when the PDF layout (pdfCreation.py) changes, so every cached PDF is rendered again
+PDF_RENDER_VERSION = "1"
+
+_index_ready = False
+_index_lock = threading.Lock()
+
+
+def compute_content_hash(export_data, logo_bytes):
+    """
+    Returns the SHA-256 over everything that ends up in the PDF of an invoice.
+    """
+    digest = hashlib.sha256(PDF_RENDER_VERSION.encode())
+    digest.update(json.dumps(export_data, sort_keys=True, default=str).encode("utf-8"))
+    digest.update(logo_bytes or b"")
+    return digest.hexdigest()
+
+
+def _index_connection():
+    global _index_ready
+    if not _index_ready:
+        os.makedirs(os.path.dirname(PDF_CACHE_INDEX_PATH), exist_ok=True)
+    conn = get_connection(PDF_CACHE_INDEX_PATH)
+    if not _index_ready:
+        with _index_lock, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS PDF_CACHE (
+                    INVOICE_NR TEXT PRIMARY KEY,
+                    CONTENT_HASH TEXT NOT NULL
+                )
+            """)
+            _index_ready = True
+    return conn
+
+
+def get_cached_hash(invoice_nr):
+    row = _index_connection().execute(
+        "SELECT CONTENT_HASH FROM PDF_CACHE WHERE INVOICE_NR = ?", (invoice_nr,)).fetchone()
+    return row[0] if row else None
+
+
+def store_hashes(entries):
+    """
+    Records the content hashes of rendered PDFs, entries = iterable of (invoice_nr, content_hash).
+    """
+    with _index_connection() as conn:
+        conn.executemany(
+            "INSERT INTO PDF_CACHE (INVOICE_NR, CONTENT_HASH) VALUES (?, ?) "
+            "ON CONFLICT(INVOICE_NR) DO UPDATE SET CONTENT_HASH = excluded.CONTENT_HASH",
+            entries)
+
+
+def write_invoice_pdf_hashed(export_data, logo_bytes, output_path, known_hash=None):
+    """
+    Renders already loaded invoice data unless known_hash matches it and the file exists.
+    Returns (pdf_path, content_hash, rendered). Does not touch the index,
+    so it can run in worker processes.
+    """
+    content_hash = compute_content_hash(export_data, logo_bytes)
+    if content_hash == known_hash and os.path.exists(output_path):
+        return output_path, content_hash, False
+    write_invoice_pdf(export_data, logo_bytes, output_path)
+    return output_path, content_hash, True
+
+
+def get_invoice_pdf(invoice_nr, conn=None):
+    """
+    Returns the path of an up-to-date PDF of the invoice, rendering it only if the
+    invoice data (including customer, provider and logo) changed since the last render.
+    """
+    export_data, logo_bytes = load_invoice(invoice_nr, conn)
+    pdf_path, content_hash, rendered = write_invoice_pdf_hashed(
+        export_data, logo_bytes, invoice_pdf_path(invoice_nr), get_cached_hash(invoice_nr))
+    if rendered:
+        store_hashes([(invoice_nr, content_hash)])
+    return pdf_path
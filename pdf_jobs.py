@@ -0,0 +1,93 @@
+# This file renders invoice PDFs in parallel worker processes (no Qt, usable from GUI and scripts)
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from config import DB_PATH, PDF_WORKERS
+from database import get_connection
+from invoice_data import invoice_pdf_path, load_invoices
+from pdf_cache import write_invoice_pdf_hashed, store_hashes
+
+# Invoices per job: loaded together with one bulk query in the worker
+PDF_JOB_CHUNK_SIZE = 25
+
+
+def find_missing_invoice_pdfs(output_dir=None, conn=None):
+    """
+    Returns the numbers of all invoices that have no cached PDF yet.
+    """
+    conn = conn or get_connection()
+    invoice_nrs = [row[0] for row in conn.execute("SELECT INVOICE_NR FROM INVOICES")]
+    return [invoice_nr for invoice_nr in invoice_nrs
+            if not os.path.exists(invoice_pdf_path(invoice_nr, output_dir))]
+
+
+def _render_job(invoice_nrs, db_path, output_dir):
+    """
+    Runs in a worker process: every worker keeps its own pooled connection to the database.
+    Returns a list of (invoice_nr, pdf_path, content_hash, error message); the hashes are
+    recorded in the cache index by the caller.
+    """
+    invoices = load_invoices(invoice_nrs, get_connection(db_path))
+    results = []
+    for invoice_nr in invoice_nrs:
+        if invoice_nr not in invoices:
+            results.append((invoice_nr, None, None, f"Rechnung {invoice_nr} nicht gefunden"))
+            continue
+        export_data, logo_bytes = invoices[invoice_nr]
+        try:
+            pdf_path, content_hash, _ = write_invoice_pdf_hashed(
+                export_data, logo_bytes, invoice_pdf_path(invoice_nr, output_dir))
+            results.append((invoice_nr, pdf_path, content_hash, None))
+        except Exception as e:
+            results.append((invoice_nr, None, None, str(e)))
+    return results
+
+
+def map_chunks(job, items, *job_args, workers=None, chunk_size=PDF_JOB_CHUNK_SIZE, is_canceled=None):
+    """
+    Runs job(chunk, *job_args) for chunks of items in a process pool.
+    Yields (chunk, result, error) in completion order; error is the exception if the job failed.
+    is_canceled is polled between results; pending jobs are dropped once it returns True.
+    """
+    items = list(items)
+    if not items:
+        return
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    workers = workers or PDF_WORKERS or os.cpu_count() or 1
+    workers = max(1, min(workers, len(chunks)))
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = {executor.submit(job, chunk, *job_args): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, e
+            if is_canceled is not None and is_canceled():
+                break
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def render_invoice_pdfs(invoice_nrs, output_dir=None, workers=None, db_path=None, is_canceled=None):
+    """
+    Renders the PDFs of the given invoices across several processes.
+    Yields (invoice_nr, pdf_path, error) in completion order, error is None on success.
+    is_canceled is polled between results; pending jobs are dropped once it returns True.
+    PDFs rendered into the cache directory are recorded in the PDF cache index.
+    """
+    rendered = []
+    try:
+        for chunk, results, error in map_chunks(_render_job, invoice_nrs, db_path or DB_PATH, output_dir,
+                                                workers=workers, is_canceled=is_canceled):
+            if error is not None:
+                results = [(invoice_nr, None, None, str(error)) for invoice_nr in chunk]
+            for invoice_nr, pdf_path, content_hash, message in results:
+                if message is None:
+                    rendered.append((invoice_nr, content_hash))
+                yield invoice_nr, pdf_path, message
+    finally:
+        if rendered and output_dir is None:
+            store_hashes(rendered)
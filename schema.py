@@ -0,0 +1,146 @@
+# This file keeps the database schema up to date: foreign keys with ON DELETE rules and indexes
+
+import re
+
+from database import get_connection
+
+INDEXES_DDL_PATH = "ddl/indexes.sql"
+
+# Foreign keys and their ON DELETE rule: table -> [(column, parent table, parent column, rule)]
+# Rechnungen gehören zu Kunde und Dienstleister und werden mit ihnen gelöscht. Positionen, die in
+# einer Rechnung verwendet werden, können dagegen nicht gelöscht werden (RESTRICT).
+FOREIGN_KEYS = {
+    "INVOICES": [
+        ("FK_CUSTID", "CUSTOMERS", "CUSTID", "CASCADE"),
+        ("FK_UST_IDNR", "SERVICE_PROVIDER", "UST_IDNR", "CASCADE"),
+    ],
+    "REF_INVOICES_POSITIONS": [
+        ("FK_INVOICES_INVOICE_NR", "INVOICES", "INVOICE_NR", "CASCADE"),
+        ("FK_POSITIONS_POS_ID", "POSITIONS", "POS_ID", "RESTRICT"),
+    ],
+    "ACCOUNT": [
+        ("FK_UST_IDNR", "SERVICE_PROVIDER", "UST_IDNR", "CASCADE"),
+    ],
+    "REF_LABOR_COST": [
+        ("FK_UST_IDNR", "SERVICE_PROVIDER", "UST_IDNR", "CASCADE"),
+    ],
+}
+
+_CREATE_TABLE_PATTERN = re.compile(r'^\s*CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?("[^"]+"|\[[^\]]+\]|`[^`]+`|\S+?)\s*\(',
+                                   re.IGNORECASE)
+
+
+def ensure_schema(conn=None):
+    """
+    Adds the foreign keys from FOREIGN_KEYS to existing tables (SQLite can only do that by
+    rebuilding the table) and creates the indexes from ddl/indexes.sql.
+    Tables that already have their foreign keys are left untouched, so this is cheap on every start.
+    Returns the warnings for the user (skipped foreign keys, rows violating the new ones).
+    """
+    conn = conn or get_connection()
+    warnings = []
+    rebuild = {}
+    for table, foreign_keys in FOREIGN_KEYS.items():
+        missing = [fk for fk in _missing_foreign_keys(conn, table, foreign_keys)
+                   if _is_unique_key(conn, fk[1], fk[2], warnings)]
+        if missing:
+            rebuild[table] = missing
+    if rebuild:
+        warnings += _rebuild_tables(conn, rebuild)
+    with open(INDEXES_DDL_PATH, encoding="utf-8") as f:
+        conn.executescript(f.read())
+    return warnings
+
+
+def _table_exists(conn, table):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone() is not None
+
+
+def _missing_foreign_keys(conn, table, foreign_keys):
+    if not _table_exists(conn, table):
+        return []
+    # PRAGMA foreign_key_list: id, seq, table, from, to, on_update, on_delete, match
+    existing = {(row[3].upper(), row[2].upper(), (row[4] or "").upper(), row[6].upper())
+                for row in conn.execute(f'PRAGMA foreign_key_list("{table}")')}
+    return [fk for fk in foreign_keys
+            if (fk[0].upper(), fk[1].upper(), fk[2].upper(), fk[3]) not in existing]
+
+
+def _is_unique_key(conn, table, column, warnings):
+    """
+    A foreign key may only point to the primary key or a unique column, otherwise every write
+    to the child table fails with 'foreign key mismatch'. The reason for a skipped key is added to warnings.
+    """
+    if not _table_exists(conn, table):
+        warnings.append(f"Fremdschlüssel auf {table}.{column} übersprungen: Tabelle fehlt")
+        return False
+    pk_columns = [row[1] for row in conn.execute(f'PRAGMA table_info("{table}")') if row[5]]
+    if [c.upper() for c in pk_columns] == [column.upper()]:
+        return True
+    for index in conn.execute(f'PRAGMA index_list("{table}")'):
+        if index[2]:
+            index_columns = [row[2] for row in conn.execute(f'PRAGMA index_info("{index[1]}")')]
+            if [c.upper() for c in index_columns] == [column.upper()]:
+                return True
+    warnings.append(f"Fremdschlüssel auf {table}.{column} übersprungen: Spalte ist nicht eindeutig")
+    return False
+
+
+def _rebuild_tables(conn, rebuild):
+    """
+    Rebuilds tables with additional foreign keys: the original CREATE statement is extended,
+    rows are copied with their rowid (the search index refers to it), then indexes and triggers
+    of the table are restored. Runs with foreign key checks off in a single transaction.
+    Returns a warning for every table with rows that violate the new foreign keys.
+    """
+    conn.commit()
+    conn.execute("PRAGMA foreign_keys=OFF")
+    # Views und Trigger anderer Tabellen beim Umbenennen nicht umschreiben (sie verweisen auf den Namen)
+    conn.execute("PRAGMA legacy_alter_table=ON")
+    try:
+        conn.execute("BEGIN")
+        for table, foreign_keys in rebuild.items():
+            _rebuild_table(conn, table, foreign_keys)
+        violations = conn.execute("PRAGMA foreign_key_check").fetchall()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute("PRAGMA legacy_alter_table=OFF")
+        conn.execute("PRAGMA foreign_keys=ON")
+
+    counts = {}
+    for table, *_ in violations:
+        counts[table] = counts.get(table, 0) + 1
+    return [f"{count} Zeile(n) in {table} verweisen auf nicht vorhandene Datensätze"
+            for table, count in counts.items()]
+
+
+def _rebuild_table(conn, table, foreign_keys):
+    create_sql = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+                              (table,)).fetchone()[0]
+    dependents = [row[0] for row in conn.execute(
+        "SELECT sql FROM sqlite_master WHERE tbl_name = ? AND type IN ('index', 'trigger') AND sql IS NOT NULL",
+        (table,))]
+    columns = ", ".join(f'"{row[1]}"' for row in conn.execute(f'PRAGMA table_info("{table}")'))
+
+    new_table = f"{table}__new"
+    constraints = "".join(
+        f',\n    FOREIGN KEY ("{column}") REFERENCES "{parent}" ("{parent_column}") ON DELETE {rule}'
+        for column, parent, parent_column, rule in foreign_keys)
+    new_sql = _CREATE_TABLE_PATTERN.sub(f'CREATE TABLE "{new_table}" (', create_sql, count=1)
+    # Zusätzliche Constraints vor der schließenden Klammer (ggf. vor WITHOUT ROWID/STRICT) einfügen
+    close = new_sql.rindex(")")
+    new_sql = new_sql[:close].rstrip() + constraints + "\n" + new_sql[close:]
+    conn.execute(new_sql)
+
+    copy_rowid = "WITHOUT ROWID" not in create_sql.upper()
+    if copy_rowid:
+        conn.execute(f'INSERT INTO "{new_table}" (rowid, {columns}) SELECT rowid, {columns} FROM "{table}"')
+    else:
+        conn.execute(f'INSERT INTO "{new_table}" ({columns}) SELECT {columns} FROM "{table}"')
+    conn.execute(f'DROP TABLE "{table}"')
+    conn.execute(f'ALTER TABLE "{new_table}" RENAME TO "{table}"')
+    for sql in dependents:
+        conn.execute(sql)
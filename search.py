@@ -0,0 +1,255 @@
+# This file provides the full-text search (SQLite FTS5) behind the search fields
+
+import json
+import re
+import sqlite3
+import unicodedata
+
+from cache import LRUCache
+from config import SEARCH_CACHE_SIZE, SEARCH_CACHE_MAX_ROWS
+from database import get_connection, fetch_all
+
+SEARCH_INDEX_DDL_PATH = "ddl/search_index.sql"
+
+# Mapping: database views to their FTS5 shadow table and the key used to join back to the view.
+# "depends": tables whose writes change the indexed content (and so the cached search results)
+SEARCH_INDEXES = {
+    "view_customers_full": {
+        "fts": "FTS_CUSTOMERS", "content": "view_search_customers",
+        "table": "CUSTOMERS", "pk_col": "CUSTID", "view_col": "Kundennummer",
+        "depends": ("CUSTOMERS",),
+    },
+    "view_service_provider_full": {
+        "fts": "FTS_SERVICE_PROVIDER", "content": "view_search_service_provider",
+        "table": "SERVICE_PROVIDER", "pk_col": "UST_IDNR", "view_col": "UStIdNr",
+        "depends": ("SERVICE_PROVIDER",),
+    },
+    "view_invoices_full": {
+        "fts": "FTS_INVOICES", "content": "view_search_invoices",
+        "table": "INVOICES", "pk_col": "INVOICE_NR", "view_col": "Rechnungsnummer",
+        "depends": ("INVOICES", "CUSTOMERS", "SERVICE_PROVIDER"),
+    },
+    "view_positions_full": {
+        "fts": "FTS_POSITIONS", "content": "view_search_positions",
+        "table": "POSITIONS", "pk_col": "POS_ID", "view_col": "PositionsID",
+        "depends": ("POSITIONS",),
+    },
+}
+
+# None = not checked yet, afterwards True/False depending on FTS5 availability
+_fts_available = None
+
+_TOKEN_PATTERN = re.compile(r"\w", re.UNICODE)
+# Token of the unicode61 tokenizer (letters and digits, '_' separates like any other character)
+_WORD_PATTERN = re.compile(r"[^\W_]+", re.UNICODE)
+# Combining diacritical marks left over after NFD decomposition ("ü" -> "u" + U+0308)
+_COMBINING_PATTERN = re.compile("[\u0300-\u036f]")
+_SEPARATOR_PATTERN = re.compile(r"[^\w\x00]+|_")
+# Schneller Weg für reinen ASCII-Text: alle Zeichen außer Buchstaben und Ziffern werden Leerzeichen
+_ASCII_SEPARATORS = str.maketrans({chr(code): " " for code in range(1, 128) if not chr(code).isalnum()})
+
+# (view, normalized terms) -> (write generations of the view's tables, rowids, indexed texts) in rank order
+_result_cache = LRUCache(SEARCH_CACHE_SIZE)
+# Table -> number of writes reported via note_write
+_write_generations = {}
+
+
+def ensure_search_index(conn=None):
+    """
+    Creates the FTS5 shadow tables, content views and sync triggers if they are missing
+    and fills newly created tables from the current data.
+    Returns (True, None), or (False, error message) if the SQLite build has no FTS5 support
+    (search then falls back to LIKE); the caller tells the user.
+    """
+    global _fts_available
+    conn = conn or get_connection()
+    try:
+        existing = {row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'FTS\\_%' ESCAPE '\\'")}
+        with open(SEARCH_INDEX_DDL_PATH, encoding="utf-8") as f:
+            conn.executescript(f.read())
+        missing = [idx["fts"] for idx in SEARCH_INDEXES.values() if idx["fts"] not in existing]
+        if missing:
+            rebuild_search_index(conn, missing)
+        _fts_available = True
+    except sqlite3.OperationalError as e:
+        _fts_available = False
+        return False, str(e)
+    return True, None
+
+
+def rebuild_search_index(conn=None, fts_tables=None):
+    """
+    Refills the given (default: all) FTS5 tables from their content views,
+    e.g. after bulk imports or a VACUUM that renumbered rowids.
+    """
+    conn = conn or get_connection()
+    _result_cache.clear()
+    with conn:
+        for idx in SEARCH_INDEXES.values():
+            if fts_tables is not None and idx["fts"] not in fts_tables:
+                continue
+            columns = [row[1] for row in conn.execute(f"PRAGMA table_info({idx['fts']})")]
+            column_list = ", ".join(columns)
+            conn.execute(f"DELETE FROM {idx['fts']}")
+            conn.execute(f"INSERT INTO {idx['fts']} (rowid, {column_list}) "
+                         f"SELECT ROW_ID, {column_list} FROM {idx['content']}")
+
+
+def build_match_query(search_text):
+    """
+    Turns the user input into an FTS5 MATCH expression: every term has to match (AND)
+    as prefix of a token, e.g. 'Mül Dres' -> '"Mül"* "Dres"*'.
+    Returns None if the input contains nothing searchable.
+    """
+    terms = [term for term in search_text.split() if _TOKEN_PATTERN.search(term)]
+    if not terms:
+        return None
+    return " ".join('"' + term.replace('"', '""') + '"*' for term in terms)
+
+
+def like_query(db_view, search_text):
+    """
+    Fallback without FTS5: every term has to appear in at least one column of the view.
+    Returns the (sql, params) of the search.
+    """
+    _, columns = fetch_all(f"SELECT * FROM {db_view} LIMIT 1")
+    like_clauses = []
+    params = []
+    for term in search_text.split():
+        or_parts = [f'"{col}" LIKE ?' for col in columns]
+        like_clauses.append('(' + ' OR '.join(or_parts) + ')')
+        params.extend([f'%{term}%'] * len(columns))
+    sql = f'SELECT * FROM {db_view}'
+    if like_clauses:
+        sql += ' WHERE ' + ' AND '.join(like_clauses)
+    return sql, tuple(params)
+
+
+def like_search(db_view, search_text):
+    return fetch_all(*like_query(db_view, search_text))
+
+
+def note_write(table, keys=None):
+    """
+    Reports a committed write to a table (subscriber of the change notifier): cached search
+    results of every view depending on it become invalid.
+    """
+    _write_generations[table] = _write_generations.get(table, 0) + 1
+
+
+def _normalize(text):
+    """
+    Lower case without diacritics, like the 'unicode61 remove_diacritics 2' tokenizer.
+    """
+    return _COMBINING_PATTERN.sub("", unicodedata.normalize("NFD", text.lower()))
+
+
+def _indexed_texts(conn, idx, row_ids):
+    """
+    Returns the indexed content of the given rows as normalized text, one string per rowid
+    in which every word is preceded by a space (" müller berlin ..."), so "word starts with
+    term" is a plain substring test for " " + term.
+    """
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({idx['fts']})")]
+    content = " || ' ' || ".join(f"coalesce({column}, '')" for column in columns)
+    by_rowid = dict(conn.execute(f"SELECT rowid, {content} FROM {idx['fts']} "
+                                 f"WHERE rowid IN (SELECT value FROM json_each(?))", (json.dumps(row_ids),)))
+    # Alle Texte auf einmal normalisieren (\x00 trennt die Zeilen), das ist viel schneller als je Zeile
+    text = _normalize("\x00".join(by_rowid.get(row_id, "") for row_id in row_ids))
+    text = text.translate(_ASCII_SEPARATORS) if text.isascii() else _SEPARATOR_PATTERN.sub(" ", text)
+    return [" " + row_text for row_text in text.split("\x00")]
+
+
+def _refine(conn, db_view, terms, generation):
+    """
+    Filters the results of an earlier, broader search of the same view instead of searching the
+    whole index again: 'Mül' -> 'Müll' only keeps rows that also contain a word starting with 'müll'.
+    The remaining rows are ranked again for the new terms (bm25 differs from the broader search).
+    Only possible if every new term is a single word and every earlier term is a prefix of one of them.
+    Returns (rowids, texts) or None if no cached result fits.
+    """
+    if not all(_WORD_PATTERN.fullmatch(term) for term in terms):
+        return None
+    best = None
+    for (view, cached_terms), (cached_generation, row_ids, texts) in _result_cache.items():
+        if view != db_view or cached_generation != generation or cached_terms == terms:
+            continue
+        if not all(any(term.startswith(cached) for term in terms) for cached in cached_terms):
+            continue
+        if best is None or len(row_ids) < len(best[0]):
+            best = (row_ids, texts)
+    if best is None:
+        return None
+    needles = [" " + term for term in terms]
+    text_of = {row_id: text for row_id, text in zip(*best) if all(needle in text for needle in needles)}
+    if not text_of:
+        return [], []
+    fts = SEARCH_INDEXES[db_view]["fts"]
+    conn = conn or get_connection()
+    row_ids = [row[0] for row in conn.execute(
+        f"SELECT rowid FROM {fts} WHERE {fts} MATCH ? AND rowid IN (SELECT value FROM json_each(?)) ORDER BY rank",
+        (build_match_query(" ".join(terms)), json.dumps(list(text_of))))]
+    return row_ids, [text_of[row_id] for row_id in row_ids]
+
+
+def search_row_ids(db_view, search_text, conn=None):
+    """
+    Returns the rowids (of the view's base table) matching the search text, best matches first.
+    Results are kept in an LRU cache until one of the view's tables is written (note_write);
+    a search extending a cached one is answered by filtering the cached rows.
+    """
+    idx = SEARCH_INDEXES[db_view]
+    terms = tuple(sorted({_normalize(term) for term in search_text.split() if _TOKEN_PATTERN.search(term)}))
+    generation = tuple(_write_generations.get(table, 0) for table in idx["depends"])
+    key = (db_view, terms)
+
+    cached = _result_cache.get(key)
+    if cached is not None and cached[0] == generation:
+        return cached[1]
+
+    refined = _refine(conn, db_view, terms, generation)
+    if refined is not None:
+        row_ids, texts = refined
+    else:
+        conn = conn or get_connection()
+        row_ids = [row[0] for row in conn.execute(
+            f"SELECT rowid FROM {idx['fts']} WHERE {idx['fts']} MATCH ? ORDER BY rank",
+            (build_match_query(search_text),))]
+        if len(row_ids) > SEARCH_CACHE_MAX_ROWS:
+            return row_ids
+        texts = _indexed_texts(conn, idx, row_ids)
+    _result_cache.put(key, (generation, row_ids, texts))
+    return row_ids
+
+
+def search_query(db_view, search_text):
+    """
+    Returns the (sql, params) searching a database view, best matches first.
+    The matching rows are determined up front (search_row_ids), the query only reads them.
+    Views without search index use the LIKE fallback.
+    """
+    if _fts_available is None:
+        ensure_search_index()
+    idx = SEARCH_INDEXES.get(db_view)
+    if not _fts_available or idx is None:
+        return like_query(db_view, search_text)
+
+    if build_match_query(search_text) is None:
+        return f"SELECT * FROM {db_view}", ()
+
+    sql = f"""
+        SELECT v.*
+        FROM json_each(?) j
+        JOIN {idx['table']} b ON b.rowid = j.value
+        JOIN {db_view} v ON v."{idx['view_col']}" = b.{idx['pk_col']}
+        ORDER BY j.key
+    """
+    return sql, (json.dumps(search_row_ids(db_view, search_text)),)
+
+
+def search_view(db_view, search_text):
+    """
+    Searches a database view and returns (data, columns) like fetch_all (see search_query).
+    """
+    return fetch_all(*search_query(db_view, search_text))
@@ -0,0 +1,199 @@
+# This file runs the searches of the search fields in a thread pool instead of the GUI thread
+
+import sqlite3
+import time
+from functools import partial
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+from config import SEARCH_WORKERS, SEARCH_CHUNK_SIZE, DEBOUNCE_TIME, DEBOUNCE_TIME_MIN, DEBOUNCE_TIME_MAX
+from database import get_connection, cancelable
+from search import search_query
+
+
+class _SearchSignals(QObject):
+    # Schlüssel, Generation, ...; die Generation erkennt veraltete Ergebnisse
+    started = pyqtSignal(str, int, object, object)  # Spalten, erste Zeilen
+    chunk = pyqtSignal(str, int, object)  # weitere Zeilen
+    finished = pyqtSignal(str, int, float)  # Dauer der Suche in ms
+    failed = pyqtSignal(str, int, str)
+
+
+class _SearchTask(QRunnable):
+    def __init__(self, dispatcher, key, generation, db_view, search_text):
+        super().__init__()
+        self.dispatcher = dispatcher
+        self.key = key
+        self.generation = generation
+        self.db_view = db_view
+        self.search_text = search_text
+        self.signals = dispatcher._signals
+
+    def is_canceled(self):
+        return not self.dispatcher.is_current(self.key, self.generation)
+
+    def run(self):
+        if self.is_canceled():
+            return
+        # Jeder Pool-Thread hat seine eigene Verbindung aus dem Verbindungspool
+        conn = get_connection()
+        start = time.perf_counter()
+        try:
+            with cancelable(conn, self.is_canceled):
+                sql, params = search_query(self.db_view, self.search_text)
+                cursor = conn.execute(sql, params)
+                columns = [description[0] for description in cursor.description]
+                rows = cursor.fetchmany(SEARCH_CHUNK_SIZE)
+                self.signals.started.emit(self.key, self.generation, columns, rows)
+                while len(rows) == SEARCH_CHUNK_SIZE and not self.is_canceled():
+                    rows = cursor.fetchmany(SEARCH_CHUNK_SIZE)
+                    if rows:
+                        self.signals.chunk.emit(self.key, self.generation, rows)
+            self.signals.finished.emit(self.key, self.generation, (time.perf_counter() - start) * 1000)
+        except sqlite3.OperationalError as e:
+            # Abbruch über den Progress-Handler ("interrupted") ist kein Fehler
+            if not self.is_canceled():
+                self.signals.failed.emit(self.key, self.generation, str(e))
+        except Exception as e:
+            self.signals.failed.emit(self.key, self.generation, str(e))
+
+
+class SearchDispatcher(QObject):
+    """
+    Runs searches (search.search_query) in a thread pool and delivers the results in chunks.
+    Every key (e.g. the QTableView the results are meant for) has a generation counter:
+    a new search or cancel(key) makes older searches of that key stale, their running query is
+    aborted via the SQLite progress handler and results still in the event queue are dropped.
+    """
+    results_started = pyqtSignal(str, str, object, object)  # Schlüssel, View, Spalten, erste Zeilen
+    results_chunk = pyqtSignal(str, object)  # Schlüssel, weitere Zeilen
+    search_failed = pyqtSignal(str, str)  # Schlüssel, Fehlermeldung
+    search_finished = pyqtSignal(str, float)  # Suchfeld (source), Dauer in ms
+
+    def __init__(self, parent=None, workers=SEARCH_WORKERS):
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(workers)
+        # Threads nicht beenden, sonst bleibt je beendetem Thread eine Verbindung im Pool zurück
+        self._pool.setExpiryTimeout(-1)
+        # Nur im GUI-Thread geschrieben, die Worker lesen nur
+        self._generations = {}
+        self._views = {}
+        self._sources = {}
+        self._signals = _SearchSignals(self)
+        self._signals.started.connect(self._on_started)
+        self._signals.chunk.connect(self._on_chunk)
+        self._signals.finished.connect(self._on_finished)
+        self._signals.failed.connect(self._on_failed)
+
+    def submit(self, key, db_view, search_text, source=None):
+        """
+        Starts a search for key and makes all earlier searches of that key stale.
+        source (the search field) is reported with the duration in search_finished.
+        """
+        generation = self.cancel(key)
+        self._views[key] = db_view
+        self._sources[key] = source
+        self._pool.start(_SearchTask(self, key, generation, db_view, search_text))
+
+    def cancel(self, key):
+        """
+        Makes the running search of key stale (e.g. when the search field was cleared).
+        Returns the new generation.
+        """
+        generation = self._generations.get(key, 0) + 1
+        self._generations[key] = generation
+        return generation
+
+    def is_current(self, key, generation):
+        return self._generations.get(key) == generation
+
+    def shutdown(self):
+        """
+        Cancels all searches and waits for the worker threads (on application exit).
+        """
+        for key in list(self._generations):
+            self.cancel(key)
+        self._pool.clear()
+        self._pool.waitForDone()
+
+    def _on_started(self, key, generation, columns, rows):
+        if self.is_current(key, generation):
+            self.results_started.emit(key, self._views[key], columns, rows)
+
+    def _on_chunk(self, key, generation, rows):
+        if self.is_current(key, generation):
+            self.results_chunk.emit(key, rows)
+
+    def _on_finished(self, key, generation, elapsed_ms):
+        source = self._sources.get(key)
+        if self.is_current(key, generation) and source is not None:
+            self.search_finished.emit(source, elapsed_ms)
+
+    def _on_failed(self, key, generation, message):
+        if self.is_current(key, generation):
+            self.search_failed.emit(key, message)
+
+
+class SearchScheduler(QObject):
+    """
+    Debounces all search fields: a search runs once the user stopped typing for the field's delay.
+    The delay adapts to how long the field's searches took recently (DEBOUNCE_TIME_MIN..MAX,
+    DEBOUNCE_TIME until the first measurement), and a text that only differs in whitespace from
+    the last searched one does not start a new search.
+    """
+    # Gewichtung der letzten Messung im gleitenden Mittel der Suchdauer
+    SMOOTHING = 0.3
+
+    def __init__(self, dispatcher, parent=None):
+        super().__init__(parent)
+        self._fields = {}
+        dispatcher.search_finished.connect(self.record_duration)
+
+    def register(self, line_edit, callback):
+        """
+        Calls callback() after typing pauses in line_edit (connected exactly once).
+        """
+        timer = QTimer(self)
+        timer.setSingleShot(True)
+        timer.timeout.connect(partial(self._on_timeout, line_edit.objectName()))
+        self._fields[line_edit.objectName()] = {
+            "line_edit": line_edit, "callback": callback, "timer": timer,
+            "last_text": None, "avg_ms": None,
+        }
+        line_edit.textChanged.connect(partial(self._on_text_changed, line_edit.objectName()))
+
+    def delay(self, field):
+        avg_ms = self._fields[field]["avg_ms"]
+        if avg_ms is None:
+            return DEBOUNCE_TIME
+        # Doppelte Suchdauer warten: schnelle Suchen reagieren sofort, langsame stauen sich nicht
+        return int(min(DEBOUNCE_TIME_MAX, max(DEBOUNCE_TIME_MIN, 2 * avg_ms)))
+
+    def record_duration(self, field, elapsed_ms):
+        entry = self._fields.get(field)
+        if entry is None:
+            return
+        avg_ms = entry["avg_ms"]
+        entry["avg_ms"] = elapsed_ms if avg_ms is None else avg_ms + self.SMOOTHING * (elapsed_ms - avg_ms)
+
+    def invalidate(self, line_edit):
+        """
+        Forgets the last searched text, so the next search runs even for the same text
+        (e.g. after the tab and with it the searched table changed).
+        """
+        entry = self._fields.get(line_edit.objectName())
+        if entry is not None:
+            entry["last_text"] = None
+
+    def _on_text_changed(self, field, text):
+        entry = self._fields[field]
+        entry["timer"].start(self.delay(field))
+
+    def _on_timeout(self, field):
+        entry = self._fields[field]
+        text = " ".join(entry["line_edit"].text().split())
+        if text == entry["last_text"]:
+            return
+        entry["last_text"] = text
+        entry["callback"]()
@@ -0,0 +1,252 @@
+# This file contains the read-only table model used by all QTableViews
+
+from bisect import bisect_left
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from config import TABLE_PAGE_SIZE
+from database import fetch_page, fetch_rows_by_key
+
+
+class SqlTableModel(QAbstractTableModel):
+    """
+    Read-only table model that loads its rows lazily with keyset pagination.
+    Only the first page is queried on creation, further pages are fetched by the view
+    via canFetchMore/fetchMore while scrolling, so big tables show up immediately and
+    only the rows the user has actually scrolled to are kept in memory.
+    """
+
+    def __init__(self, query=None, params=None, key_column=None, prefix_rows=None,
+                 page_size=TABLE_PAGE_SIZE, parent=None):
+        """
+        :param query: SELECT statement (or view) the rows come from
+        :param params: Parameters for the placeholders in query
+        :param key_column: Column used for ordering and paging (default: first column)
+        :param prefix_rows: Rows shown above the database rows (e.g. unsaved positions)
+        :param page_size: Number of rows loaded per page
+        """
+        super().__init__(parent)
+        self._query = query
+        self._params = tuple(params or ())
+        self._key_column = key_column
+        self._page_size = page_size
+        self._rows = [tuple(row) for row in (prefix_rows or [])]
+        self._prefix_count = len(self._rows)
+        # Rows are ordered by key (keyset pages), so refreshed rows can be inserted at their position
+        self._ordered = True
+        self._columns = []
+        self._last_key = None
+        self._exhausted = query is None
+        if query is not None:
+            self._rows.extend(tuple(row) for row in self._load_page())
+
+    @classmethod
+    def from_rows(cls, rows, columns, source=None, key_column=None, parent=None):
+        """
+        Creates a model for rows that were already loaded (e.g. search results).
+        With source (the query the rows come from) the model can refresh changed
+        and deleted rows via refresh_rows, new rows are not added.
+        """
+        model = cls(parent=parent)
+        model._rows = [tuple(row) for row in rows]
+        model._columns = list(columns)
+        model._query = source
+        model._key_column = key_column
+        model._ordered = False
+        return model
+
+    def _load_page(self):
+        rows, columns = fetch_page(self._query, self._key_column, self._last_key, self._page_size, self._params)
+        if not self._columns:
+            self._columns = columns
+        if self._key_column is None and columns:
+            self._key_column = columns[0]
+        if len(rows) < self._page_size:
+            self._exhausted = True
+        if rows:
+            key_idx = self._columns.index(self._key_column)
+            self._last_key = rows[-1][key_idx]
+        return rows
+
+    # --- QAbstractTableModel interface ---
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._columns)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return str(self._rows[index.row()][index.column()])
+        # Erste Spalte rechtsbündig
+        if role == Qt.ItemDataRole.TextAlignmentRole and index.column() == 0:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self._columns[section] if 0 <= section < len(self._columns) else None
+        return section + 1
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        rows = self._load_page()
+        if not rows:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(tuple(row) for row in rows)
+        self.endInsertRows()
+
+    def append_rows(self, rows):
+        """
+        Appends already loaded rows at the end (search results arriving in chunks).
+        """
+        if not rows:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(tuple(row) for row in rows)
+        self.endInsertRows()
+
+    # --- Incremental refresh ---
+
+    def refresh_rows(self, keys):
+        """
+        Reloads the rows with the given keys after they were inserted, changed or deleted:
+        changed rows are updated in place, deleted rows are removed and new rows are inserted
+        at their key position, unless that lies behind the pages loaded so far (fetchMore
+        brings them then). More keys than one page (e.g. the invoices of a deleted customer)
+        reload the model from its first page instead. Returns False if the model has no query
+        to refresh from.
+        """
+        if self._query is None or not self._columns:
+            return False
+        keys = list(keys)
+        if not keys:
+            return True
+        if self._ordered and len(keys) > self._page_size:
+            self._reload()
+            return True
+        key_column = self._key_column or self._columns[0]
+        key_idx = self._columns.index(key_column)
+        rows, _ = fetch_rows_by_key(self._query, key_column, keys, self._params)
+
+        fresh = {str(key): [] for key in keys}
+        for row in rows:
+            fresh.setdefault(str(row[key_idx]), []).append(tuple(row))
+        # Zeilennummern je Schlüssel einmal ermitteln statt die geladenen Zeilen je Schlüssel zu durchsuchen
+        existing = {}
+        for row in range(self._prefix_count, len(self._rows)):
+            key = str(self._rows[row][key_idx])
+            if key in fresh:
+                existing.setdefault(key, []).append(row)
+
+        removed = []
+        inserts = []
+        for key, new_rows in fresh.items():
+            old_rows = existing.get(key, [])
+            # Gleiche Anzahl an Zeilen: nur die Werte aktualisieren
+            if old_rows and len(old_rows) == len(new_rows) and old_rows[-1] - old_rows[0] == len(old_rows) - 1:
+                first, last = old_rows[0], old_rows[-1]
+                self._rows[first:last + 1] = new_rows
+                self.dataChanged.emit(self.index(first, 0), self.index(last, len(self._columns) - 1))
+                continue
+            removed.extend(old_rows)
+            if new_rows:
+                inserts.append((old_rows[0] if old_rows else None, new_rows))
+
+        removed.sort()
+        self._remove_rows(removed)
+        # Geänderte Schlüssel an ihrer alten Position (abzüglich der davor entfernten Zeilen) einfügen,
+        # von hinten, damit die übrigen Positionen gültig bleiben; neue Schlüssel danach an ihrer Sortierposition
+        moved = sorted(((old_position - bisect_left(removed, old_position), new_rows)
+                        for old_position, new_rows in inserts if old_position is not None),
+                       key=lambda insert: insert[0], reverse=True)
+        for position, new_rows in moved:
+            self._insert_rows(position, new_rows)
+        if self._ordered:
+            for old_position, new_rows in inserts:
+                if old_position is None:
+                    self._insert_rows(self._key_position(new_rows[0][key_idx], key_idx), new_rows)
+        return True
+
+    def _insert_rows(self, position, rows):
+        if position is None:
+            return
+        self.beginInsertRows(QModelIndex(), position, position + len(rows) - 1)
+        self._rows[position:position] = rows
+        self.endInsertRows()
+
+    def _remove_rows(self, rows):
+        """
+        Removes the given (sorted) rows, one beginRemoveRows/endRemoveRows per contiguous range,
+        starting at the end so the positions of the remaining ranges stay valid.
+        """
+        ranges = []
+        for row in rows:
+            if ranges and ranges[-1][1] == row - 1:
+                ranges[-1][1] = row
+            else:
+                ranges.append([row, row])
+        for first, last in reversed(ranges):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._rows[first:last + 1]
+            self.endRemoveRows()
+
+    def _reload(self):
+        """
+        Drops the loaded pages and loads the first page again (prefix rows are kept).
+        """
+        self.beginResetModel()
+        del self._rows[self._prefix_count:]
+        self._last_key = None
+        self._exhausted = False
+        self._rows.extend(tuple(row) for row in self._load_page())
+        self.endResetModel()
+
+    def _key_position(self, key, key_idx):
+        """
+        Returns the row a new key belongs to, or None if it lies behind the loaded pages.
+        The loaded rows are ordered by key, so the position is found by binary search.
+        """
+        low, high = self._prefix_count, len(self._rows)
+        while low < high:
+            middle = (low + high) // 2
+            other = self._rows[middle][key_idx]
+            try:
+                greater = other > key
+            except TypeError:
+                greater = str(other) > str(key)
+            if greater:
+                high = middle
+            else:
+                low = middle + 1
+        if low < len(self._rows):
+            return low
+        return len(self._rows) if self._exhausted else None
+
+    # --- Helpers ---
+
+    def columns(self):
+        return list(self._columns)
+
+    def row_values(self, row):
+        """
+        Returns the raw database values of a row.
+        """
+        return self._rows[row]
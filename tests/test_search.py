@@ -0,0 +1,120 @@
+"""
+Checks of the search result cache (search.search_row_ids): results refined from a cached,
+broader search have to match a direct FTS5 query (same rows, bm25 order), and a reported
+write (note_write) has to make cached results stale.
+
+Aufruf (aus dem Projektverzeichnis):
+    python -m pytest -q tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import database  # noqa: E402
+import search  # noqa: E402
+from migrations import migrate  # noqa: E402
+
+# (Vorname, Nachname, Stadt): Wiederholungen in mehreren Spalten ergeben unterschiedliche bm25-Werte
+CUSTOMERS = [
+    ("Anna", "Müller", "Berlin"),
+    ("Müller", "Müller", "Müllheim"),
+    ("Jonas", "Müllermann", "Dresden"),
+    ("Lena", "Mülheim", "Berlin"),
+    ("Paul", "Muller", "Mülheim"),
+    ("Berta", "Schmidt", "Berlin"),
+    ("Max", "Müller-Schmidt", "Dresden"),
+    ("Mia", "Meyer", "Münster"),
+]
+
+
+class SearchCacheTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Die DDL-Dateien werden relativ zum Projektverzeichnis gelesen
+        cls._cwd = os.getcwd()
+        os.chdir(ROOT)
+        cls._tmp_dir = tempfile.mkdtemp()
+        cls.conn = database.get_connection(os.path.join(cls._tmp_dir, "search.db"))
+        migrate(cls.conn)
+        available, _ = search.ensure_search_index(cls.conn)
+        if not available:
+            raise unittest.SkipTest("SQLite ohne FTS5")
+        with cls.conn:
+            for n, (first_name, last_name, city) in enumerate(CUSTOMERS, start=1):
+                cls._add_customer(n, first_name, last_name, city)
+
+    @classmethod
+    def tearDownClass(cls):
+        database.close_all_connections()
+        os.chdir(cls._cwd)
+        shutil.rmtree(cls._tmp_dir, ignore_errors=True)
+
+    @classmethod
+    def _add_customer(cls, n, first_name, last_name, city):
+        address_id = cls.conn.execute("INSERT INTO ADDRESSES (STREET, CITY) VALUES ('Hauptstraße', ?)",
+                                      (city,)).lastrowid
+        cls.conn.execute("INSERT INTO CUSTOMERS (CUSTID, FIRST_NAME, LAST_NAME, FK_ADDRESS_ID) VALUES (?, ?, ?, ?)",
+                         (f"{n:05d}", first_name, last_name, address_id))
+
+    def setUp(self):
+        search._result_cache.clear()
+
+    def direct(self, search_text):
+        """
+        Returns {rowid: rank} of a direct MATCH query without the cache.
+        """
+        return dict(self.conn.execute(
+            "SELECT rowid, rank FROM FTS_CUSTOMERS WHERE FTS_CUSTOMERS MATCH ?",
+            (search.build_match_query(search_text),)))
+
+    def assert_like_direct(self, search_text):
+        row_ids = search.search_row_ids("view_customers_full", search_text, self.conn)
+        ranks = self.direct(search_text)
+        self.assertEqual(set(row_ids), set(ranks), search_text)
+        # Gleich bewertete Zeilen dürfen in beliebiger Reihenfolge stehen
+        self.assertEqual([ranks[row_id] for row_id in row_ids], sorted(ranks[row_id] for row_id in row_ids),
+                         search_text)
+
+    def test_prefix_chain_matches_direct_query(self):
+        for word in ("Müller", "Mülheim", "Berlin"):
+            search._result_cache.clear()
+            for length in range(1, len(word) + 1):
+                self.assert_like_direct(word[:length])
+
+    def test_multi_term_refinement_matches_direct_query(self):
+        for chain in (["Mül", "Mül Ber", "Mül Berl", "Müller Berlin"],
+                      ["Schm", "Schmidt Dr", "Schmidt Dresden"],
+                      ["Mu", "Mu Mü", "Mul Mül"]):
+            search._result_cache.clear()
+            for search_text in chain:
+                self.assert_like_direct(search_text)
+
+    def test_refinement_is_used(self):
+        search.search_row_ids("view_customers_full", "Mül", self.conn)
+        self.assertIsNotNone(search._refine(self.conn, "view_customers_full", ("mull",),
+                                            self._generation()))
+
+    def test_write_makes_cached_results_stale(self):
+        before = search.search_row_ids("view_customers_full", "Müll", self.conn)
+        with self.conn:
+            self._add_customer(99, "Eva", "Müllerin", "Köln")
+        # Ohne Meldung des Schreibzugriffs gilt der Cache weiter
+        self.assertEqual(search.search_row_ids("view_customers_full", "Müll", self.conn), before)
+        search.note_write("CUSTOMERS")
+        self.assertEqual(len(search.search_row_ids("view_customers_full", "Müll", self.conn)), len(before) + 1)
+        # Auch verfeinerte Suchen dürfen nicht mehr aus dem veralteten Ergebnis gefiltert werden
+        self.assert_like_direct("Mülleri")
+
+    def _generation(self):
+        return tuple(search._write_generations.get(table, 0)
+                     for table in search.SEARCH_INDEXES["view_customers_full"]["depends"])
+
+
+if __name__ == "__main__":
+    unittest.main()
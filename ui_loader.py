@@ -0,0 +1,75 @@
+# This file loads the Qt Designer forms, precompiled into Python modules when available
+#
+#   python ui_loader.py        (aus dem Projektverzeichnis, nach jeder Änderung an Qt/*.ui)
+
+import glob
+import importlib
+import os
+
+# Paket mit den übersetzten Formularen (wird erzeugt, nicht eingecheckt)
+COMPILED_PACKAGE = "ui_compiled"
+UI_DIR = "Qt"
+
+
+def _module_name(ui_path):
+    return os.path.splitext(os.path.basename(ui_path))[0]
+
+
+def _compiled_module(ui_path):
+    """
+    Returns the precompiled module of a .ui file, or None if it is missing or older than the .ui file.
+    """
+    try:
+        module = importlib.import_module(f"{COMPILED_PACKAGE}.{_module_name(ui_path)}")
+    except ImportError:
+        return None
+    # In der gepackten Anwendung fehlt die .ui-Datei, dann gilt immer das übersetzte Modul
+    if os.path.exists(ui_path) and os.path.getmtime(ui_path) > os.path.getmtime(module.__file__):
+        print(f"{ui_path} wurde nach dem Übersetzen geändert, lade die .ui-Datei (python ui_loader.py ausführen)")
+        return None
+    return module
+
+
+def load_ui(widget, ui_path):
+    """
+    Builds the form of ui_path into widget, like uic.loadUi(ui_path, widget).
+    Uses the module precompiled by compile_ui_files() if it is up to date: parsing the XML and
+    importing PyQt6.uic at every start is a noticeable part of the startup time.
+    """
+    module = _compiled_module(ui_path)
+    if module is None:
+        from PyQt6 import uic
+        uic.loadUi(ui_path, widget)
+        return
+    ui_class = next(value for name, value in vars(module).items() if name.startswith("Ui_"))
+    ui = ui_class()
+    ui.setupUi(widget)
+    # loadUi legt die benannten Widgets als Attribute am Widget ab, setupUi nur am Ui-Objekt
+    for name, value in vars(ui).items():
+        setattr(widget, name, value)
+
+
+def compile_ui_files(ui_dir=UI_DIR, package=COMPILED_PACKAGE):
+    """
+    Translates every .ui file in ui_dir into a module of package. Paths in the forms (icons)
+    are relative to the project directory, so this has to run there like the application itself.
+    """
+    from PyQt6.uic import compileUi
+
+    os.makedirs(package, exist_ok=True)
+    init_path = os.path.join(package, "__init__.py")
+    if not os.path.exists(init_path):
+        with open(init_path, "w", encoding="utf-8") as f:
+            f.write("# Erzeugt von ui_loader.py aus Qt/*.ui, nicht von Hand bearbeiten\n")
+    compiled = []
+    for ui_path in sorted(glob.glob(os.path.join(ui_dir, "*.ui"))):
+        py_path = os.path.join(package, f"{_module_name(ui_path)}.py")
+        with open(py_path, "w", encoding="utf-8") as f:
+            compileUi(ui_path, f)
+        compiled.append(py_path)
+    return compiled
+
+
+if __name__ == "__main__":
+    for path in compile_ui_files():
+        print(f"übersetzt: {path}")
@@ -1,9 +1,8 @@
 # This file contains utility functions for the application
-import sqlite3
 import traceback
 
 from PyQt6.QtWidgets import QMessageBox
-from config import DB_PATH, IS_AUTHORIZATION_ACTIVE
+from auth.session import Session, current_session
 
 
 def show_error(parent, title, message):
@@ -33,19 +32,9 @@ def get_max_permission(user_id):
     Gibt die höchste PERMISSION_ID des Nutzers zurück.
     Wenn IS_AUTHORIZATION_ACTIVE False ist, wird immer die maximal mögliche Rechte-ID (z.B. 9999) zurückgegeben.
     Falls der Nutzer keine Rechte hat, wird 0 zurückgegeben.
+    Für den angemeldeten Nutzer kommen die Rechte aus dem Cache seiner Session.
     """
-    if not IS_AUTHORIZATION_ACTIVE:
-        return 9999
-
-    with sqlite3.connect(DB_PATH) as conn:
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT MAX(PERMISSION_ID)
-            FROM REF_USER_PERMISSIONS
-            WHERE USER_ID = ?
-        """, (user_id,))
-        row = cur.fetchone()
-        if row and row[0] is not None:
-            return int(row[0])
-        else:
-            return 0
\ No newline at end of file
+    session = current_session()
+    if session is None or session.user_id != user_id:
+        session = Session(user_id)
+    return session.max_permission()